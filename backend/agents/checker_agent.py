@@ -1,21 +1,116 @@
-import json
+import json,logging
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
-from schema.schemas import Problem
-from config import client 
+from schema.schemas import Problem,SolutionRequest
+from controllers.llm_gateway import chat_completion
+from controllers.sandbox import run_solution,is_python,case_errors
+from controllers.suite_store import get_suite
+from controllers.metrics import stage_timer
+from controllers.complexity import measure_efficiency
+from controllers.problem_bank import find_problem
+from controllers.generation_jobs import job_runner
+from config import COMPLEXITY_PROFILE
 
-def checker_agent(problem:Problem,user_code:str,language:str)->dict:
+async def analyse_results(problem:Problem,user_code:str,language:str,results:list)->dict:
+      """Ask the LLM for complexity analysis and fixes, given test results that were actually executed"""
+      failed=[{k:case.get(k) for k in ("input","expected_output","actual_output","error")} for case in results if not case["passed"]]
+      prompt=f"""
+      The user's code below was executed against the problem's tests.
+
+      PROBLEM:
+      {problem.description}
+
+      USER'S CODE({language}):
+      {user_code}
+
+      OPTIMAL SOLUTION:
+      {problem.optimal_solution}
+
+      FAILED TEST CASES:
+      {json.dumps(failed,separators=(",",":"))}
+
+      Return ONLY valid JSON with this structure:
+      {{
+      "errors":[
+      {{
+      "type":"ErrorType",
+      "test_case":1,
+      "message":"Error Description and on next line Solution : What changes are needed to make in code"
+      }}
+      ],
+      "efficiency":{{
+       "time_complexity": "O(...)",
+        "optimal_time_complexity": "O(...)",
+        "space_complexity": "O(...)", 
+        "optimal_space_complexity": "O(...)",
+        "comparison": "Comparison explanation"
+      }}
+      }}
+      "errors" must be empty when there are no failed test cases.
+      """
+      with stage_timer("checker","llm_wait"):
+            content=await chat_completion(prompt,temperature=0.3,max_tokens=1500,priority="interactive",task="checker_analysis")
+      with stage_timer("checker","parse"):
+            return json.loads(content[content.find('{'):content.rfind('}')+1])
+
+@job_runner("efficiency")
+async def efficiency_job(request:SolutionRequest,current_user)->Optional[dict]:
+      """Measured complexity of a passing submission, queued once its verdict is out; the LLM's estimate if it cannot be measured"""
+      problem=await run_in_threadpool(find_problem,request.problem_id)
+      if not problem:
+            raise HTTPException(status_code=404,detail=f"Problem {request.problem_id} not found or expired")
+      efficiency=None
+      with stage_timer("checker","profile"):
+            try:
+                  efficiency=await measure_efficiency(problem,request.code)
+            except Exception:
+                  logging.exception("Complexity profiling failed")
+      if efficiency:
+            return efficiency
+      return (await analyse_results(problem,request.code,request.language,[])).get("efficiency")
+
+async def checker_agent(problem:Problem,user_code:str,language:str)->dict:
       """
       Evaluates user's code against problem examples.
-      Simplified version for demosntration:runs example safely.
+      Every submission is judged on the examples plus the problem's canonical test suite.
+      Python code is executed in the sandbox; passing solutions get measured complexity from the
+      profiler in the background (see efficiency_job) and the LLM only explains failures. Other languages are still evaluated entirely by the LLM.
       """
+      suite=await get_suite(problem)
+      suite_cases=suite.cases if suite else []
+      suite_version=suite.version if suite else None
+      cases=[{"input":case.input,"expected_output":case.expected_output} for case in [*problem.examples,*suite_cases]]
+      if is_python(language) and cases:
+            with stage_timer("checker","sandbox"):
+                  executed=await run_solution(user_code,cases,problem.starter_code)
+            results=[case for case in executed if case["passed"] is not None]
+            if results:
+                  passed=all(case["passed"] for case in results)
+                  # a passing solution is profiled by an "efficiency" job after the verdict is returned,
+                  # the LLM is only needed here to explain failures
+                  deferred=passed and COMPLEXITY_PROFILE
+                  try:
+                        analysis={} if deferred else await analyse_results(problem,user_code,language,results)
+                  except Exception:
+                        analysis={}
+                  return jsonable_encoder({
+                        "passed":passed,
+                        "test_cases":results,
+                        "errors":[] if passed else analysis.get("errors") or case_errors(results),
+                        "efficiency":analysis.get("efficiency"),
+                        "efficiency_pending":deferred,
+                        "test_suite_version":suite_version
+                  })
       prompt=f"""
       Evaluate the following code solution for the problem:
 
       PROBLEM:
       {problem.description}
 
-      EXAMPLES:
-      {json.dumps([ex.dict() for ex in problem.examples],indent=2)}
+      TEST CASES:
+      {json.dumps(cases,indent=2)}
 
       CONSTRAINTS:
       {json.dumps(problem.constraints,indent=2)}
@@ -27,7 +122,7 @@ def checker_agent(problem:Problem,user_code:str,language:str)->dict:
       {problem.optimal_solution}
 
       Please eveluate the user's code and :
-      1.Generate 5 diverse test cases with inputs and expected outputs.
+      1.Use exactly the TEST CASES above, in the same order, do not invent new ones.
       2.Determine if the code passes all test cases
       3.Provide detailed errors for any failed test cases
       4.Analyze time and space complexity compared to optimal solution
@@ -59,13 +154,8 @@ def checker_agent(problem:Problem,user_code:str,language:str)->dict:
       }}
       """
       try:
-            response=client.chat.completions.create(
-                  model="openai/gpt-oss-120b",
-                  messages=[{"role":"user","content":prompt}],
-                  temperature=0.3,
-                  max_tokens=3000
-            )
-            content=response.choices[0].message.content
+            with stage_timer("checker","llm_wait"):
+                  content=await chat_completion(prompt,temperature=0.3,max_tokens=3000,priority="interactive",task="evaluation")
             json_start=content.find('{')
             json_end=content.rfind('}')+1
             json_str=content[json_start:json_end]
@@ -76,7 +166,8 @@ def checker_agent(problem:Problem,user_code:str,language:str)->dict:
             "passed": result_data.get("passed", False),
             "test_cases": result_data.get("test_cases", []),
             "errors": result_data.get("errors", []),
-            "efficiency": result_data.get("efficiency")
+            "efficiency": result_data.get("efficiency"),
+            "test_suite_version": suite_version
         })
       except Exception as e:
             raise Exception(f"Checker agent error : {str(e)}")
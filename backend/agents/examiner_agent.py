@@ -1,12 +1,14 @@
-import json,uuid
+import json,uuid,logging
 from fastapi import HTTPException
 from schema.schemas import Problem
-from config import client
-from typing import List
-problems_db={}
-def examiner_agent(data_structure:str,topic:str)->List[Problem]:
-      """AI agent that generates coding problems based on the data structure and topic"""
-      prompt=f"""
+from controllers.llm_gateway import chat_completion,stream_chat_completion
+from controllers.json_stream import JSONArrayStream,parse_json_objects
+from controllers.object_store import create_store
+from controllers.metrics import stage_timer
+from typing import List,Optional
+problems_db=create_store("problems",Problem)
+def build_examiner_prompt(data_structure:str,topic:str)->str:
+      return f"""
       Generate 10 highly detailed coding problems on
  for {data_structure} focusing on {topic}.
       Return only a valid JSON array.Don not include any explainations,notes,or text outside the JSON.
@@ -28,36 +30,17 @@ def examiner_agent(data_structure:str,topic:str)->List[Problem]:
       "For examples,always return 'input' and 'expected_output'
       as strings.Escape all quotes inside strings using backslash(\")."
       """
+def build_problem(problem_data:dict)->Optional[Problem]:
+      """Validate one LLM problem object into a Problem, returns None if it is unusable"""
       try:
-            response=client.chat.completions.create(
-                  model="openai/gpt-oss-120b",
-                  messages=[{"role":"user","content":prompt}],
-                  temperature=0.7,
-                  max_tokens=10000
-            )
-            content=response.choices[0].message.content.strip()
-            json_start=content.find('[')
-            json_end=content.rfind(']')+1
-            if json_start==-1 or json_end==-1:
-                  raise Exception("No JSON array found in AI response")
-            json_str=content[json_start:json_end]
-            try:
-                  problems_data=json.loads(json_str)
-            except json.JSONDecodeError as e:
-                  print("Raw AI response : ",content)
-                  raise Exception(f"JSON parsing error: {str(e)}")
-            for problem_data in problems_data:
-                  for example in problem_data.get("examples",[]):
-                        if isinstance(example.get("input"),list):
-                              example["input"]=json.dumps(example["input"])
-                        if isinstance(example.get("expected_output"),list):
-                              example["expected_output"]=json.dumps(example["expected_output"])
-                        example.setdefault("explanation","")
-            problems=[]
-            for problem_data in problems_data:
-                  problem_id=str(uuid.uuid4())
-                  problem = Problem(
-                id=problem_id,
+            for example in problem_data.get("examples",[]):
+                  if not isinstance(example.get("input"),str):
+                        example["input"]=json.dumps(example.get("input"))
+                  if not isinstance(example.get("expected_output"),str):
+                        example["expected_output"]=json.dumps(example.get("expected_output"))
+                  example.setdefault("explanation","")
+            problem = Problem(
+                id=str(uuid.uuid4()),
                 title=problem_data["title"],
                 difficulty=problem_data["difficulty"],
                 description=problem_data["description"],
@@ -65,11 +48,41 @@ def examiner_agent(data_structure:str,topic:str)->List[Problem]:
                 constraints=problem_data["constraints"],
                 starter_code=problem_data.get("starter_code", ""),
                 optimal_solution=problem_data.get("optimal_solution", ""),
-                optimal_explanation=problem_data.get("optimal_explanation", "")
+                optimal_explaination=problem_data.get("optimal_explaination") or problem_data.get("optimal_explanation", "")
             )
-                  problems.append(problem)
-                  problems_db[problem_id]=problem
+            return problem
+      except Exception as e:
+            logging.warning(f"Skipping invalid problem from AI response: {str(e)}")
+            return None
+async def examiner_agent(data_structure:str,topic:str)->List[Problem]:
+      """AI agent that generates coding problems based on the data structure and topic"""
+      with stage_timer("examiner","prompt_build"):
+            prompt=build_examiner_prompt(data_structure,topic)
+      try:
+            with stage_timer("examiner","llm_wait"):
+                  content=(await chat_completion(prompt,temperature=0.7,max_tokens=10000,task="problem_generation")).strip()
+            with stage_timer("examiner","parse"):
+                  problems_data=parse_json_objects(content)
+            if not problems_data:
+                  print("Raw AI response : ",content)
+                  raise Exception("No JSON array found in AI response")
+            problems=[]
+            with stage_timer("examiner","validate"):
+                  for problem_data in problems_data:
+                        problem=build_problem(problem_data)
+                        if problem:
+                              problems.append(problem)
+            if not problems:
+                  raise Exception("No valid problems in AI response")
             return problems
 
       except Exception as e:
             raise HTTPException(status_code=500, detail=f"Examiner agent error: {str(e)}")
+async def stream_examiner_agent(data_structure:str,topic:str):
+      """Yield each Problem as soon as its JSON object has been streamed by the LLM"""
+      parser=JSONArrayStream()
+      async for delta in stream_chat_completion(build_examiner_prompt(data_structure,topic),temperature=0.7,max_tokens=10000,task="problem_generation"):
+            for problem_data in parser.feed(delta):
+                  problem=build_problem(problem_data)
+                  if problem:
+                        yield problem
@@ -1,26 +1,19 @@
 from schema.schemas import QuizRequest, QuizResponse, Question, EvaluationResult
-from config import client
+from controllers.llm_gateway import chat_completion, stream_chat_completion
+from controllers.json_stream import JSONArrayStream, parse_json_objects, loads_tolerant
 from fastapi import HTTPException
-from typing import Dict, Any
-import json,re,time,math
+from fastapi.concurrency import run_in_threadpool
+from controllers.object_store import create_store
+from controllers.metrics import stage_timer
+from config import QUIZ_BATCH_SIZE, QUIZ_REFILL_ROUNDS
+from typing import Dict, Any, List, Optional
+import json,re,asyncio,logging
 import uuid
 
-quizzes_db = {}
+quizzes_db = create_store("quizzes", QuizResponse)
 
-def clean_json(raw_content: str):
-    """Extract valid JSON array from LLM output."""
-    raw_content = re.sub(r"```(json)?", "", raw_content).strip("` \n")
-    json_match = re.search(r"\[.*\]", raw_content, re.DOTALL)
-    if json_match:
-        json_str = json_match.group(0)
-    else:
-        json_str = raw_content.strip()
-    return json_str
-
-
-def llm_generate_questions(topic, subtopic, language, num_questions):
-    """Helper to call LLM and parse questions."""
-    prompt = f"""
+def build_questions_prompt(topic, subtopic, language, num_questions):
+    return f"""
     Generate {num_questions} quiz questions for topic '{topic}' and subtopic '{subtopic}'
     in {language}.
 
@@ -35,115 +28,252 @@ def llm_generate_questions(topic, subtopic, language, num_questions):
     - explanation (string)
     """
 
-    response = client.chat.completions.create(
-        model="openai/gpt-oss-120b",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_tokens=2000
-    )
-
-    raw_content = response.choices[0].message.content.strip()
-    json_str = clean_json(raw_content)
 
+def build_question(question_data: dict) -> Optional[Question]:
+    """Validate one LLM question object, ids are reassigned by the caller."""
     try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
+        question_data["id"] = 0
+        question_data.setdefault("explanation", "")
+        return Question(**question_data)
+    except Exception as e:
+        logging.warning(f"Skipping invalid quiz question from LLM: {str(e)}")
+        return None
+
+
+async def llm_generate_questions(topic, subtopic, language, num_questions) -> List[Question]:
+    """Helper to call LLM and parse questions."""
+    with stage_timer("quiz", "prompt_build"):
+        prompt = build_questions_prompt(topic, subtopic, language, num_questions)
+    with stage_timer("quiz", "llm_wait"):
+        raw_content = (await chat_completion(prompt, temperature=0.7, max_tokens=2000, task="quiz_generation")).strip()
+    with stage_timer("quiz", "parse"):
+        objects = parse_json_objects(raw_content)
+    with stage_timer("quiz", "validate"):
+        questions = [q for q in map(build_question, objects) if q]
+    if not questions:
         raise HTTPException(
             status_code=500,
             detail=f"Invalid JSON from LLM. Partial output: {raw_content[:300]}"
         )
+    return questions
 
 
-def generate_quiz(request: QuizRequest) -> QuizResponse:
-    """Generate quiz safely even for large num_questions."""
+async def stream_questions(topic, subtopic, language, num_questions):
+    """Yield each question as soon as the LLM has streamed its JSON object."""
+    prompt = build_questions_prompt(topic, subtopic, language, num_questions)
+    parser = JSONArrayStream()
+    async for delta in stream_chat_completion(prompt, temperature=0.7, max_tokens=2000, task="quiz_generation"):
+        for question_data in parser.feed(delta):
+            question = build_question(question_data)
+            if question:
+                yield question
+
+
+def quiz_details(request: QuizRequest) -> dict:
+    """Everything in a QuizResponse except the questions."""
+    quiz_id = f"{request.topic}_{request.subtopic}_{request.difficulty}_{str(uuid.uuid4())[:8]}"
+    time_limit = request.num_questions * (
+        1 if request.difficulty == "easy"
+        else 2 if request.difficulty == "medium"
+        else 3
+    )
+    return {
+        "quiz_id": quiz_id,
+        "title": f"{request.topic}: {request.subtopic} in {request.language}",
+        "description": f"Test your knowledge of {request.subtopic} in {request.topic} using {request.language}.",
+        "time_limit": time_limit
+    }
+
+
+def batch_sizes(num_questions: int, batch_size: int = QUIZ_BATCH_SIZE) -> List[int]:
+    return [min(batch_size, num_questions - start) for start in range(0, num_questions, batch_size)]
+
+
+def question_key(question: Question) -> str:
+    """Normalized question text used to drop duplicates generated by parallel batches."""
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", question.question.lower()).split())
+
+
+def merge_batches(batches, seen: set, limit: int) -> List[Question]:
+    """Merge batch results in batch order, skipping failed batches and repeated questions."""
+    merged = []
+    for batch in batches:
+        if isinstance(batch, Exception):
+            logging.error(f"Quiz batch failed: {str(batch)}")
+            continue
+        for question in batch:
+            key = question_key(question)
+            if key in seen or len(merged) >= limit:
+                continue
+            seen.add(key)
+            merged.append(question)
+    return merged
+
+
+async def generate_quiz(request: QuizRequest) -> QuizResponse:
+    """
+    Generate quiz safely even for large num_questions.
+    Batches run concurrently under the gateway's rate budget, one extra round refills any
+    shortfall left by failed batches or duplicates, and ids are reassigned after merging.
+    """
     try:
-        batch_size = 10  
-        total_batches = math.ceil(request.num_questions / batch_size)
-
-        all_questions = []
-        for batch in range(total_batches):
-            remaining = request.num_questions - len(all_questions)
-            num_to_generate = min(batch_size, remaining)
-            batch_questions = llm_generate_questions(
-                request.topic, request.subtopic, request.language, num_to_generate
+        all_questions, seen = [], set()
+        for attempt in range(1 + QUIZ_REFILL_ROUNDS):
+            missing = request.num_questions - len(all_questions)
+            if missing <= 0:
+                break
+            batches = await asyncio.gather(
+                *(llm_generate_questions(request.topic, request.subtopic, request.language, size)
+                  for size in batch_sizes(missing)),
+                return_exceptions=True
             )
-            for i, q in enumerate(batch_questions):
-                q["id"] = len(all_questions) + i + 1
-            all_questions.extend(batch_questions)
-            time.sleep(0.5)
-        quiz_id = f"{request.topic}_{request.subtopic}_{request.difficulty}_{str(uuid.uuid4())[:8]}"
-        time_limit = request.num_questions * (
-            1 if request.difficulty == "easy"
-            else 2 if request.difficulty == "medium"
-            else 3
-        )
-        description = f"Test your knowledge of {request.subtopic} in {request.topic} using {request.language}."
-
-        quiz = QuizResponse(
-            quiz_id=quiz_id,
-            title=f"{request.topic}: {request.subtopic} in {request.language}",
-            description=description,
-            questions=[Question(**q) for q in all_questions],
-            time_limit=time_limit
-        )
+            if not all_questions and all(isinstance(batch, Exception) for batch in batches):
+                raise batches[0]
+            all_questions.extend(merge_batches(batches, seen, missing))
 
-        quizzes_db[quiz_id] = quiz
-        return quiz
+        questions = [q.model_copy(update={"id": i + 1}) for i, q in enumerate(all_questions)]
+        return QuizResponse(**quiz_details(request), questions=questions)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
 
-def evaluate_quizzes_with_agent(quiz_id: str, answers: Dict[int, Any]) -> EvaluationResult:
-    """Evaluate quiz answers dynamically using an LLM."""
-    if quiz_id not in quizzes_db:
-        raise HTTPException(status_code=404, detail="Quiz not found")
+async def stream_quiz(request: QuizRequest):
+    """Yield questions from all batches concurrently as they stream in, numbered in arrival order."""
+    queue = asyncio.Queue()
+
+    async def produce(size):
+        try:
+            async for question in stream_questions(request.topic, request.subtopic, request.language, size):
+                await queue.put(question)
+        except Exception as e:
+            logging.error(f"Quiz batch failed: {str(e)}")
+        finally:
+            await queue.put(None)
 
-    quiz = quizzes_db[quiz_id]
+    tasks = [asyncio.create_task(produce(size)) for size in batch_sizes(request.num_questions)]
     try:
-        prompt = f"""
-        You are an expert teacher. Evaluate the following quiz answers.
-
-        QUIZ QUESTIONS:
-        {json.dumps([q.dict() for q in quiz.questions], indent=2)}
-
-        USER ANSWERS:
-        {json.dumps(answers, indent=2)}
-
-        Return ONLY a valid JSON object with:
-        - score (0–100)
-        - correct_answers (int)
-        - total_questions (int)
-        - feedback (dict mapping question id → feedback string)
-        - recommendations (string)
-        NO extra text, explanations, or markdown formatting.
-        """
-
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=10000
-        )
+        finished, count, seen = 0, 0, set()
+        while finished < len(tasks):
+            question = await queue.get()
+            if question is None:
+                finished += 1
+                continue
+            key = question_key(question)
+            if key in seen or count >= request.num_questions:
+                continue
+            seen.add(key)
+            count += 1
+            yield question.model_copy(update={"id": count})
+    finally:
+        for task in tasks:
+            task.cancel()
 
-        raw_output = response.choices[0].message.content.strip()
-        cleaned_output = re.sub(r"^```(?:json)?|```$", "", raw_output, flags=re.MULTILINE).strip()
-        json_match = re.search(r"\{[\s\S]*\}", cleaned_output)
-        if not json_match:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Invalid JSON format in model response: {raw_output[:200]}"
-            )
 
-        json_str = json_match.group(0)
-        try:
-            result_data = json.loads(json_str)
-        except json.JSONDecodeError:
-            json_str = re.sub(r",\s*}", "}", json_str)
-            json_str = re.sub(r",\s*]", "]", json_str)
-        return EvaluationResult(**result_data)
-
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=500, detail=f"JSON parsing failed: {str(e)} | Raw: {raw_output[:200]}")
+def normalize_answer(value) -> str:
+    return " ".join(str(value).strip().lower().split())
+
+
+def option_index(question: Question, value) -> Optional[int]:
+    """Resolve an MCQ answer given as an index, numeric string, option text or option letter."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    text = str(value).strip()
+    if re.fullmatch(r"-?\d+", text):
+        return int(text)
+    options = question.options or []
+    for i, option in enumerate(options):
+        if normalize_answer(option) == normalize_answer(text):
+            return i
+    if len(text) == 1 and text.isalpha() and ord(text.upper()) - ord("A") < len(options):
+        return ord(text.upper()) - ord("A")
+    return None
+
+
+def grade_mcq(question: Question, answer):
+    """Score one MCQ from the stored correct_answer, returns (correct, feedback) or None if the key is unusable."""
+    correct_index = option_index(question, question.correct_answer)
+    options = question.options or []
+    if correct_index is None or not 0 <= correct_index < len(options):
+        return None
+    correct_option = options[correct_index]
+    if answer is None:
+        return False, f"Not answered. The correct answer is '{correct_option}'. {question.explanation}".strip()
+    if option_index(question, answer) == correct_index:
+        return True, f"Correct! {question.explanation}".strip()
+    return False, f"Incorrect. The correct answer is '{correct_option}'. {question.explanation}".strip()
+
+
+async def grade_text_answers(questions: List[Question], answers: Dict[int, Any]) -> Dict[int, tuple]:
+    """Grade all free-text answers with a single compact LLM prompt."""
+    items = [
+        {"id": q.id, "q": q.question, "expected": str(q.correct_answer), "answer": str(answers[q.id])}
+        for q in questions
+    ]
+    prompt = f"""
+    Grade each student answer against the expected answer; accept answers that are correct in meaning.
+    Return ONLY a JSON object mapping each id to {{"correct": true/false, "feedback": "one or two sentences"}}.
+    {json.dumps(items, separators=(",", ":"))}
+    """
+    with stage_timer("quiz_grader", "llm_wait"):
+        raw_output = await chat_completion(prompt, temperature=0.2, max_tokens=200 + 120 * len(items), priority="interactive", task="quiz_grading")
+    with stage_timer("quiz_grader", "parse"):
+        grades = loads_tolerant(raw_output[raw_output.find("{"):raw_output.rfind("}") + 1])
+    if not isinstance(grades, dict):
+        raise HTTPException(status_code=500, detail=f"Invalid JSON format in model response: {raw_output[:200]}")
+    results = {}
+    for q in questions:
+        grade = grades.get(str(q.id)) or grades.get(q.id) or {}
+        results[q.id] = (bool(grade.get("correct")), grade.get("feedback") or q.explanation)
+    return results
+
+
+async def evaluate_quizzes_with_agent(quiz_id: str, answers: Dict[int, Any]) -> EvaluationResult:
+    """
+    Evaluate quiz answers. MCQs are scored locally from the stored correct_answer;
+    only answered free-text questions are sent to the LLM, batched into one prompt.
+    """
+    quiz = await run_in_threadpool(quizzes_db.get, quiz_id)
+    if quiz is None:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    try:
+        results = {}
+        needs_llm = []
+        for question in quiz.questions:
+            answer = answers.get(question.id)
+            graded = grade_mcq(question, answer) if question.type == "mcq" else None
+            if graded:
+                results[question.id] = graded
+            elif answer is None or not str(answer).strip():
+                results[question.id] = (False, f"Not answered. Expected: {question.correct_answer}. {question.explanation}".strip())
+            elif normalize_answer(answer) == normalize_answer(question.correct_answer):
+                results[question.id] = (True, f"Correct! {question.explanation}".strip())
+            else:
+                needs_llm.append(question)
+        if needs_llm:
+            results.update(await grade_text_answers(needs_llm, answers))
+
+        total = len(quiz.questions)
+        correct = sum(1 for ok, _ in results.values() if ok)
+        missed = [str(q.id) for q in quiz.questions if not results[q.id][0]]
+        recommendation = (
+            f"Excellent work! You have a solid grasp of {quiz.title}."
+            if not missed else
+            f"Review the explanations for question(s) {', '.join(missed)} and revisit {quiz.title} before retrying."
+        )
+        return EvaluationResult(
+            score=round(correct / total * 100, 2) if total else 0,
+            correct_answers=correct,
+            total_questions=total,
+            feedback={qid: feedback for qid, (_, feedback) in results.items()},
+            recommendation=recommendation
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error evaluating quiz: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error evaluating quiz: {str(e)}")
@@ -1,7 +1,8 @@
 from controllers.groq_setup import query_groq
-def teacher_agent(concept:str,language:str="python",difficulty:str="beginner")->str:
-      """Generate a Markdown-formatted explanation for a DSA concept using the Teacher Agent"""
-      prompt=f"""
+from controllers.llm_gateway import stream_chat_completion
+from controllers.metrics import stage_timer
+def build_teacher_prompt(concept:str,language:str,difficulty:str)->str:
+      return f"""
       Explain the Data Structures and Algorithms concept '{concept}' in simple terms
       Target audience : {difficulty} level
       Programming Language {language}
@@ -16,8 +17,18 @@ def teacher_agent(concept:str,language:str="python",difficulty:str="beginner")->
       Use ## for main headings and ### for subheadings.
       Provide code examples in code blocks with proper syntax highlighting for {language}
       """
+async def teacher_agent(concept:str,language:str="python",difficulty:str="beginner")->str:
+      """Generate a Markdown-formatted explanation for a DSA concept using the Teacher Agent"""
+      with stage_timer("teacher","prompt_build"):
+            prompt=build_teacher_prompt(concept,language,difficulty)
       try:
-            response=query_groq(prompt)
+            with stage_timer("teacher","llm_wait"):
+                  response=await query_groq(prompt)
             return response
       except Exception as e:
             return f"#Error generating explaination\n\nUnable to generate explaination due to :{str(e)}" 
+
+async def stream_teacher_agent(concept:str,language:str="python",difficulty:str="beginner"):
+      """Stream the Teacher Agent's Markdown explanation as it is generated"""
+      async for delta in stream_chat_completion(build_teacher_prompt(concept,language,difficulty),temperature=0.7,max_tokens=4000,priority="explanation",task="explanation"):
+            yield delta
@@ -1,20 +1,81 @@
 from schema.schemas import SolutionRequest,TestResult
-from agents.examiner_agent import problems_db
-from config import client
+from controllers.problem_bank import find_problem
+from fastapi.concurrency import run_in_threadpool
+from controllers.llm_gateway import chat_completion
+from controllers.sandbox import run_solution, is_python, case_errors
+from controllers.metrics import stage_timer
+from controllers.suite_store import get_suite
 from fastapi import HTTPException
 import json
-def test_agent(request: SolutionRequest, current_user):
+
+QUICK_SUITE_CASES = 5
+
+async def failure_hint(problem, code: str, failed: list) -> str:
+    """Ask the LLM for a short idea-level hint about the failing cases, never a fix."""
+    cases = json.dumps([
+        {k: case.get(k) for k in ("input", "expected_output", "actual_output", "error")} for case in failed[:3]
+    ], separators=(",", ":"))
+    prompt = f"""
+    A student's code fails some tests. Give ONE brief hint (max 2 sentences) about where the idea falls short,
+    without revealing the solution and without any code.
+
+    PROBLEM: {problem.description}
+    CODE: {code}
+    FAILING CASES: {cases}
+    """
+    try:
+        return (await chat_completion(prompt, temperature=0.3, max_tokens=300, priority="interactive", task="hint")).strip()
+    except Exception:
+        return ""
+
+async def quick_cases(problem) -> list:
+    """The examples plus the first (edge) cases of the problem's differential suite, never an LLM-built one."""
+    cases = [{"input": ex.input, "expected_output": ex.expected_output} for ex in problem.examples]
+    suite = await get_suite(problem, llm_fallback=False)
+    if suite and suite.source == "differential":
+        cases += [{"input": case.input, "expected_output": case.expected_output} for case in suite.cases[:QUICK_SUITE_CASES]]
+    return cases
+
+async def run_local_tests(problem, request: SolutionRequest, cases: list):
+    """Run a Python submission on the quick cases in the sandbox, None if no case could be run."""
+    with stage_timer("tester", "sandbox"):
+        results = await run_solution(request.code, cases, problem.starter_code)
+    ran = [case for case in results if case["passed"] is not None]
+    if not ran:
+        return None
+    passed = all(case["passed"] for case in ran)
+    return TestResult(
+        passed=passed,
+        test_cases=ran,
+        errors=case_errors(ran),
+        efficiency=None,
+        hint="" if passed else await failure_hint(problem, request.code, [c for c in ran if not c["passed"]])
+    )
+
+async def test_agent(request: SolutionRequest, current_user):
     """
     Run basic tests without full evaluation.
+    Python submissions are executed on the examples and the first differential cases; other languages are checked by the LLM.
     """
     try:
-        problem = problems_db.get(request.problem_id)
+        problem = await run_in_threadpool(find_problem, request.problem_id)
         if not problem:
             raise HTTPException(status_code=404, detail="Problem not found or expired")
-        
-        examples_json = json.dumps([ex.dict() for ex in problem.examples[:2]], indent=2)
+        cases = await quick_cases(problem)
+        if is_python(request.language) and cases:
+            result = await run_local_tests(problem, request, cases)
+            if result:
+                return result
+
+        if len(cases) > len(problem.examples):
+            # expected outputs were computed from the reference solution, the LLM only traces the code
+            examples_json = json.dumps(cases, indent=2)
+            instruction = "Quickly test this code on exactly these test cases; their expected outputs are correct:"
+        else:
+            examples_json = json.dumps([ex.dict() for ex in problem.examples[:2]], indent=2)
+            instruction = "Quickly test this code with 5 basic test cases according to the description:"
         prompt = f"""
-        Quickly test this code with 5 basic test cases according to the description:
+        {instruction}
 
         PROBLEM: {problem.description}
         EXAMPLES: {examples_json}
@@ -34,18 +95,14 @@ def test_agent(request: SolutionRequest, current_user):
       ]
         }}
         """
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=5000
-        )
-        content = response.choices[0].message.content
+        with stage_timer("tester", "llm_wait"):
+            content = await chat_completion(prompt, temperature=0.3, max_tokens=5000, priority="interactive", task="test_run")
         json_start = content.find('{')
         json_end = content.rfind('}') + 1
         json_str = content[json_start:json_end]
-    
-        result_data = json.loads(json_str)
+
+        with stage_timer("tester", "parse"):
+            result_data = json.loads(json_str)
         return TestResult(
             passed=result_data.get("passed", False),
             test_cases=result_data.get("test_cases", []),
@@ -53,5 +110,7 @@ def test_agent(request: SolutionRequest, current_user):
             efficiency=None, 
             hint=result_data.get("hint", "")  
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error running tests: {str(e)}")
\ No newline at end of file
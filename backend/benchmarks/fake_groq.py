@@ -0,0 +1,153 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat-completions API, used by the benchmarks.
+
+    FAKE_LLM_LATENCY_MS=400 FAKE_LLM_TOKENS_PER_SECOND=500 uvicorn benchmarks.fake_groq:app --port 8766
+
+The prompt is matched to the agent that sent it and answered with a recorded, schema-valid response
+(problems, quiz questions, grades, test results, Markdown explanations). Every call waits the base
+latency (plus jitter) and then emits the completion at the configured token rate, streamed or not.
+"""
+import asyncio,json,os,random,re,time,uuid
+from fastapi import FastAPI,Request
+from fastapi.responses import StreamingResponse
+
+LATENCY_MS=float(os.getenv("FAKE_LLM_LATENCY_MS","400"))
+JITTER_MS=float(os.getenv("FAKE_LLM_JITTER_MS","100"))
+TOKENS_PER_SECOND=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND","500"))
+ERROR_RATE=float(os.getenv("FAKE_LLM_ERROR_RATE","0"))
+# per-model first-token latency, e.g. "llama-3.1-8b-instant=150,openai/gpt-oss-120b=900", to exercise model routing
+MODEL_LATENCY_MS={model:float(ms) for model,_,ms in
+                  (item.rpartition("=") for item in os.getenv("FAKE_LLM_MODEL_LATENCY_MS","").split(",") if item)}
+
+app=FastAPI()
+
+#-------------------Recorded responses----------------------------#
+EXPLANATION="""## Definition
+A {concept} organises data so that the operations you need most are cheap.
+
+## How it works
+Each operation maintains the structure's invariant, so lookups never have to scan everything.
+
+### Example
+```python
+def demo(items):
+    return sorted(items)
+```
+
+## Key points
+1. Know the invariant.
+2. Know the cost of each operation.
+3. Pick it when its cheap operations match your workload.
+
+## Real world applications
+Schedulers, caches and indexes."""
+
+PROBLEM={
+    "title":"Sum of a list",
+    "difficulty":"easy",
+    "description":"Given a list of integers nums, return the sum of its elements. The list may be empty, "
+                  "in which case the sum is 0. Values can be negative. This warms up iteration over arrays. "
+                  "Aim for a single pass. Do not modify the input.",
+    "examples":[
+        {"input":"nums = [1, 2, 3]","expected_output":"6","explaination":"1 + 2 + 3 = 6."},
+        {"input":"nums = []","expected_output":"0","explaination":"An empty list sums to 0."},
+        {"input":"nums = [-1, 5]","expected_output":"4","explaination":"-1 + 5 = 4."}
+    ],
+    "constraints":["0 <= len(nums) <= 10^5","-10^4 <= nums[i] <= 10^4"],
+    "starter_code":"def solve(nums):\n    # return the sum of nums\n    pass\n",
+    "optimal_solution":"def solve(nums):\n    total = 0\n    for value in nums:\n        total += value\n    return total\n",
+    "optimal_explaination":"Walk the list once and accumulate. That is O(n) time and O(1) extra space."
+}
+
+def problems(prompt:str)->str:
+    match=re.search(r"Generate (\d+)",prompt)
+    return json.dumps([{**PROBLEM,"title":f"{PROBLEM['title']} #{i+1}"} for i in range(int(match.group(1)) if match else 10)])
+
+def questions(prompt:str)->str:
+    match=re.search(r"Generate (\d+) quiz questions",prompt)
+    count=int(match.group(1)) if match else 5
+    batch=uuid.uuid4().hex[:6]
+    items=[]
+    for i in range(count):
+        if i%4==3:
+            items.append({"id":i+1,"type":"text","question":f"Explain the invariant ({batch}-{i})",
+                          "correct_answer":"It always holds after each operation","explanation":"Invariants make costs predictable."})
+        else:
+            items.append({"id":i+1,"type":"mcq","question":f"Which operation is O(1)? ({batch}-{i})",
+                          "options":["peek","search","sort","merge"],"correct_answer":0,"explanation":"Peeking reads one slot."})
+    return json.dumps(items)
+
+def grades(prompt:str)->str:
+    ids=re.findall(r'"id":(\d+)',prompt)
+    return json.dumps({i:{"correct":True,"feedback":"Right idea."} for i in ids})
+
+def test_cases(prompt:str)->str:
+    match=re.search(r"Generate (\d+) diverse",prompt)
+    return json.dumps([{"input":f"nums = [{i}, {i+1}]","expected_output":str(2*i+1)} for i in range(int(match.group(1)) if match else 5)])
+
+def analysis(prompt:str)->str:
+    return json.dumps({"errors":[],"efficiency":{
+        "time_complexity":"O(n)","optimal_time_complexity":"O(n)","space_complexity":"O(1)",
+        "optimal_space_complexity":"O(1)","comparison":"Matches the optimal solution."}})
+
+def test_result(prompt:str)->str:
+    return json.dumps({"passed":True,"hint":"","test_cases":[
+        {"input":"nums = [1, 2, 3]","expected_output":"6","actual_output":"6","passed":True}]})
+
+ROUTES=(
+    ("coding problems",problems),
+    ("quiz questions",questions),
+    ("Grade each student answer",grades),
+    ("diverse test cases",test_cases),
+    ("was executed against the problem's tests",analysis),
+    ("Give ONE brief hint",lambda prompt:"Check how you handle the empty list."),
+    ("Quickly test this code",test_result),
+    ("Evaluate the following code solution",lambda prompt:json.dumps({**json.loads(test_result(prompt)),**json.loads(analysis(prompt))})),
+)
+#-------------------Recorded responses----------------------------#
+
+def completion_for(prompt:str)->str:
+    for marker,respond in ROUTES:
+        if marker in prompt:
+            return respond(prompt)
+    concept=re.search(r"concept '([^']+)'",prompt)
+    return EXPLANATION.format(concept=concept.group(1) if concept else "data structure")
+
+def usage(prompt:str,content:str)->dict:
+    prompt_tokens,completion_tokens=len(prompt)//4,max(1,len(content)//4)
+    return {"prompt_tokens":prompt_tokens,"completion_tokens":completion_tokens,"total_tokens":prompt_tokens+completion_tokens}
+
+async def first_token_delay(model:str):
+    await asyncio.sleep(max(0.0,random.gauss(MODEL_LATENCY_MS.get(model,LATENCY_MS),JITTER_MS))/1000)
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request:Request):
+    body=await request.json()
+    prompt="\n".join(message.get("content") or "" for message in body.get("messages",[]))
+    model=body.get("model","fake")
+    if ERROR_RATE and random.random()<ERROR_RATE:
+        return StreamingResponse(iter([json.dumps({"error":{"message":"fake overload","type":"server_error"}})]),
+                                 status_code=503,media_type="application/json")
+    content=completion_for(prompt)
+    created=int(time.time())
+    completion_id=f"chatcmpl-{uuid.uuid4().hex}"
+    await first_token_delay(model)
+    if not body.get("stream"):
+        await asyncio.sleep(len(content)/4/TOKENS_PER_SECOND)
+        return {
+            "id":completion_id,"object":"chat.completion","created":created,"model":model,
+            "choices":[{"index":0,"message":{"role":"assistant","content":content},"finish_reason":"stop"}],
+            "usage":usage(prompt,content)
+        }
+    async def chunks():
+        step=64
+        for start in range(0,len(content),step):
+            piece=content[start:start+step]
+            yield "data: "+json.dumps({"id":completion_id,"object":"chat.completion.chunk","created":created,"model":model,
+                                       "choices":[{"index":0,"delta":{"content":piece},"finish_reason":None}]})+"\n\n"
+            await asyncio.sleep(len(piece)/4/TOKENS_PER_SECOND)
+        yield "data: "+json.dumps({"id":completion_id,"object":"chat.completion.chunk","created":created,"model":model,
+                                   "choices":[{"index":0,"delta":{},"finish_reason":"stop"}],
+                                   "x_groq":{"id":completion_id,"usage":usage(prompt,content)}})+"\n\n"
+        yield "data: [DONE]\n\n"
+    return StreamingResponse(chunks(),media_type="text/event-stream")
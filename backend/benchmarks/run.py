@@ -0,0 +1,283 @@
+"""
+Load-test the API end to end against the local fake LLM provider.
+
+    python -m benchmarks.run --concurrency 32 --duration 60 --output results.json
+    python -m benchmarks.run --concurrency 32 --duration 60 --compare results.json
+
+Starts benchmarks.fake_groq and the app (uvicorn main:app) as subprocesses, bootstraps the users and
+dsa_explanations tables (a throwaway SQLite file unless --database-url is given), signs up --users
+accounts and then drives a weighted mix of login, explain, generate-problems, run-tests, quiz generate
+and quiz evaluate. Reports p50/p95/p99 latency, throughput and error rate per endpoint; --output writes
+the report as JSON and --compare prints the change against an earlier report.
+Run from the backend directory.
+"""
+import argparse,asyncio,json,os,random,subprocess,sys,tempfile,time,uuid
+import httpx
+from sqlalchemy import create_engine,text
+
+CONCEPTS=["Binary Search Tree","Heap","Linked List","Hash Map","Trie","Graph BFS","Dynamic Programming","Stack","Queue","Segment Tree"]
+TOPICS=[("Array","Two Pointers"),("Heap","Top K elements"),("Graph","Shortest Path"),("Tree","Traversal"),("String","Sliding Window")]
+SOLUTION="def solve(nums):\n    return sum(nums)\n"
+DEFAULT_MIX="login=1,explain=3,problems=2,run_tests=3,quiz=2,quiz_eval=2"
+SERVER_STARTUP_TIMEOUT=60
+
+#-------------------Setup----------------------------#
+def bootstrap_tables(database_url:str):
+    """Tables the app expects to exist already; everything else is created at startup"""
+    engine=create_engine(database_url)
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS users (
+                  id VARCHAR(64) PRIMARY KEY,
+                  name VARCHAR(255),
+                  email VARCHAR(255) UNIQUE,
+                  password VARCHAR(255),
+                  profilephoto TEXT,
+                  level VARCHAR(32),
+                  profile TEXT
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS dsa_explanations (
+                  id VARCHAR(64) PRIMARY KEY,
+                  user_id VARCHAR(64),
+                  title VARCHAR(255),
+                  content TEXT,
+                  markdown_content TEXT,
+                  language VARCHAR(32),
+                  difficulty VARCHAR(32),
+                  created_at TIMESTAMP,
+                  updated_at TIMESTAMP
+            )
+        """))
+    engine.dispose()
+
+def start_servers(args,database_url:str)->list:
+    env={**os.environ,
+         "FAKE_LLM_LATENCY_MS":str(args.latency_ms),
+         "FAKE_LLM_JITTER_MS":str(args.jitter_ms),
+         "FAKE_LLM_TOKENS_PER_SECOND":str(args.tokens_per_second),
+         "FAKE_LLM_ERROR_RATE":str(args.llm_error_rate),
+         "FAKE_LLM_MODEL_LATENCY_MS":args.model_latency_ms}
+    fake=subprocess.Popen([sys.executable,"-m","uvicorn","benchmarks.fake_groq:app","--port",str(args.fake_port),
+                           "--log-level","warning"],env=env)
+    env={**os.environ,
+         "DATABASE_URL":database_url,
+         "GROQ_API_KEY":"bench",
+         "GROQ_BASE_URL":f"http://127.0.0.1:{args.fake_port}",
+         "JWT_SECRET":os.getenv("JWT_SECRET","bench-secret-for-local-load-tests-only"),
+         "JWT_ALGORITHM":os.getenv("JWT_ALGORITHM","HS256")}
+    app=subprocess.Popen([sys.executable,"-m","uvicorn","main:app","--port",str(args.port),"--workers",str(args.workers),
+                          "--log-level","warning"],env=env)
+    return [fake,app]
+
+def stop_servers(processes:list):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+async def wait_until_up(client:httpx.AsyncClient,processes:list):
+    deadline=time.monotonic()+SERVER_STARTUP_TIMEOUT
+    while time.monotonic()<deadline:
+        if any(process.poll() is not None for process in processes):
+            raise RuntimeError("a server exited during startup")
+        try:
+            if (await client.get("/metrics")).status_code==200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"the app did not come up within {SERVER_STARTUP_TIMEOUT}s")
+#-------------------Setup----------------------------#
+
+#-------------------Workload----------------------------#
+class Recorder:
+    def __init__(self):
+        self.latencies={}
+        self.errors={}
+        self.statuses={}
+
+    def record(self,endpoint:str,seconds:float,status:int):
+        self.latencies.setdefault(endpoint,[]).append(seconds)
+        self.statuses.setdefault(endpoint,{})
+        self.statuses[endpoint][str(status)]=self.statuses[endpoint].get(str(status),0)+1
+        if not 200<=status<300:
+            self.errors[endpoint]=self.errors.get(endpoint,0)+1
+
+    def report(self,elapsed:float)->dict:
+        def percentile(samples,p):
+            return round(samples[min(len(samples)-1,int(p*len(samples)))]*1000,1) if samples else 0.0
+        endpoints={}
+        for endpoint,samples in sorted(self.latencies.items()):
+            samples=sorted(samples)
+            errors=self.errors.get(endpoint,0)
+            endpoints[endpoint]={
+                "count":len(samples),
+                "errors":errors,
+                "error_rate":round(errors/len(samples),4),
+                "throughput_rps":round(len(samples)/elapsed,2),
+                "p50_ms":percentile(samples,0.5),
+                "p95_ms":percentile(samples,0.95),
+                "p99_ms":percentile(samples,0.99),
+                "max_ms":round(samples[-1]*1000,1),
+                "statuses":self.statuses[endpoint]
+            }
+        total=sum(e["count"] for e in endpoints.values())
+        errors=sum(e["errors"] for e in endpoints.values())
+        return {"elapsed_s":round(elapsed,2),"requests":total,"errors":errors,
+                "error_rate":round(errors/total,4) if total else 0.0,
+                "throughput_rps":round(total/elapsed,2) if elapsed else 0.0,"endpoints":endpoints}
+
+class Workload:
+    """Weighted mix of user operations; run_tests and quiz_eval reuse problems and quizzes generated earlier"""
+    def __init__(self,client:httpx.AsyncClient,recorder:Recorder,users:list,mix:dict,quiz_questions:int):
+        self.client=client
+        self.recorder=recorder
+        self.users=users
+        self.ops=list(mix)
+        self.weights=[mix[op] for op in self.ops]
+        self.quiz_questions=quiz_questions
+        self.problem_ids=[]
+        self.quizzes=[]
+
+    async def call(self,endpoint:str,method:str,path:str,user:dict=None,**kwargs):
+        headers={"Authorization":f"Bearer {user['token']}"} if user else {}
+        started=time.perf_counter()
+        try:
+            response=await self.client.request(method,path,headers=headers,**kwargs)
+            status=response.status_code
+        except httpx.HTTPError:
+            response,status=None,599
+        self.recorder.record(endpoint,time.perf_counter()-started,status)
+        return response if response is not None and response.status_code<300 else None
+
+    async def login(self,user):
+        response=await self.call("login","POST","/login",json={"email":user["email"],"password":user["password"]})
+        if response:
+            user["token"]=response.json()["token"]
+
+    async def explain(self,user):
+        body={"concept":random.choice(CONCEPTS),"language":"python","difficulty":random.choice(["beginner","intermediate"])}
+        await self.call("explain","POST","/api/generate-explaination",user,json=body)
+
+    async def problems(self,user):
+        data_structure,topic=random.choice(TOPICS)
+        response=await self.call("problems","POST","/api/generate-problems",user,json={"data_structure":data_structure,"topic":topic})
+        if response:
+            self.problem_ids.extend(problem["id"] for problem in response.json().get("problems",[]))
+            del self.problem_ids[:-500]
+
+    async def run_tests(self,user):
+        if not self.problem_ids:
+            return await self.problems(user)
+        body={"problem_id":random.choice(self.problem_ids),"code":SOLUTION,"language":"python"}
+        await self.call("run_tests","POST","/api/run-tests",user,json=body)
+
+    async def quiz(self,user):
+        data_structure,topic=random.choice(TOPICS)
+        body={"topic":data_structure,"subtopic":topic,"difficulty":random.choice(["easy","medium"]),
+              "language":"python","num_questions":self.quiz_questions}
+        response=await self.call("quiz","POST","/api/generate-quizzes",user,json=body)
+        if response:
+            self.quizzes.append(response.json())
+            del self.quizzes[:-200]
+
+    async def quiz_eval(self,user):
+        if not self.quizzes:
+            return await self.quiz(user)
+        quiz=random.choice(self.quizzes)
+        answers={q["id"]:(0 if q["type"]=="mcq" else "it always holds after each operation") for q in quiz["questions"]}
+        await self.call("quiz_eval","POST",f"/api/evaluate-quiz/{quiz['quiz_id']}",user,json={"answers":answers})
+
+    async def worker(self,deadline:float,budget:list):
+        while time.monotonic()<deadline and budget[0]!=0:
+            budget[0]-=1
+            op=random.choices(self.ops,self.weights)[0]
+            await getattr(self,op)(random.choice(self.users))
+#-------------------Workload----------------------------#
+
+def parse_mix(mix:str)->dict:
+    weights={}
+    for part in mix.split(","):
+        op,_,weight=part.partition("=")
+        if op.strip() not in Workload.__dict__:
+            raise SystemExit(f"unknown operation in --mix: {op}")
+        weights[op.strip()]=float(weight or 1)
+    return weights
+
+def print_report(report:dict,baseline:dict=None):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']}s, {report['throughput_rps']} req/s, error rate {report['error_rate']:.2%}")
+    print(f"{'endpoint':<12}{'count':>8}{'err%':>8}{'rps':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for endpoint,stats in report["endpoints"].items():
+        print(f"{endpoint:<12}{stats['count']:>8}{stats['error_rate']*100:>7.1f}%{stats['throughput_rps']:>8}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+        before=(baseline or {}).get("endpoints",{}).get(endpoint)
+        if before:
+            def delta(key):
+                return f"{(stats[key]-before[key])/before[key]:+.0%}" if before[key] else "n/a"
+            print(f"{'  vs base':<12}{'':>8}{'':>8}{delta('throughput_rps'):>8}{delta('p50_ms'):>10}{delta('p95_ms'):>10}{delta('p99_ms'):>10}")
+
+async def run(args)->dict:
+    database_url=args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='dsa-bench-'),'bench.db')}"
+    bootstrap_tables(database_url)
+    processes=start_servers(args,database_url)
+    limits=httpx.Limits(max_connections=args.concurrency+8,max_keepalive_connections=args.concurrency+8)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}",limits=limits,timeout=args.timeout) as client:
+            await wait_until_up(client,processes)
+            users=[]
+            run_id=uuid.uuid4().hex[:8]
+            for i in range(args.users):
+                user={"name":f"bench{i}","email":f"bench{i}-{run_id}@example.com","password":"bench-password-123"}
+                await client.post("/signup",json=user)
+                response=await client.post("/login",json={"email":user["email"],"password":user["password"]})
+                response.raise_for_status()
+                users.append({**user,"token":response.json()["token"]})
+            recorder=Recorder()
+            workload=Workload(client,recorder,users,parse_mix(args.mix),args.quiz_questions)
+            budget=[args.requests or -1]
+            started=time.monotonic()
+            await asyncio.gather(*(workload.worker(started+args.duration,budget) for _ in range(args.concurrency)))
+            report=recorder.report(time.monotonic()-started)
+    finally:
+        stop_servers(processes)
+    report["config"]={key:value for key,value in vars(args).items() if key not in ("output","compare")}
+    return report
+
+def main():
+    parser=argparse.ArgumentParser(description="Load-test the API against a local fake LLM provider")
+    parser.add_argument("--concurrency",type=int,default=16,help="simulated clients issuing requests back to back")
+    parser.add_argument("--duration",type=float,default=30,help="seconds to run")
+    parser.add_argument("--requests",type=int,default=0,help="stop after this many requests (0: run for --duration)")
+    parser.add_argument("--users",type=int,default=8,help="accounts the clients act as")
+    parser.add_argument("--mix",default=DEFAULT_MIX,help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--quiz-questions",type=int,default=5,help="questions per generated quiz")
+    parser.add_argument("--latency-ms",type=float,default=400,help="fake provider time to first token")
+    parser.add_argument("--jitter-ms",type=float,default=100,help="standard deviation of the first-token latency")
+    parser.add_argument("--tokens-per-second",type=float,default=500,help="fake provider generation rate")
+    parser.add_argument("--model-latency-ms",default="",help="per-model latency overrides, model=ms,...")
+    parser.add_argument("--llm-error-rate",type=float,default=0,help="fraction of provider calls answered with a 503")
+    parser.add_argument("--database-url",help="database to run against (default: a temporary SQLite file)")
+    parser.add_argument("--workers",type=int,default=1,help="uvicorn worker processes for the app")
+    parser.add_argument("--port",type=int,default=8765)
+    parser.add_argument("--fake-port",type=int,default=8766)
+    parser.add_argument("--timeout",type=float,default=120,help="client timeout per request")
+    parser.add_argument("--output",help="write the report as JSON")
+    parser.add_argument("--compare",help="earlier JSON report to compare against")
+    args=parser.parse_args()
+    report=asyncio.run(run(args))
+    baseline=None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline=json.load(f)
+    print_report(report,baseline)
+    if args.output:
+        with open(args.output,"w") as f:
+            json.dump(report,f,indent=2)
+
+if __name__=="__main__":
+    main()
@@ -3,7 +3,7 @@ from sqlalchemy import create_engine
 from passlib.context import CryptContext
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
-from groq import Groq
+from controllers.db_pool import TimedQueuePool,watch_pool
 load_dotenv()
 
 DATABASE_URL=os.getenv("DATABASE_URL")
@@ -11,9 +11,119 @@ JWT_SECRET=os.getenv("JWT_SECRET")
 JWT_ALGORITHM=os.getenv("JWT_ALGORITHM")
 GROQ_KEY = os.getenv("GROQ_API_KEY")
 GROQ_MODEL = os.getenv("GROQ_MODEL", "openai/gpt-oss-120b")
-client = Groq(api_key=GROQ_KEY) if GROQ_KEY else None
-engine=create_engine(DATABASE_URL,pool_pre_ping=True)
-pwd_context=CryptContext(schemes=["bcrypt"],deprecated="auto")
+GROQ_BASE_URL=os.getenv("GROQ_BASE_URL")
+#-------------------LLM Gateway----------------------------#
+LLM_TIMEOUT=float(os.getenv("LLM_TIMEOUT","90"))
+LLM_MAX_CONCURRENCY=int(os.getenv("LLM_MAX_CONCURRENCY","16"))
+LLM_MAX_RETRIES=int(os.getenv("LLM_MAX_RETRIES","3"))
+LLM_BACKOFF_BASE=float(os.getenv("LLM_BACKOFF_BASE","0.5"))
+LLM_BACKOFF_MAX=float(os.getenv("LLM_BACKOFF_MAX","8"))
+LLM_POOL_SIZE=int(os.getenv("LLM_POOL_SIZE","32"))
+LLM_KEEPALIVE=float(os.getenv("LLM_KEEPALIVE","30"))
+GROQ_RPM=int(os.getenv("GROQ_RPM","1000"))
+GROQ_TPM=int(os.getenv("GROQ_TPM","250000"))
+LLM_PRIORITY_WEIGHTS={
+    "interactive":int(os.getenv("LLM_WEIGHT_INTERACTIVE","8")),
+    "explanation":int(os.getenv("LLM_WEIGHT_EXPLANATION","3")),
+    "bulk":int(os.getenv("LLM_WEIGHT_BULK","1"))
+}
+#-------------------LLM Gateway----------------------------#
+#-------------------Model Routing----------------------------#
+# tiers from fastest to most capable; each task names its primary tier and a p95 latency budget in seconds,
+# overridable as LLM_ROUTE_<TASK>="tier:budget" (e.g. LLM_ROUTE_HINT="medium:3")
+LLM_MODEL_TIERS={
+    "small":os.getenv("LLM_MODEL_SMALL","llama-3.1-8b-instant"),
+    "medium":os.getenv("LLM_MODEL_MEDIUM","openai/gpt-oss-20b"),
+    "large":os.getenv("LLM_MODEL_LARGE",GROQ_MODEL)
+}
+LLM_TASK_ROUTES={}
+for _task,_route in {
+    "hint":"small:2",
+    "quiz_grading":"small:3",
+    "test_run":"medium:5",
+    "checker_analysis":"medium:6",
+    "evaluation":"large:15",
+    "quiz_generation":"medium:15",
+    "explanation":"large:20",
+    "test_suite":"large:30",
+    "problem_generation":"large:60"
+}.items():
+    _setting=os.getenv(f"LLM_ROUTE_{_task.upper()}",_route)
+    _tier,_,_budget=_setting.partition(":")
+    try:
+        _budget=float(_budget)
+    except ValueError:
+        raise ValueError(f"LLM_ROUTE_{_task.upper()}={_setting!r} should look like 'tier:budget_seconds', e.g. {_route!r}") from None
+    if _tier not in LLM_MODEL_TIERS:
+        raise ValueError(f"LLM_ROUTE_{_task.upper()}={_setting!r} names an unknown tier, expected one of {', '.join(LLM_MODEL_TIERS)}")
+    LLM_TASK_ROUTES[_task]=(_tier,_budget)
+LLM_SLO_WINDOW=int(os.getenv("LLM_SLO_WINDOW","50"))
+LLM_SLO_MIN_SAMPLES=int(os.getenv("LLM_SLO_MIN_SAMPLES","10"))
+LLM_SLO_COOLDOWN=float(os.getenv("LLM_SLO_COOLDOWN","60"))
+LLM_SLO_TIMEOUT_FACTOR=float(os.getenv("LLM_SLO_TIMEOUT_FACTOR","3"))
+#-------------------Model Routing----------------------------#
+#-------------------Caches----------------------------#
+EXPLANATION_CACHE_SIZE=int(os.getenv("EXPLANATION_CACHE_SIZE","2048"))
+EXPLANATION_CACHE_TTL=float(os.getenv("EXPLANATION_CACHE_TTL","3600"))
+RESULT_CACHE_SIZE=int(os.getenv("RESULT_CACHE_SIZE","4096"))
+RESULT_CACHE_TTL=float(os.getenv("RESULT_CACHE_TTL","1800"))
+USER_CACHE_SIZE=int(os.getenv("USER_CACHE_SIZE","10000"))
+USER_CACHE_TTL=float(os.getenv("USER_CACHE_TTL","30"))
+# trigram Jaccard a title must exceed to reuse another's explanation; "directed"/"undirected graph" score 0.8
+CONCEPT_MATCH_THRESHOLD=float(os.getenv("CONCEPT_MATCH_THRESHOLD","0.85"))
+#-------------------Caches----------------------------#
+#-------------------Problem Bank----------------------------#
+PROBLEM_SET_SIZE=int(os.getenv("PROBLEM_SET_SIZE","10"))
+PROBLEM_BANK_LOW_WATER=int(os.getenv("PROBLEM_BANK_LOW_WATER","20"))
+#-------------------Problem Bank----------------------------#
+#-------------------Quiz----------------------------#
+QUIZ_BATCH_SIZE=int(os.getenv("QUIZ_BATCH_SIZE","10"))
+QUIZ_REFILL_ROUNDS=int(os.getenv("QUIZ_REFILL_ROUNDS","1"))
+#-------------------Quiz----------------------------#
+#-------------------Sandbox----------------------------#
+SANDBOX_WORKERS=int(os.getenv("SANDBOX_WORKERS","4"))
+SANDBOX_CPU_SECONDS=int(os.getenv("SANDBOX_CPU_SECONDS","2"))
+SANDBOX_MEMORY_MB=int(os.getenv("SANDBOX_MEMORY_MB","256"))
+SANDBOX_WALL_SECONDS=float(os.getenv("SANDBOX_WALL_SECONDS","5"))
+# unprivileged uid submissions run as; the app itself must run as root to set up the namespaces
+SANDBOX_UID=int(os.getenv("SANDBOX_UID","65534"))
+#-------------------Sandbox----------------------------#
+#-------------------Complexity Profiler----------------------------#
+COMPLEXITY_PROFILE=os.getenv("COMPLEXITY_PROFILE","true").lower()=="true"
+COMPLEXITY_MAX_N=int(os.getenv("COMPLEXITY_MAX_N","65536"))
+COMPLEXITY_MIN_POINTS=int(os.getenv("COMPLEXITY_MIN_POINTS","5"))
+COMPLEXITY_STEP_SECONDS=float(os.getenv("COMPLEXITY_STEP_SECONDS","0.25"))
+# sandbox time for one profile job, split between the submission and the reference when both are measured
+COMPLEXITY_BUDGET_SECONDS=float(os.getenv("COMPLEXITY_BUDGET_SECONDS","3"))
+# separate from the sandbox pool; one timing run per core, since runs sharing a core skew each other
+COMPLEXITY_WORKERS=int(os.getenv("COMPLEXITY_WORKERS",str(os.cpu_count() or 1)))
+#-------------------Complexity Profiler----------------------------#
+#-------------------Test Suites----------------------------#
+TEST_SUITE_SIZE=int(os.getenv("TEST_SUITE_SIZE","5"))
+TEST_SUITE_EAGER=os.getenv("TEST_SUITE_EAGER","false").lower()=="true"
+DIFFERENTIAL_CASES=int(os.getenv("DIFFERENTIAL_CASES","15"))
+DIFFERENTIAL_MAX_N=int(os.getenv("DIFFERENTIAL_MAX_N","200"))
+#-------------------Test Suites----------------------------#
+#-------------------Shared Store----------------------------#
+STORE_BACKEND=os.getenv("STORE_BACKEND","memory")
+STORE_MAXSIZE=int(os.getenv("STORE_MAXSIZE","10000"))
+STORE_TTL=float(os.getenv("STORE_TTL","86400"))
+#-------------------Shared Store----------------------------#
+#-------------------Generation Jobs----------------------------#
+JOB_WORKERS=int(os.getenv("JOB_WORKERS","4"))
+JOB_QUEUE_SIZE=int(os.getenv("JOB_QUEUE_SIZE","500"))
+JOB_POLL_INTERVAL=float(os.getenv("JOB_POLL_INTERVAL","1"))
+JOB_HEARTBEAT_SECONDS=float(os.getenv("JOB_HEARTBEAT_SECONDS","15"))
+#-------------------Generation Jobs----------------------------#
+# an in-memory SQLite database lives in a single connection, keep SQLAlchemy's own pool for it
+engine=create_engine(DATABASE_URL,pool_pre_ping=True,**({} if ":memory:" in (DATABASE_URL or "") else {"poolclass":TimedQueuePool}))
+watch_pool(engine)
+#-------------------Password Hashing----------------------------#
+BCRYPT_ROUNDS=int(os.getenv("BCRYPT_ROUNDS","12"))
+PASSWORD_HASH_WORKERS=int(os.getenv("PASSWORD_HASH_WORKERS",str(max(1,(os.cpu_count() or 2)//2))))
+PASSWORD_HASH_QUEUE=int(os.getenv("PASSWORD_HASH_QUEUE","256"))
+#-------------------Password Hashing----------------------------#
+pwd_context=CryptContext(schemes=["bcrypt"],deprecated="auto",bcrypt__rounds=BCRYPT_ROUNDS)
 
 
 SessionLocal=sessionmaker(autocommit=False,autoflush=False,bind=engine)
\ No newline at end of file
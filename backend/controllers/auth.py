@@ -1,44 +1,94 @@
 from config import engine
 from schema .schemas import SignupRequest,LoginRequest
-import jwt
 from sqlalchemy import text
-from fastapi import HTTPException,Header,Depends
+from fastapi import HTTPException,Header
 import uuid,json,datetime,jwt
-from config import pwd_context
-from config import JWT_SECRET,JWT_ALGORITHM
+from typing import Optional
+from controllers.password_hasher import get_password_hasher
+from fastapi.concurrency import run_in_threadpool
+from config import JWT_SECRET,JWT_ALGORITHM,USER_CACHE_SIZE,USER_CACHE_TTL
+from controllers.ttl_cache import TTLCache
+from controllers.user_activity import render_profile
+from controllers.metrics import stage_timer
 
-def signup(user:SignupRequest):
-    try:
-        with engine.begin() as conn:
-            
-            if conn.execute(
-                text("SELECT id FROM users WHERE email=:email"),
-                {"email":user.email}
-            ).fetchone():
-                raise HTTPException(status_code=400,detail="Email Already Exists")
-            user_id=str(uuid.uuid4())
-            hashed_password=pwd_context.hash(user.password)
-            default_profile = {
+_principals=TTLCache(maxsize=USER_CACHE_SIZE,ttl=USER_CACHE_TTL)
+
+class Principal:
+    """
+    The authenticated user as routes see it: only the columns they read,
+    with the profile JSON fetched on first access.
+    """
+    def __init__(self,id,name,email,profilephoto,level):
+        self.id=id
+        self.name=name
+        self.email=email
+        self.profilephoto=profilephoto
+        self.level=level
+        self._profile=None
+
+    @property
+    def profile(self)->dict:
+        if self._profile is None:
+            self._profile=render_profile(self.id)
+        return self._profile
+
+def invalidate_user(user_id):
+    """Drop a cached principal, call after any write to the user's row"""
+    _principals.pop(str(user_id))
+
+def user_cache_stats()->dict:
+    return _principals.stats()
+
+def email_exists(email:str)->bool:
+    with engine.begin() as conn:
+        return conn.execute(
+            text("SELECT id FROM users WHERE email=:email"),
+            {"email":email}
+        ).fetchone() is not None
+
+def insert_user(user:SignupRequest,user_id:str,hashed_password:str):
+    default_profile = {
     "problems_solved": [],
     "quizzes_solved": [],
     "saved_problems": [],
     "saved_quizzes": [],
     "learned_concepts": [],
-    "saved_documentation": []
+    "saved_documentation": [],
+    "activity_migrated": True
 }
-            conn.execute(
-                text(
-                    "INSERT INTO users(id,name,email,password,profilePhoto,level,profile)VALUES (:id,:name,:email,:password,:profilePhoto,:level,:profile)"
-                ),{
-                    "id":user_id,
-                    "name":user.name,
-                    "email":user.email,
-                    "password":hashed_password,
-                    "profilePhoto":user.profilePhoto,
-                    "level":user.level.lower(),
-                    "profile":json.dumps(user.profile or default_profile)
-                }
-            )
+    with stage_timer("auth","db_write"),engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO users(id,name,email,password,profilePhoto,level,profile)VALUES (:id,:name,:email,:password,:profilePhoto,:level,:profile)"
+            ),{
+                "id":user_id,
+                "name":user.name,
+                "email":user.email,
+                "password":hashed_password,
+                "profilePhoto":user.profilePhoto,
+                "level":user.level.lower(),
+                "profile":json.dumps(user.profile or default_profile)
+            }
+        )
+
+def find_login_user(email:str):
+    with engine.begin() as conn:
+        return conn.execute(
+            text("SELECT id,name,email,password,profilephoto FROM users WHERE email=:email"),{"email":email}
+        ).fetchone()
+
+def is_overloaded(e:Exception)->bool:
+    """Backpressure from the password hasher must reach the client as-is, not as a 400"""
+    return isinstance(e,HTTPException) and e.status_code==503
+
+async def signup(user:SignupRequest):
+    try:
+        if await run_in_threadpool(email_exists,user.email):
+            raise HTTPException(status_code=400,detail="Email Already Exists")
+        user_id=str(uuid.uuid4())
+        with stage_timer("auth","password_hash"):
+            hashed_password=await get_password_hasher().hash(user.password)
+        await run_in_threadpool(insert_user,user,user_id,hashed_password)
         return {
             "message":"Account created Successfully",
             "user":{
@@ -47,46 +97,62 @@ def signup(user:SignupRequest):
             }
         }
     except Exception as e:
+        if is_overloaded(e):
+            raise
         raise HTTPException(status_code=400,detail=str(e))
     
-def login(user:LoginRequest):
+async def login(user:LoginRequest):
     try :
-        with engine.begin() as conn:
-            validate_user=conn.execute(
-                text("SELECT id,name,email,password,profilephoto FROM users WHERE email=:email"),{"email":user.email}
-            ).fetchone()
-            validate_password=pwd_context.verify(user.password,validate_user.password)
-            if not validate_user or not validate_password:
-                raise HTTPException(400,"Invalid email or password")
-            token=jwt.encode(
-                {
-                    "user_id":str(validate_user.id),
-                    "email":validate_user.email,
-                    "exp":datetime.datetime.utcnow()+datetime.timedelta(hours=24)
-                },JWT_SECRET,algorithm=JWT_ALGORITHM
-            )
+        validate_user=await run_in_threadpool(find_login_user,user.email)
+        with stage_timer("auth","password_verify"):
+            verified=validate_user is not None and await get_password_hasher().verify(user.password,validate_user.password)
+        if not verified:
+            raise HTTPException(400,"Invalid email or password")
+        token=jwt.encode(
+            {
+                "user_id":str(validate_user.id),
+                "email":validate_user.email,
+                "exp":datetime.datetime.utcnow()+datetime.timedelta(hours=24)
+            },JWT_SECRET,algorithm=JWT_ALGORITHM
+        )
         return {"message":f"Welcome back {validate_user.name}","token": token,
             "user_name": validate_user.name,
             "email": validate_user.email,
             "profilephoto": validate_user.profilephoto}
     except Exception as e:
+        if is_overloaded(e):
+            raise
         raise HTTPException(status_code=400,detail=str(e))    
 
-     
+
+def token_user_id(authorization:str)->Optional[str]:
+    """User id from a bearer token without touching the DB, None when it is missing or invalid"""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        return str(jwt.decode(authorization.split(" ")[1],JWT_SECRET,algorithms=[JWT_ALGORITHM]).get("user_id"))
+    except jwt.PyJWTError:
+        return None
+
 def get_current_user(authorization:str=Header(...)):
     try:
         if not authorization.startswith("Bearer "):
             raise HTTPException(status_code=401,detail="Invalid authorization header")
         token=authorization.split(" ")[1]
         payload=jwt.decode(token,JWT_SECRET,algorithms=[JWT_ALGORITHM])
-        user_id=payload.get("user_id")
+        user_id=str(payload.get("user_id"))
+        principal=_principals.get(user_id)
+        if principal:
+            return principal
         with engine.begin() as conn:
             user=conn.execute(
-                text("SELECT * from users WHERE id=:id"),{"id":user_id}
+                text("SELECT id,name,email,profilephoto,level from users WHERE id=:id"),{"id":user_id}
             ).fetchone()
         if not user:
             raise HTTPException(status_code=401,detail="User not found")
-        return user
+        principal=Principal(user.id,user.name,user.email,user.profilephoto,user.level)
+        _principals.set(user_id,principal)
+        return principal
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401,detail="Token expired")
     except jwt.InvalidTokenError:
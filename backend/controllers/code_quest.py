@@ -1,31 +1,90 @@
+import logging
 from schema.schemas import ProblemRequest,SolutionRequest
-from agents.examiner_agent import examiner_agent
+from agents.examiner_agent import stream_examiner_agent
 from agents.checker_agent import checker_agent
 from fastapi import HTTPException
-from agents.examiner_agent import problems_db
-from controllers.auth import get_current_user
-problems_db={}
-def generate_problems(request: ProblemRequest, current_user):
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from controllers.streaming import ndjson_line,NDJSON_MEDIA_TYPE
+from controllers.auth import get_current_user,invalidate_user
+from controllers.user_activity import activity_items,record_activity
+from controllers.problem_bank import draw_problems,find_problem,refill_bucket,schedule_top_up,save_problems
+from controllers.suite_store import prepare_suites
+from controllers.result_cache import cached_result
+from controllers.generation_jobs import job_runner,submit_job
+from config import PROBLEM_SET_SIZE
+
+async def solved_problem_ids(current_user)->list:
+    return await run_in_threadpool(activity_items, current_user.id, "problems_solved")
+
+@job_runner("problems")
+async def generate_problems(request: ProblemRequest, current_user):
     """
-    Generate 10 problems using examiner agent and store them in problems_db
+    Serve a sample of problems from the problem bank, skipping ones the user already solved.
+    The examiner agent is only awaited when the bucket is empty, otherwise it tops the bank up in the background.
     """
     try:
-        problems = examiner_agent(request.data_structure, request.topic)
-        for problem in problems:
-            problems_db[problem.id] = problem
+        problems, remaining = await run_in_threadpool(
+            draw_problems, request.data_structure, request.topic, await solved_problem_ids(current_user), PROBLEM_SET_SIZE
+        )
+        if not problems:
+            problems = await refill_bucket(request.data_structure, request.topic)
+            remaining = 0
+        schedule_top_up(request.data_structure, request.topic, remaining)
 
         return {"problems": [p.dict() for p in problems]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating problems: {str(e)}")
 
+
+async def problem_lines(request: ProblemRequest, current_user):
+    """
+    NDJSON body for streamed problem generation: one line per problem, then a done line.
+    Bank hits are sent at once, otherwise problems are forwarded as the examiner agent streams them.
+    """
+    problems = []
+    try:
+        banked, remaining = await run_in_threadpool(
+            draw_problems, request.data_structure, request.topic, await solved_problem_ids(current_user), PROBLEM_SET_SIZE
+        )
+        if banked:
+            schedule_top_up(request.data_structure, request.topic, remaining)
+            for problem in banked:
+                yield ndjson_line({"type": "problem", "problem": problem})
+        else:
+            async for problem in stream_examiner_agent(request.data_structure, request.topic):
+                problems.append(problem)
+                yield ndjson_line({"type": "problem", "problem": problem})
+            if not problems:
+                raise Exception("No valid problems in AI response")
+            await run_in_threadpool(save_problems, request.data_structure, request.topic, problems)
+            prepare_suites(problems)
+        yield ndjson_line({"type": "done", "count": len(banked) or len(problems)})
+    except Exception as e:
+        yield ndjson_line({"type": "error", "detail": f"Error generating problems: {str(e)}"})
+
+
+def stream_problems(request: ProblemRequest, current_user):
+    return StreamingResponse(problem_lines(request, current_user), media_type=NDJSON_MEDIA_TYPE)
+
     
-def evaluate_solution(request:SolutionRequest,current_user):
-    problem=problems_db.get(request.problem_id)
+async def evaluate_solution(request:SolutionRequest,current_user):
+    problem=await run_in_threadpool(find_problem,request.problem_id)
     if not problem:
         raise HTTPException(status_code=404,detail="Problem not found or expired")
     try:
-        result=checker_agent(problem,request.code,request.language)
+        result=await cached_result("evaluate",request,lambda:checker_agent(problem,request.code,request.language))
+        if result.get("passed"):
+            await run_in_threadpool(record_activity,current_user.id,"problems_solved",problem.id)
+            invalidate_user(current_user.id)
+        if result.get("efficiency_pending"):
+            # profiling takes seconds, so the verdict goes out now and the client polls the job for the complexity
+            try:
+                job=await submit_job("efficiency",request,current_user)
+                result={**result,"efficiency_job":job.job_id}
+            except HTTPException as e:
+                logging.warning(f"Efficiency profiling was not queued: {e.detail}")
         return result
     except Exception as e:
         raise HTTPException(status_code=500,detail=f"Error evaluating solution : {str(e)}")
-    
\ No newline at end of file
+    
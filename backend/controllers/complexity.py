@@ -0,0 +1,228 @@
+import asyncio,copy,gc,hashlib,math,statistics,time,tracemalloc
+from typing import List,Optional,Tuple
+from controllers.sandbox import apply_limits,load_target,find_entry,run_forked,forkserver_pool,sandbox_limits
+from controllers.input_synth import InputSpec
+from controllers.ttl_cache import TTLCache
+
+# Empirical complexity: run a solution on inputs of geometrically growing size, each size in its own
+# forked child, and fit wall time and peak traced memory against the usual growth classes.
+# The measuring half runs inside the sandbox workers, so config is only imported by the async half.
+
+MODELS=(
+    ("O(1)",lambda n:1.0),
+    ("O(log n)",lambda n:math.log2(n)),
+    ("O(n)",lambda n:float(n)),
+    ("O(n log n)",lambda n:n*math.log2(n)),
+    ("O(n^2)",lambda n:float(n*n)),
+    ("O(2^n)",lambda n:2.0**n)
+)
+RANK={label:i for i,(label,_) in enumerate(MODELS)}
+MIN_SECONDS=1e-8
+CONSTANT_RATIO=1.5
+MIN_BYTES=1024
+# peak memory is exact, so an n log n fit there is allocator noise around O(n)
+SPACE_SKIP=("O(n log n)",)
+TIMING_REPEATS=5
+TIMING_TARGET_SECONDS=0.05
+
+def profile_sizes(start:int,stop:int)->List[int]:
+    """Roughly x1.5 steps (4,6,8,12,16,24,...), dense enough at small n to catch exponential growth"""
+    sizes,n=[],max(4,start)
+    while n<=stop:
+        sizes.append(n)
+        n=n*3//2 if len(sizes)%2 else n*4//3
+    return sizes
+
+def _time_calls(target,args:list,kwargs:dict,number:int)->float:
+    started=time.perf_counter()
+    for _ in range(number):
+        target(*args,**kwargs)
+    return (time.perf_counter()-started)/number
+
+def _measure(code:str,entry:tuple,spec:InputSpec,n:int,limits:dict)->dict:
+    """Runs in the forked child: per-call time (best of repeats, like timeit) and peak traced memory at size n"""
+    apply_limits(limits)
+    args,kwargs=spec.generate(n)
+    target=load_target(code,entry)
+    gc.disable()
+    call_args,call_kwargs=copy.deepcopy(args),copy.deepcopy(kwargs)
+    best=_time_calls(target,call_args,call_kwargs,1)
+    if (call_args,call_kwargs)==(args,kwargs):
+        # the input is not modified, so fast calls can be batched until the timer resolution stops mattering
+        number=1
+        while number*best<TIMING_TARGET_SECONDS/10 and number<10**6:
+            number*=10
+        for _ in range(TIMING_REPEATS if best<TIMING_TARGET_SECONDS else 0):
+            best=min(best,_time_calls(target,args,kwargs,number))
+    else:
+        spent=best
+        for _ in range(TIMING_REPEATS-1):
+            if spent>=TIMING_TARGET_SECONDS:
+                break
+            call_args,call_kwargs=copy.deepcopy(args),copy.deepcopy(kwargs)
+            elapsed=_time_calls(target,call_args,call_kwargs,1)
+            best,spent=min(best,elapsed),spent+elapsed
+    gc.enable()
+    call_args,call_kwargs=copy.deepcopy(args),copy.deepcopy(kwargs)
+    tracemalloc.start()
+    try:
+        target(*call_args,**call_kwargs)
+        _,peak=tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"n":n,"seconds":best,"peak_bytes":peak}
+
+def measure_growth(code:str,entry:tuple,spec:InputSpec,sizes:List[int],limits:dict,step_seconds:float,budget_seconds:float)->dict:
+    """Worker entry point: measure sizes in order until one fails, gets slow or the budget runs out"""
+    points,stopped,deadline=[],None,time.monotonic()+budget_seconds
+    for n in sizes:
+        remaining=deadline-time.monotonic()
+        if remaining<=0:
+            stopped="budget"
+            break
+        payload,timed_out,_,_=run_forked(_measure,(code,entry,spec,n,limits),min(limits["wall_seconds"],remaining))
+        if timed_out or payload is None or "seconds" not in payload:
+            stopped=(payload or {}).get("error_type") or ("TimeoutError" if timed_out else "RuntimeError")
+            break
+        points.append(payload)
+        if payload["seconds"]>=step_seconds:
+            stopped="slow"
+            break
+    return {"points":points,"stopped":stopped}
+
+def _linear(xs:List[float],ys:List[float],ws:List[float])->Tuple[float,float]:
+    """Weighted least squares y ~ a + c*x"""
+    s,sx,sy=sum(ws),sum(w*x for w,x in zip(ws,xs)),sum(w*y for w,y in zip(ws,ys))
+    sxx,sxy=sum(w*x*x for w,x in zip(ws,xs)),sum(w*x*y for w,x,y in zip(ws,xs,ys))
+    det=s*sxx-sx*sx
+    if abs(det)<=1e-12*s*sxx:
+        return sy/s,0.0
+    c=(s*sxy-sx*sy)/det
+    return (sy-c*sx)/s,c
+
+def _fit(ns:List[int],ys:List[float],floor:float,skip:Tuple[str,...]=())->str:
+    """
+    Fit y ~ a + c*f(n) per polynomial model, weighted to relative error, and y ~ b^n for O(2^n) in log space.
+    The simplest model within 25% of the best residual wins, so noise does not promote O(n) to O(n log n).
+    """
+    ys=[max(y,floor) for y in ys]
+    third=max(1,len(ys)//3)
+    if statistics.median(ys[-third:])<=CONSTANT_RATIO*statistics.median(ys[:third]):
+        # a few timer outliers at large n would otherwise pull a flat profile up to O(n)
+        return MODELS[0][0]
+    ws=[1/y**2 for y in ys]
+    fits=[("O(1)",sum(w*(sum(ys)/len(ys)-y)**2 for w,y in zip(ws,ys)))]
+    for label,f in MODELS[1:-1]:
+        if label in skip:
+            continue
+        xs=[f(n) for n in ns]
+        a,c=_linear(xs,ys,ws)
+        if a<0:
+            a,c=0.0,sum(w*x*y for w,x,y in zip(ws,xs,ys))/sum(w*x*x for w,x in zip(ws,xs))
+        if c>0:
+            fits.append((label,sum(w*(a+c*x-y)**2 for w,x,y in zip(ws,xs,ys))))
+    # exponential: log y linear in n with a clearly growing base
+    logs=[math.log(y) for y in ys]
+    a,c=_linear([float(n) for n in ns],logs,[1.0]*len(ns))
+    if c>math.log(1.3):
+        fits.append((MODELS[-1][0],sum((math.exp(a+c*n)/y-1)**2 for n,y in zip(ns,ys))))
+    best=min(residual for _,residual in fits)
+    return next(label for label,residual in fits if residual<=best*1.25+1e-3)
+
+def fit_complexity(points:List[dict])->Optional[dict]:
+    """Growth classes for time and space, None with too few points to tell"""
+    from config import COMPLEXITY_MIN_POINTS
+    if len(points)<COMPLEXITY_MIN_POINTS:
+        return None
+    ns=[p["n"] for p in points]
+    time_class=_fit(ns,[p["seconds"] for p in points],MIN_SECONDS)
+    peaks=[p["peak_bytes"] for p in points]
+    space_class="O(1)" if max(peaks)<MIN_BYTES else _fit(ns,[float(b) for b in peaks],MIN_BYTES,skip=SPACE_SKIP)
+    return {"time":time_class,"space":space_class}
+
+_pool=None
+
+def get_profile_pool():
+    """Profiling has its own few workers, so measurements never queue ahead of test runs in the sandbox pool"""
+    global _pool
+    if _pool is None:
+        from config import COMPLEXITY_WORKERS,SANDBOX_UID
+        _pool=forkserver_pool(COMPLEXITY_WORKERS,SANDBOX_UID)
+    return _pool
+
+def stop_profiler():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool=None
+
+async def profile_solution(code:str,spec:InputSpec,budget_seconds:float,starter_code:Optional[str]=None)->Optional[dict]:
+    """Measure one solution in the profiling pool; None when it has no callable entry or too few sizes ran"""
+    from config import COMPLEXITY_MAX_N,COMPLEXITY_STEP_SECONDS
+    entry=find_entry(code,starter_code)
+    if entry is None:
+        return None
+    sizes=profile_sizes(spec.base,min(COMPLEXITY_MAX_N,spec.max_n or COMPLEXITY_MAX_N))
+    loop=asyncio.get_running_loop()
+    run=await loop.run_in_executor(get_profile_pool(),measure_growth,code,entry,spec,sizes,sandbox_limits(),
+                                   COMPLEXITY_STEP_SECONDS,budget_seconds)
+    fitted=fit_complexity(run["points"])
+    return {**fitted,**run} if fitted else None
+
+def _compare(user:dict,optimal:dict)->str:
+    shared={p["n"]:p for p in optimal["points"]}
+    common=[p for p in user["points"] if p["n"] in shared]
+    sizes=f"measured on inputs of size {user['points'][0]['n']} to {user['points'][-1]['n']}"
+    speed=""
+    if common:
+        last=common[-1]
+        ratio=last["seconds"]/max(shared[last["n"]]["seconds"],MIN_SECONDS)
+        speed=f"; at n={last['n']} it took {last['seconds']*1000:.2f} ms, {ratio:.1f}x the reference solution"
+    if RANK[user["time"]]>RANK[optimal["time"]]:
+        verdict=f"Your solution's running time grows like {user['time']}, which grows faster (worse) than the reference's {optimal['time']}"
+    elif RANK[user["time"]]<RANK[optimal["time"]]:
+        verdict=f"Your solution's running time grows like {user['time']}, measured below the reference's {optimal['time']}"
+    else:
+        verdict=f"Your solution's running time grows like the reference's ({user['time']})"
+    if RANK[user["space"]]>RANK[optimal["space"]]:
+        verdict+=f" and it uses {user['space']} extra memory where {optimal['space']} is enough"
+    return f"{verdict} ({sizes}{speed})."
+
+# reference solutions are profiled once per problem (and per revision of the solution)
+_optimal_profiles=TTLCache(maxsize=1024,ttl=86400)
+
+async def measure_efficiency(problem,user_code:str)->Optional[dict]:
+    """
+    The efficiency dict from measurements instead of an LLM guess; run by the checker's efficiency job.
+    None when the problem has no usable example/reference or a profile is too short to fit.
+    """
+    if not problem.optimal_solution or not problem.examples:
+        return None
+    try:
+        spec=InputSpec(problem.examples[0].input,problem.constraints,problem.description)
+    except (SyntaxError,ValueError,TypeError):
+        return None
+    from config import COMPLEXITY_BUDGET_SECONDS
+    key=(problem.id,hashlib.sha256(problem.optimal_solution.encode()).hexdigest())
+    optimal=_optimal_profiles.get(key)
+    if optimal is None:
+        # the job's budget is shared when the reference has to be measured too; one after the other,
+        # since two timing runs on the same core skew each other
+        budget=COMPLEXITY_BUDGET_SECONDS/2
+        user=await profile_solution(user_code,spec,budget,problem.starter_code)
+        optimal=await profile_solution(problem.optimal_solution,spec,budget,problem.starter_code)
+        if optimal is not None:
+            _optimal_profiles.set(key,optimal)
+    else:
+        user=await profile_solution(user_code,spec,COMPLEXITY_BUDGET_SECONDS,problem.starter_code)
+    if user is None or optimal is None:
+        return None
+    return {
+        "time_complexity":user["time"],
+        "optimal_time_complexity":optimal["time"],
+        "space_complexity":user["space"],
+        "optimal_space_complexity":optimal["space"],
+        "comparison":_compare(user,optimal),
+        "measured":True,
+        "samples":[{"n":p["n"],"time_ms":round(p["seconds"]*1000,4),"peak_kb":round(p["peak_bytes"]/1024,1)} for p in user["points"]]
+    }
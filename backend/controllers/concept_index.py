@@ -0,0 +1,139 @@
+import random,re,threading,zlib
+from typing import Dict,List,Optional,Set,Tuple
+
+# Local near-duplicate index over stored explanation titles: "BST", "binary search trees" and
+# "binary-search tree in python" all canonicalize to "binary search tree" and the rest is caught
+# by character-trigram MinHash/LSH candidates scored with exact Jaccard.
+
+ACRONYMS={
+    "bst":"binary search tree","bt":"binary tree","dfs":"depth first search","bfs":"breadth first search",
+    "dp":"dynamic programming","ll":"linked list","sll":"singly linked list","dll":"doubly linked list",
+    "lru":"least recently used","lfu":"least frequently used","mst":"minimum spanning tree",
+    "lca":"lowest common ancestor","lcs":"longest common subsequence","lis":"longest increasing subsequence",
+    "dsu":"disjoint set union","pq":"priority queue","kmp":"knuth morris pratt",
+    "segtree":"segment tree","hashmap":"hash map","hashtable":"hash map","hashset":"hash set",
+    "dag":"directed acyclic graph","topo":"topological"
+}
+PHRASES=(
+    ("hash table","hash map"),("union find","disjoint set union"),("fenwick tree","binary indexed tree"),
+    ("2 pointer","two pointer")
+)
+# only words that never tell two concepts apart; language names are already part of the bucket key
+FILLER={
+    "a","an","the","of","for","and","to","in","on","using","with","what","is","are","how","does","do",
+    "python","java","javascript","js","cpp","golang","rust","typescript","kotlin","swift","csharp"
+}
+# a word that only one of two titles has and that negates or inverts the other ("undirected", "non-negative")
+# makes them different concepts however similar the rest is
+NEGATIONS={"no","not","non","un","without"}
+NEGATING_PREFIXES=("un","non","a")
+NUM_PERM=64
+BANDS=16
+ROWS=NUM_PERM//BANDS
+_PRIME=(1<<61)-1
+_rng=random.Random(20240917)
+_PERMS=[(_rng.randrange(1,_PRIME),_rng.randrange(0,_PRIME)) for _ in range(NUM_PERM)]
+
+def _singular(word:str)->str:
+    if len(word)<=3 or word.endswith(("ss","is","us")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3]+"y"
+    if word.endswith(("shes","ches","xes","sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+def canonical_concept(concept:str)->str:
+    """Lowercase, strip punctuation and filler words, singularize and expand acronyms"""
+    text=concept.lower().replace("c++","cpp").replace("c#","csharp").replace("'s","")
+    words=re.findall(r"[a-z0-9]+",text)
+    tokens=[]
+    for word in words:
+        if word in FILLER:
+            continue
+        word=_singular(word)
+        if word in FILLER:
+            continue
+        tokens.append(ACRONYMS.get(word,word))
+    canonical=" ".join(tokens)
+    for phrase,replacement in PHRASES:
+        canonical=re.sub(rf"\b{phrase}\b",replacement,canonical)
+    return canonical or " ".join(words)
+
+def contradicts(canonical:str,other:str)->bool:
+    """Whether the titles differ by a negation or a negated form of a word the other one has"""
+    words,other_words=set(canonical.split()),set(other.split())
+    extra=words^other_words
+    if extra&NEGATIONS:
+        return True
+    return any(word.startswith(prefix) and word[len(prefix):] in words|other_words
+               for word in extra for prefix in NEGATING_PREFIXES if len(word)>len(prefix)+2)
+
+def shingles(canonical:str)->Set[str]:
+    padded=f" {canonical} "
+    return {padded[i:i+3] for i in range(len(padded)-2)} or {padded}
+
+def signature(grams:Set[str])->List[int]:
+    hashed=[zlib.crc32(gram.encode()) for gram in grams]
+    return [min((a*h+b)%_PRIME for h in hashed) for a,b in _PERMS]
+
+def _bands(sig:List[int])->List[Tuple[int,tuple]]:
+    return [(band,tuple(sig[band*ROWS:(band+1)*ROWS])) for band in range(BANDS)]
+
+class _Bucket:
+    """Titles of one (language,difficulty)"""
+    def __init__(self):
+        self.ids:Dict[str,str]={}
+        self.grams:Dict[str,Set[str]]={}
+        self.lsh:Dict[Tuple[int,tuple],Set[str]]={}
+
+class ConceptIndex:
+    def __init__(self,threshold:float):
+        self.threshold=threshold
+        self._buckets:Dict[Tuple[str,str],_Bucket]={}
+        self._lock=threading.Lock()
+
+    def add(self,explaination_id:str,title:str,language:str,difficulty:str):
+        """Index a stored explanation; a later title with the same canonical form replaces the earlier one"""
+        canonical=canonical_concept(title)
+        grams=shingles(canonical)
+        sig=signature(grams)
+        with self._lock:
+            bucket=self._buckets.setdefault((language.strip().lower(),difficulty.strip().lower()),_Bucket())
+            if canonical not in bucket.ids:
+                bucket.grams[canonical]=grams
+                for band in _bands(sig):
+                    bucket.lsh.setdefault(band,set()).add(canonical)
+            bucket.ids[canonical]=str(explaination_id)
+
+    def closest(self,concept:str,language:str,difficulty:str)->Optional[Tuple[str,str,float]]:
+        """(explanation id, matched canonical title, similarity) of the best match strictly above threshold"""
+        canonical=canonical_concept(concept)
+        grams=shingles(canonical)
+        with self._lock:
+            bucket=self._buckets.get((language.strip().lower(),difficulty.strip().lower()))
+            if bucket is None:
+                return None
+            if canonical in bucket.ids:
+                return bucket.ids[canonical],canonical,1.0
+        bands=_bands(signature(grams))
+        with self._lock:
+            candidates=set()
+            for band in bands:
+                candidates|=bucket.lsh.get(band,set())
+            best,score=None,0.0
+            for candidate in candidates:
+                if contradicts(canonical,candidate):
+                    continue
+                other=bucket.grams[candidate]
+                similarity=len(grams&other)/len(grams|other)
+                if similarity>score:
+                    best,score=candidate,similarity
+            if best is None or score<=self.threshold:
+                return None
+            return bucket.ids[best],best,round(score,4)
+
+    def stats(self)->dict:
+        return {"titles":sum(len(b.ids) for b in self._buckets.values()),"buckets":len(self._buckets),"threshold":self.threshold}
@@ -1,49 +1,178 @@
 from schema.schemas import ExplainationRequest,ExplainationResponse,SolutionRequest,ProblemRequest
-from controllers.auth import get_current_user
+from controllers.auth import get_current_user,invalidate_user
+from controllers.user_activity import record_activity
+from controllers.explanation_cache import lookup_explaination,remember_explaination,is_cacheable,clean_title,cache_key
+from controllers.single_flight import SingleFlight
+from controllers.generation_jobs import job_runner
+from controllers.metrics import stage_timer
 from fastapi import Depends,HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from controllers.streaming import sse_event,SSE_HEADERS
 from sqlalchemy import text
-from agents.teacher_agent import teacher_agent
+from agents.teacher_agent import teacher_agent,stream_teacher_agent
 from agents.examiner_agent import examiner_agent
 from agents.checker_agent import checker_agent
-import uuid,json,logging
+import uuid,logging
 from config import engine
 
-def generate_explaination(request:ExplainationRequest,current_user):
+explaination_flights=SingleFlight("explanations")
+
+def add_learned_concept(conn,current_user,explaination_id:str):
+    """Add the explanation's UUID to the user's learned_concepts, once"""
+    record_activity(current_user.id,"learned_concepts",explaination_id,conn=conn)
+
+def link_explaination(current_user,explaination_id:str):
+    with stage_timer("teacher","db_write"),engine.begin() as conn:
+        add_learned_concept(conn,current_user,explaination_id)
+    invalidate_user(current_user.id)
+
+def save_explaination(request:ExplainationRequest,current_user,explaination:str,markdown_content:str)->str:
+    """
+    Store a generated explanation in the DB and add its UUID to the user's learned_concepts.
+    """
+    explaination_id=str(uuid.uuid4())
+    with stage_timer("teacher","db_write"),engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO dsa_explanations(id,user_id,title,content,markdown_content,language,difficulty,created_at,updated_at) VALUES (:id,:user_id,:title,:content,:markdown_content,:language,:difficulty,CURRENT_TIMESTAMP,CURRENT_TIMESTAMP)"
+            ),{
+                "id":explaination_id,
+                "user_id":current_user.id,
+                "title":clean_title(request.concept),
+                "content":explaination,
+                "markdown_content": markdown_content,
+                "language":request.language,
+                "difficulty":request.difficulty
+            }
+        )
+        add_learned_concept(conn,current_user,explaination_id)
+    invalidate_user(current_user.id)
+    return explaination_id
+
+async def produce_explaination(request:ExplainationRequest,current_user)->dict:
+    """Run the teacher agent and store the explanation under the user who triggered it"""
+    explaination=await teacher_agent(request.concept,request.language,request.difficulty)
+    markdown_content=f"# {request.concept}\n\n {explaination}"
+    explaination_id=await run_in_threadpool(save_explaination,request,current_user,explaination,markdown_content)
+    entry={
+        "id":explaination_id,
+        "title":clean_title(request.concept),
+        "content":explaination,
+        "markdown_content":markdown_content
+    }
+    if is_cacheable(explaination):
+        remember_explaination(request.concept,request.language,request.difficulty,entry)
+    return {**entry,"user_id":current_user.id}
+
+async def shared_explaination(request:ExplainationRequest,current_user)->dict:
+    """
+    produce_explaination, coalesced with identical requests already in flight.
+    Callers that joined someone else's call get the stored explanation linked to them.
+    """
+    key=cache_key(request.concept,request.language,request.difficulty)
+    produced=await explaination_flights.do(key,produce_explaination,request,current_user)
+    if produced["user_id"]!=current_user.id:
+        await run_in_threadpool(link_explaination,current_user,produced["id"])
+    return produced
+
+def save_explainations(owner_id,entries:list):
+    """
+    Bulk-insert pre-generated explanations owned by owner_id. Each entry holds request, content and
+    markdown_content; the generated ids are written back into the entries.
+    """
+    for entry in entries:
+        entry["id"]=str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO dsa_explanations(id,user_id,title,content,markdown_content,language,difficulty,created_at,updated_at) VALUES (:id,:user_id,:title,:content,:markdown_content,:language,:difficulty,CURRENT_TIMESTAMP,CURRENT_TIMESTAMP)"
+            ),[{
+                "id":entry["id"],
+                "user_id":owner_id,
+                "title":clean_title(entry["request"].concept),
+                "content":entry["content"],
+                "markdown_content":entry["markdown_content"],
+                "language":entry["request"].language,
+                "difficulty":entry["request"].difficulty
+            } for entry in entries]
+        )
+
+@job_runner("explanations")
+async def generate_explaination(request:ExplainationRequest,current_user):
     """
     Generate an explanation for a DSA concept and store it in the DB, 
     then add the explanation's UUID to the user's learned_concepts.
+    An explanation already generated for the same (concept,language,difficulty) is reused instead,
+    and identical requests arriving together share one teacher agent call.
     """
     try:
-        explaination=teacher_agent(request.concept,request.language,request.difficulty)
-        markdown_content=f"# {request.concept}\n\n {explaination}"
-        explaination_id=str(uuid.uuid4())
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "INSERT INTO dsa_explanations(id,user_id,title,content,markdown_content,language,difficulty,created_at,updated_at) VALUES (:id,:user_id,:title,:content,:markdown_content,:language,:difficulty,CURRENT_TIMESTAMP,CURRENT_TIMESTAMP)"
-                ),{
-                    "id":explaination_id,
-                    "user_id":current_user.id,
-                    "title":request.concept,
-                    "content":explaination,
-                    "markdown_content": markdown_content,
-                    "language":request.language,
-                    "difficulty":request.difficulty
-                }
-            )
-            profile=current_user.profile if current_user.profile else {}
-            if "learned_concepts" not in profile:
-                profile["learned_concepts"]=[]
-            profile["learned_concepts"].append(explaination_id)
-            conn.execute(
-                text("UPDATE users SET profile=:profile WHERE id=:id"),{"profile":json.dumps(profile),"id":current_user.id}
-            )
+        cached=await run_in_threadpool(lookup_explaination,request.concept,request.language,request.difficulty)
+        if cached:
+            await run_in_threadpool(link_explaination,current_user,cached["id"])
             return ExplainationResponse(
-                title=request.concept,
-                content=explaination,
-                markdown_content=markdown_content
+                title=cached["title"],
+                content=cached["content"],
+                markdown_content=cached["markdown_content"]
             )
+        produced=await shared_explaination(request,current_user)
+        return ExplainationResponse(
+            title=request.concept,
+            content=produced["content"],
+            markdown_content=produced["markdown_content"]
+        )
     except Exception as e:
         logging.error(f"Error generating explainations : {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating explanation: {str(e)}")
-    
+
+async def explaination_events(request:ExplainationRequest,current_user):
+    """
+    SSE body for a streamed explanation: a start event, content deltas as the LLM produces them,
+    then a done event once the assembled explanation has been stored.
+    """
+    title=clean_title(request.concept)
+    yield sse_event({"title":title},event="start")
+    try:
+        cached=await run_in_threadpool(lookup_explaination,request.concept,request.language,request.difficulty)
+        if cached:
+            await run_in_threadpool(link_explaination,current_user,cached["id"])
+            yield sse_event({"delta":cached["content"]})
+            yield sse_event({"id":cached["id"],"title":cached["title"],"cached":True},event="done")
+            return
+        # this stream leads the generation, so identical requests (streamed or not) arriving meanwhile join it
+        flight=explaination_flights.lead(cache_key(request.concept,request.language,request.difficulty))
+        if flight is None:
+            produced=await shared_explaination(request,current_user)
+            yield sse_event({"delta":produced["content"]})
+            yield sse_event({"id":produced["id"],"title":produced["title"],"cached":True},event="done")
+            return
+        try:
+            chunks=[]
+            async for delta in stream_teacher_agent(request.concept,request.language,request.difficulty):
+                chunks.append(delta)
+                yield sse_event({"delta":delta})
+            explaination="".join(chunks)
+            if not explaination:
+                raise Exception("Empty response from LLM")
+            markdown_content=f"# {request.concept}\n\n {explaination}"
+            explaination_id=await run_in_threadpool(save_explaination,request,current_user,explaination,markdown_content)
+        except BaseException as e:
+            # a client that disconnects must not leave the joined callers cancelled with it
+            flight.set_exception(e if isinstance(e,Exception) else RuntimeError("The explanation stream was interrupted"))
+            raise
+        entry={
+            "id":explaination_id,
+            "title":title,
+            "content":explaination,
+            "markdown_content":markdown_content
+        }
+        flight.set_result({**entry,"user_id":current_user.id})
+        if is_cacheable(explaination):
+            remember_explaination(request.concept,request.language,request.difficulty,entry)
+        yield sse_event({"id":explaination_id,"title":title,"cached":False},event="done")
+    except Exception as e:
+        logging.error(f"Error streaming explainations : {str(e)}")
+        yield sse_event({"detail":f"Error generating explanation: {str(e)}"},event="error")
+
+def stream_explaination(request:ExplainationRequest,current_user):
+    return StreamingResponse(explaination_events(request,current_user),media_type="text/event-stream",headers=SSE_HEADERS)
@@ -0,0 +1,14 @@
+from sqlalchemy.pool import QueuePool
+from controllers.metrics import Gauge,db_checkout_wait
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a free connection"""
+    def _do_get(self):
+        with db_checkout_wait.time():
+            return super()._do_get()
+
+def watch_pool(engine):
+    pool=engine.pool
+    if isinstance(pool,QueuePool):
+        Gauge("db_pool_connections","Pooled connections by state",("state",),
+              callback=lambda:{("checked_out",):pool.checkedout(),("idle",):pool.checkedin(),("overflow",):max(0,pool.overflow())})
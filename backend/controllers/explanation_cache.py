@@ -0,0 +1,94 @@
+import logging
+from sqlalchemy import text
+from typing import Optional
+from config import engine,EXPLANATION_CACHE_SIZE,EXPLANATION_CACHE_TTL,CONCEPT_MATCH_THRESHOLD
+from controllers.ttl_cache import TTLCache
+from controllers.concept_index import ConceptIndex,canonical_concept
+
+ERROR_PREFIX="#Error generating explaination"
+_explanations=TTLCache(maxsize=EXPLANATION_CACHE_SIZE,ttl=EXPLANATION_CACHE_TTL)
+concept_index=ConceptIndex(CONCEPT_MATCH_THRESHOLD)
+
+def clean_title(concept:str)->str:
+    """Collapse runs of whitespace so stored titles line up with lookup keys"""
+    return " ".join(concept.split())
+
+def normalize_concept(concept:str)->str:
+    return clean_title(concept).lower()
+
+def cache_key(concept:str,language:str,difficulty:str)->tuple:
+    """Aliases of a concept ("BST", "binary search trees") share one key"""
+    return (canonical_concept(concept),language.strip().lower(),difficulty.strip().lower())
+
+def is_cacheable(explaination)->bool:
+    """teacher_agent reports failures as markdown, those must never be served to other users"""
+    return bool(explaination) and not explaination.startswith(ERROR_PREFIX)
+
+def create_explanation_index():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_dsa_explanations_lookup ON dsa_explanations (lower(title),lower(language),lower(difficulty))"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_dsa_explanations_user_recent ON dsa_explanations (user_id,created_at DESC)"
+        ))
+
+def load_concept_index():
+    """Index every usable stored explanation title, oldest first so the newest wins per canonical title"""
+    with engine.begin() as conn:
+        rows=conn.execute(
+            text("SELECT id, title, language, difficulty FROM dsa_explanations WHERE content IS NOT NULL AND content NOT LIKE :error ORDER BY created_at"),
+            {"error":ERROR_PREFIX+"%"}
+        ).fetchall()
+    for row in rows:
+        if row.title and row.language and row.difficulty:
+            concept_index.add(str(row.id),row.title,row.language,row.difficulty)
+    logging.info(f"Concept index loaded {concept_index.stats()['titles']} titles")
+
+def explaination_by_id(explaination_id:str)->Optional[dict]:
+    with engine.begin() as conn:
+        row=conn.execute(
+            text("SELECT id, title, content, markdown_content FROM dsa_explanations WHERE id = :id"),
+            {"id":explaination_id}
+        ).fetchone()
+    if not row:
+        return None
+    return {"id":str(row.id),"title":row.title,"content":row.content,"markdown_content":row.markdown_content}
+
+def lookup_explaination(concept:str,language:str,difficulty:str)->Optional[dict]:
+    """
+    Find an already generated explanation for (concept,language,difficulty): first in the in-process LRU,
+    then by exact title in the dsa_explanations table, then the closest title in the concept index.
+    """
+    key=cache_key(concept,language,difficulty)
+    cached=_explanations.get(key)
+    if cached:
+        return cached
+    entry=exact_explaination(concept,language,difficulty)
+    if entry is None:
+        match=concept_index.closest(concept,language,difficulty)
+        entry=explaination_by_id(match[0]) if match else None
+    if entry is None:
+        return None
+    _explanations.set(key,entry)
+    return entry
+
+def exact_explaination(concept:str,language:str,difficulty:str)->Optional[dict]:
+    with engine.begin() as conn:
+        row=conn.execute(
+            text("""
+                SELECT id, title, content, markdown_content
+                FROM dsa_explanations
+                WHERE lower(title) = :title AND lower(language) = :language AND lower(difficulty) = :difficulty
+                  AND content IS NOT NULL AND content NOT LIKE :error
+                ORDER BY created_at DESC
+                LIMIT 1
+            """),{"title":normalize_concept(concept),"language":language.strip().lower(),"difficulty":difficulty.strip().lower(),"error":ERROR_PREFIX+"%"}
+        ).fetchone()
+    if not row:
+        return None
+    return {"id":str(row.id),"title":row.title,"content":row.content,"markdown_content":row.markdown_content}
+
+def remember_explaination(concept:str,language:str,difficulty:str,entry:dict):
+    _explanations.set(cache_key(concept,language,difficulty),entry)
+    concept_index.add(entry["id"],entry["title"],language,difficulty)
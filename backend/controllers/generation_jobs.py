@@ -0,0 +1,245 @@
+import asyncio,hashlib,json,logging,time,uuid
+from typing import Optional
+from sqlalchemy import text,bindparam
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from schema.schemas import JobStatus
+from controllers.streaming import sse_event,SSE_HEADERS
+from controllers.single_flight import SingleFlight
+from controllers.llm_scheduler import current_llm_user
+from config import engine,JOB_WORKERS,JOB_QUEUE_SIZE,JOB_POLL_INTERVAL,JOB_HEARTBEAT_SECONDS
+
+ACTIVE=("queued","running")
+FINISHED=("done","failed")
+_runners={}
+_queue:Optional[asyncio.Queue]=None
+_workers=[]
+_claims=SingleFlight("job_claims")
+_owned=set()
+INTERRUPTED="Interrupted by a server restart, submit it again"
+
+def job_runner(kind:str):
+    """Register the coroutine that executes jobs of this kind: runner(request,current_user)"""
+    def register(fn):
+        _runners[kind]=fn
+        return fn
+    return register
+
+def create_jobs_table():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS generation_jobs (
+                id VARCHAR(36) PRIMARY KEY,
+                user_id VARCHAR(36) NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                request_key VARCHAR(64) NOT NULL,
+                status VARCHAR(16) NOT NULL,
+                request TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                heartbeat DOUBLE PRECISION NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_generation_jobs_request ON generation_jobs (user_id,request_key)"
+        ))
+        # duplicates claimed before the unique index existed: keep the newest active job per key
+        conn.execute(text("""
+            UPDATE generation_jobs SET status='failed',error=:error
+            WHERE status IN ('queued','running') AND EXISTS (
+                SELECT 1 FROM generation_jobs newer
+                WHERE newer.user_id=generation_jobs.user_id AND newer.request_key=generation_jobs.request_key
+                AND newer.status IN ('queued','running')
+                AND (newer.created_at>generation_jobs.created_at OR (newer.created_at=generation_jobs.created_at AND newer.id>generation_jobs.id))
+            )
+        """),{"error":INTERRUPTED})
+        # at most one active job per request, enforced by the database across workers and processes
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_generation_jobs_active ON generation_jobs (user_id,request_key) WHERE status IN ('queued','running')"
+        ))
+
+def is_stale(status:str,heartbeat:float)->bool:
+    """An active job whose worker stopped refreshing its heartbeat died with its process"""
+    return status in ACTIVE and time.time()-heartbeat>3*JOB_HEARTBEAT_SECONDS
+
+def request_key(user_id,kind:str,payload:dict,idempotency_key:Optional[str]=None)->str:
+    """Same user, kind and payload (or the same Idempotency-Key) means the same job"""
+    basis=idempotency_key or json.dumps(payload,sort_keys=True)
+    return hashlib.sha256(f"{user_id}:{kind}:{basis}".encode()).hexdigest()
+
+def _row_status(row)->JobStatus:
+    stale=is_stale(row.status,row.heartbeat)
+    return JobStatus(
+        job_id=row.id,
+        kind=row.kind,
+        status="failed" if stale else row.status,
+        result=json.loads(row.result) if row.result else None,
+        error=INTERRUPTED if stale else row.error,
+        created_at=row.created_at,
+        updated_at=row.updated_at
+    )
+
+def find_job(job_id:str,user_id)->Optional[JobStatus]:
+    with engine.begin() as conn:
+        row=conn.execute(
+            text("SELECT * FROM generation_jobs WHERE id=:id AND user_id=:user_id"),{"id":job_id,"user_id":str(user_id)}
+        ).fetchone()
+    return _row_status(row) if row else None
+
+def claim_job(user_id,kind:str,key:str,payload:dict,reuse_finished:bool)->tuple:
+    """
+    Return (job_id,created). A live active job for the key is reused; with an Idempotency-Key a finished
+    one is too, unless it failed. Otherwise a new queued job is inserted; the partial unique index makes
+    concurrent claims of the same key agree on one job.
+    """
+    params={"user_id":str(user_id),"key":key}
+    with engine.begin() as conn:
+        if reuse_finished:
+            row=conn.execute(
+                text("SELECT id,status FROM generation_jobs WHERE user_id=:user_id AND request_key=:key ORDER BY created_at DESC,heartbeat DESC LIMIT 1"),params
+            ).fetchone()
+            if row and row.status=="done":
+                return row.id,False
+        # an active job whose worker died would hold the key forever
+        conn.execute(
+            text("UPDATE generation_jobs SET status='failed',error=:error,updated_at=CURRENT_TIMESTAMP WHERE user_id=:user_id AND request_key=:key AND status IN ('queued','running') AND heartbeat<:stale"),
+            {**params,"error":INTERRUPTED,"stale":time.time()-3*JOB_HEARTBEAT_SECONDS}
+        )
+    for _ in range(3):
+        with engine.begin() as conn:
+            job_id=conn.execute(
+                text("""
+                    INSERT INTO generation_jobs(id,user_id,kind,request_key,status,request,heartbeat)
+                    VALUES (:id,:user_id,:kind,:key,'queued',:request,:heartbeat)
+                    ON CONFLICT (user_id,request_key) WHERE status IN ('queued','running') DO NOTHING
+                    RETURNING id
+                """),
+                {**params,"id":str(uuid.uuid4()),"kind":kind,"request":json.dumps(payload),"heartbeat":time.time()}
+            ).scalar()
+            if job_id:
+                return job_id,True
+            job_id=conn.execute(
+                text("SELECT id FROM generation_jobs WHERE user_id=:user_id AND request_key=:key AND status IN ('queued','running')"),params
+            ).scalar()
+            if job_id:
+                return job_id,False
+        # the conflicting job finished between the two statements, claim again
+    raise HTTPException(status_code=409,detail=f"Could not claim a job for request {key}, please retry")
+
+def update_job(job_id:str,status:str,result=None,error:Optional[str]=None):
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE generation_jobs SET status=:status,result=:result,error=:error,heartbeat=:heartbeat,updated_at=CURRENT_TIMESTAMP WHERE id=:id"),
+            {"id":job_id,"status":status,"result":None if result is None else json.dumps(jsonable_encoder(result)),"error":error,"heartbeat":time.time()}
+        )
+
+def touch_jobs(job_ids):
+    with engine.begin() as conn:
+        conn.execute(
+            text("UPDATE generation_jobs SET heartbeat=:heartbeat WHERE id IN :ids").bindparams(bindparam("ids",expanding=True)),
+            {"ids":list(job_ids),"heartbeat":time.time()}
+        )
+
+async def submit_job(kind:str,request,current_user,idempotency_key:Optional[str]=None)->JobStatus:
+    """Queue a generation and return at once; duplicate submissions get the existing job back"""
+    if _queue is None:
+        raise HTTPException(status_code=503,detail="Job workers are not running")
+    payload=request.model_dump()
+    key=request_key(current_user.id,kind,payload,idempotency_key)
+    if _queue.full():
+        raise _queue_full()
+    job_id=await _claims.do(key,_claim_and_queue,kind,key,payload,request,current_user,idempotency_key is not None)
+    return await get_job(job_id,current_user)
+
+async def _claim_and_queue(kind:str,key:str,payload:dict,request,current_user,reuse_finished:bool)->str:
+    job_id,created=await run_in_threadpool(claim_job,current_user.id,kind,key,payload,reuse_finished)
+    if created:
+        try:
+            _queue.put_nowait((job_id,kind,request,current_user))
+        except asyncio.QueueFull:
+            # the queue filled up while the row was being inserted; fail the row so the heartbeat never keeps it alive
+            await run_in_threadpool(update_job,job_id,"failed",None,"The generation queue was full")
+            raise _queue_full()
+        _owned.add(job_id)
+    return job_id
+
+def _queue_full()->HTTPException:
+    return HTTPException(status_code=503,detail="Too many queued generations, please retry shortly",headers={"Retry-After":"5"})
+
+async def get_job(job_id:str,current_user)->JobStatus:
+    job=await run_in_threadpool(find_job,job_id,current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404,detail=f"Job {job_id} not found")
+    return job
+
+async def job_events(job_id:str,current_user):
+    """SSE body: a status event whenever the job's status changes, ending with done or failed"""
+    last=None
+    while True:
+        job=await run_in_threadpool(find_job,job_id,current_user.id)
+        if job is None:
+            yield sse_event({"detail":f"Job {job_id} not found"},event="error")
+            return
+        if job.status!=last:
+            last=job.status
+            yield sse_event(job,event=job.status if job.status in FINISHED else "status")
+        if job.status in FINISHED:
+            return
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+def stream_job(job_id:str,current_user):
+    return StreamingResponse(job_events(job_id,current_user),media_type="text/event-stream",headers=SSE_HEADERS)
+
+async def _work():
+    while True:
+        job_id,kind,request,current_user=await _queue.get()
+        current_llm_user.set(str(current_user.id))
+        try:
+            await run_in_threadpool(update_job,job_id,"running")
+            result=await _runners[kind](request,current_user)
+            await run_in_threadpool(update_job,job_id,"done",result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            detail=e.detail if isinstance(e,HTTPException) else str(e)
+            logging.error(f"Generation job {job_id} ({kind}) failed: {detail}")
+            try:
+                await run_in_threadpool(update_job,job_id,"failed",None,str(detail))
+            except Exception as db_error:
+                logging.error(f"Could not record the failure of job {job_id}: {str(db_error)}")
+        finally:
+            _owned.discard(job_id)
+            _queue.task_done()
+
+async def _heartbeat():
+    """Keep the jobs this process holds (queued or running) from looking abandoned"""
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+        if _owned:
+            try:
+                await run_in_threadpool(touch_jobs,list(_owned))
+            except Exception as e:
+                logging.error(f"Job heartbeat failed: {str(e)}")
+
+def start_job_workers():
+    global _queue
+    if _queue is None:
+        _queue=asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+        _workers.extend(asyncio.create_task(_work()) for _ in range(JOB_WORKERS))
+        _workers.append(asyncio.create_task(_heartbeat()))
+
+async def stop_job_workers():
+    global _queue
+    for worker in _workers:
+        worker.cancel()
+    await asyncio.gather(*_workers,return_exceptions=True)
+    _workers.clear()
+    _owned.clear()
+    _queue=None
+
+def job_stats()->dict:
+    return {"workers":JOB_WORKERS if _workers else 0,"queued":_queue.qsize() if _queue else 0,"max_queued":JOB_QUEUE_SIZE}
@@ -1,15 +1,9 @@
 import logging
-from config import client,GROQ_MODEL
-def query_groq(prompt:str):
-      if not client:
+from controllers.llm_gateway import async_client,chat_completion
+async def query_groq(prompt:str,priority:str="explanation",task:str="explanation"):
+      if not async_client:
             raise Exception("GROQ client not initialized.Check your API Key")
       try:
-            response=client.chat.completions.create(
-                  model=GROQ_MODEL,
-                  messages=[{"role":"user","content":prompt}],
-                  temperature=0.7,
-                  max_tokens=4000
-            )
-            return response.choices[0].message.content
+            return await chat_completion(prompt,temperature=0.7,max_tokens=4000,priority=priority,task=task)
       except Exception as e:
             logging.error(f"Error querying GROQ API : {str(e)}")
\ No newline at end of file
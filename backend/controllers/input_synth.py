@@ -0,0 +1,177 @@
+import math,random,re,string
+from typing import Dict,List,Optional,Tuple
+from controllers.sandbox import parse_call_args
+
+# Grows an example input ("nums = [2, 7, 11], target = 9") into inputs of any size n, respecting the
+# bounds, sortedness and distinctness stated in the problem. Imported inside sandbox workers, so no
+# config/DB imports here either.
+
+SIZE_NAMES={"n","m","size","length","count","num","numrows","rows","cols"}
+DEFAULT_BOUND=10**4
+_NUMBER=r"-?\s*\d+(?:\.\d+)?(?:\s*(?:\^|\*\*)\s*\d+|\s*[eE]\s*\d+)?(?:\s*\*\s*10\s*(?:\^|\*\*)\s*\d+)?"
+_RANGE=re.compile(rf"({_NUMBER})\s*<=?\s*([A-Za-z_][\w.]*(?:\([\w.]+\))?(?:\[[a-z]\])*(?:\.length|\.size\(\))?)\s*<=?\s*({_NUMBER})")
+
+def _number(text:str)->float:
+    text=re.sub(r"\s+","",text).replace("^","**")
+    if text.startswith("-"):
+        return -_number(text[1:])
+    if "*10**" in text:
+        head,power=text.split("*10**")
+        return float(head)*10**int(power)
+    if "**" in text:
+        base,power=text.split("**")
+        return float(base)**int(power)
+    return float(text)
+
+class InputSpec:
+    """How an example input grows: which arguments scale with n, their value bounds and ordering"""
+    def __init__(self,example:str,constraints:Optional[List[str]]=None,description:str=""):
+        self.args,self.kwargs=parse_call_args(example)
+        self.values:Dict[str,Tuple[float,float]]={}
+        self.scalars:Dict[str,Tuple[float,float]]={}
+        self.lengths:Dict[str,Tuple[float,float]]={}
+        for constraint in constraints or []:
+            for low,name,high in _RANGE.findall(constraint):
+                self._bound(name,_number(low),_number(high))
+        # "1 <= k <= nums.length": inputs must stay at least as long as such fixed arguments
+        self.at_least=[self.kwargs[name] for constraint in constraints or []
+                       for name in re.findall(r"([A-Za-z_]\w*)\s*<=?\s*(?:len\(\w+\)|\w+\.length|n)\b",constraint)
+                       if isinstance(self.kwargs.get(name),int) and name.lower() not in SIZE_NAMES]
+        text=" ".join([description or "",*(constraints or [])]).lower()
+        self.sorted=bool(re.search(r"(?<!un)sorted|non-decreasing|ascending",text))
+        self.distinct=bool(re.search(r"\b(distinct|unique)\b",text))
+        sequences=[v for v in [*self.args,*self.kwargs.values()] if isinstance(v,(list,str))]
+        self.scale_ints=not sequences
+        self.base=max([len(v) for v in sequences]+[1])
+        self.max_n=None
+        self.fill=None
+        if self.lengths:
+            self.max_n=int(max(high for _,high in self.lengths.values()))
+        if not self.scales():
+            raise ValueError("The example input has nothing that grows with n")
+
+    def _bound(self,name:str,low:float,high:float):
+        length=re.fullmatch(r"len\((\w+)\)|(\w+)\.(?:length|size\(\))",name)
+        if length:
+            self.lengths[length.group(1) or length.group(2)]=(low,high)
+        elif "[" in name:
+            self.values[name.split("[")[0]]=(low,high)
+        elif name.lower() in SIZE_NAMES:
+            self.lengths["*"]=(low,high)
+            self.scalars[name]=(low,high)
+        else:
+            self.scalars[name]=(low,high)
+
+    def scales(self)->bool:
+        named=[(None,v) for v in self.args]+list(self.kwargs.items())
+        return any(isinstance(v,(list,str)) or (isinstance(v,int) and not isinstance(v,bool) and (self.scale_ints or (k or "").lower() in SIZE_NAMES))
+                   for k,v in named)
+
+    def _int_range(self,name:Optional[str],example)->Tuple[int,int]:
+        if name in self.values:
+            low,high=self.values[name]
+        elif len(self.values)==1:
+            low,high=next(iter(self.values.values()))
+        else:
+            flat=[v for v in example if isinstance(v,int) and not isinstance(v,bool)]
+            if flat and set(flat)<={0,1}:
+                return 0,1
+            low,high=(-DEFAULT_BOUND if flat and min(flat)<0 else 0),DEFAULT_BOUND
+        return int(low),int(high)
+
+    def _ints(self,name,example,count:int,rng:random.Random)->list:
+        low,high=self._int_range(name,example)
+        if self.fill in ("min","max","equal") and not self.distinct:
+            return [{"min":low,"max":high}.get(self.fill) if self.fill!="equal" else rng.randint(low,high)]*count
+        if self.distinct and high-low+1>=count:
+            values=rng.sample(range(low,high+1),count)
+        else:
+            values=[rng.randint(low,high) for _ in range(count)]
+        if self.fill=="descending" and not self.sorted:
+            return sorted(values,reverse=True)
+        return sorted(values) if self.sorted or self.fill=="ascending" else values
+
+    def _text(self,example:str,count:int,rng:random.Random)->str:
+        alphabet=sorted(set(example)) if len(set(example))>1 else list(string.ascii_lowercase)
+        if self.fill=="equal":
+            return rng.choice(alphabet)*count
+        return "".join(rng.choice(alphabet) for _ in range(count))
+
+    def _list(self,name,example:list,n:int,rng:random.Random)->list:
+        if not example or all(isinstance(v,int) and not isinstance(v,bool) for v in example):
+            return self._ints(name,example,n,rng)
+        if all(isinstance(v,float) for v in example):
+            low,high=self._int_range(name,[int(v) for v in example])
+            values=[round(rng.uniform(low,high),3) for _ in range(n)]
+            return sorted(values) if self.sorted else values
+        if all(isinstance(v,str) for v in example):
+            if all(len(v)==1 for v in example):
+                return list(self._text("".join(example),n,rng))
+            width=max(1,round(sum(len(v) for v in example)/len(example)))
+            return [self._text("".join(example),width,rng) for _ in range(n)]
+        if all(isinstance(v,list) for v in example):
+            widths={len(v) for v in example}
+            grid=re.search(r"grid|matrix|board|mat\b",name or "",re.I)
+            if not grid and len(widths)==1 and next(iter(widths))<=3 and all(isinstance(x,int) for v in example for x in v):
+                # pairs/triples: edges, intervals, points
+                ordered=all(v==sorted(v) for v in example)
+                rows=[[rng.randrange(0,max(2,n)) for _ in range(next(iter(widths)))] for _ in range(n)]
+                return [sorted(row) for row in rows] if ordered else rows
+            side=max(1,math.isqrt(n))
+            return [self._list(name,example[0],side,rng) for _ in range(side)]
+        return example
+
+    def _value(self,name:Optional[str],example,n:int,rng:random.Random):
+        if isinstance(example,bool):
+            return example
+        if isinstance(example,int):
+            if self.scale_ints or (name or "").lower() in SIZE_NAMES:
+                low,high=self.scalars.get(name,(0,n))
+                return int(min(max(n,low),high))
+            return example
+        if isinstance(example,str):
+            return self._text(example,n,rng)
+        if isinstance(example,list):
+            return self._list(name,example,n,rng)
+        return example
+
+    def generate(self,n:int,seed:int=0,fill:Optional[str]=None)->Tuple[list,dict]:
+        """
+        Call arguments of size n; the same (n,seed,fill) always gives the same input.
+        fill shapes integer/text sequences: min, max, equal, ascending or descending.
+        """
+        rng=random.Random(f"{seed}:{n}:{fill}")
+        self.fill=fill
+        args=[self._value(None,v,n,rng) for v in self.args]
+        kwargs={k:self._value(k,v,n,rng) for k,v in self.kwargs.items()}
+        self.fill=None
+        return args,kwargs
+
+    def min_size(self)->int:
+        low=int(min(low for low,_ in self.lengths.values())) if self.lengths else 1
+        return max([low,*self.at_least])
+
+    def test_inputs(self,count:int,max_n:int,seed:int=0)->List[Tuple[list,dict]]:
+        """Edge cases (smallest sizes, extreme/equal/ordered values) followed by random inputs, up to count"""
+        low=max(0,self.min_size())
+        cap=max(low,min(max_n,self.max_n or max_n))
+        shapes=[(low,None),(max(low,1),None),(max(low,2),None)]
+        shapes+=[(min(cap,8),fill) for fill in ("min","max","equal","ascending","descending")]
+        shapes+=[(cap,None)]
+        rng=random.Random(seed)
+        while len(shapes)<count*2:
+            shapes.append((rng.randint(max(low,2),max(low,2,min(cap,20))),None))
+        inputs,seen=[],set()
+        for i,(n,fill) in enumerate(shapes):
+            args,kwargs=self.generate(n,seed+i,fill)
+            key=format_input(args,kwargs)
+            if key not in seen:
+                seen.add(key)
+                inputs.append((args,kwargs))
+            if len(inputs)>=count:
+                break
+        return inputs
+
+def format_input(args:list,kwargs:dict)->str:
+    """Inverse of parse_call_args, in the 'nums = [1, 2], target = 3' style examples use"""
+    return ", ".join([repr(v) for v in args]+[f"{k} = {v!r}" for k,v in kwargs.items()])
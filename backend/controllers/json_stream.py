@@ -0,0 +1,82 @@
+import json,re,logging
+from typing import List
+
+_STRUCTURAL=re.compile(r'[{}\[\]"]')
+_IN_STRING=re.compile(r'["\\]')
+_TRAILING_COMMA=re.compile(r",\s*([}\]])")
+
+def loads_tolerant(raw:str):
+    """json.loads that accepts raw control characters and trailing commas, returns None if still invalid"""
+    try:
+        return json.loads(raw,strict=False)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1",raw),strict=False)
+    except json.JSONDecodeError:
+        logging.warning(f"Skipping malformed JSON object from LLM: {raw[:120]}")
+        return None
+
+class JSONArrayStream:
+    """
+    Incremental parser for an LLM-streamed JSON array of objects.
+    feed() returns every top-level object whose closing brace has arrived; text outside
+    objects (markdown fences, brackets, commas, chatter) is ignored and a malformed object
+    is skipped without affecting its neighbours.
+    """
+    def __init__(self):
+        self._parts=[]
+        self._depth=0
+        self._in_string=False
+        self._escape=False
+
+    def feed(self,chunk:str)->List[dict]:
+        objects=[]
+        pos=0
+        segment=0
+        if self._escape and chunk:
+            self._escape=False
+            pos=1
+        while pos<len(chunk):
+            if self._depth==0:
+                start=chunk.find("{",pos)
+                if start==-1:
+                    break
+                self._parts=[]
+                self._depth=1
+                segment=start
+                pos=start+1
+                continue
+            match=(_IN_STRING if self._in_string else _STRUCTURAL).search(chunk,pos)
+            if not match:
+                pos=len(chunk)
+                break
+            char,index=match.group(),match.start()
+            pos=index+1
+            if self._in_string:
+                if char=="\\":
+                    if index+1<len(chunk):
+                        pos=index+2
+                    else:
+                        self._escape=True
+                else:
+                    self._in_string=False
+            elif char=='"':
+                self._in_string=True
+            elif char in "{[":
+                self._depth+=1
+            else:
+                self._depth-=1
+                if self._depth==0:
+                    self._parts.append(chunk[segment:index+1])
+                    value=loads_tolerant("".join(self._parts))
+                    if isinstance(value,dict):
+                        objects.append(value)
+                    self._parts=[]
+        if self._depth>0:
+            self._parts.append(chunk[segment:])
+        return objects
+
+def parse_json_objects(raw:str)->List[dict]:
+    """Parse a complete LLM response the same tolerant way as a stream"""
+    return JSONArrayStream().feed(raw)
@@ -0,0 +1,170 @@
+import asyncio,logging,random,time
+import httpx
+from groq import AsyncGroq,APIConnectionError,RateLimitError,InternalServerError
+from config import (
+      GROQ_KEY,GROQ_MODEL,GROQ_BASE_URL,LLM_TIMEOUT,LLM_MAX_CONCURRENCY,LLM_MAX_RETRIES,
+      LLM_BACKOFF_BASE,LLM_BACKOFF_MAX,LLM_POOL_SIZE,LLM_KEEPALIVE,GROQ_RPM,GROQ_TPM,LLM_PRIORITY_WEIGHTS,
+      LLM_MODEL_TIERS,LLM_TASK_ROUTES,LLM_SLO_WINDOW,LLM_SLO_MIN_SAMPLES,LLM_SLO_COOLDOWN,LLM_SLO_TIMEOUT_FACTOR
+)
+from controllers.rate_limiter import RateLimiter,estimate_tokens
+from controllers.llm_scheduler import FairScheduler
+from controllers.model_router import ModelRouter
+from controllers.metrics import Gauge,llm_duration,llm_tokens
+
+# APITimeoutError is a subclass of APIConnectionError
+RETRYABLE_ERRORS=(APIConnectionError,RateLimitError,InternalServerError)
+
+_http_client=httpx.AsyncClient(
+      limits=httpx.Limits(
+            max_connections=LLM_POOL_SIZE,
+            max_keepalive_connections=LLM_POOL_SIZE,
+            keepalive_expiry=LLM_KEEPALIVE
+      ),
+      timeout=LLM_TIMEOUT
+)
+async_client=AsyncGroq(api_key=GROQ_KEY,base_url=GROQ_BASE_URL,http_client=_http_client,timeout=LLM_TIMEOUT,max_retries=0) if GROQ_KEY else None
+scheduler=FairScheduler(LLM_MAX_CONCURRENCY,LLM_PRIORITY_WEIGHTS)
+Gauge("llm_scheduler_waiting","LLM calls waiting for a slot",("priority",),
+      callback=lambda:{(cls,):stats["waiting"] for cls,stats in scheduler.stats()["classes"].items()})
+Gauge("llm_scheduler_running","LLM calls holding a slot",callback=lambda:{():scheduler.running})
+rate_limiter=RateLimiter(GROQ_RPM,GROQ_TPM)
+router=ModelRouter(LLM_MODEL_TIERS,LLM_TASK_ROUTES,LLM_SLO_WINDOW,LLM_SLO_MIN_SAMPLES,LLM_SLO_COOLDOWN)
+Gauge("llm_model_p95_seconds","Rolling p95 provider latency per task and model",("task","model"),callback=router.p95s)
+
+
+def _record_usage(model:str,usage):
+      if usage is None:
+            return
+      llm_tokens.inc(getattr(usage,"prompt_tokens",0) or 0,model=model,type="prompt")
+      llm_tokens.inc(getattr(usage,"completion_tokens",0) or 0,model=model,type="completion")
+
+
+def _backoff_delay(attempt:int,error:Exception)->float:
+      """Full-jitter exponential backoff, honouring the provider's retry-after header when present"""
+      response=getattr(error,"response",None)
+      if response is not None:
+            try:
+                  return min(LLM_BACKOFF_MAX,float(response.headers.get("retry-after")))
+            except (TypeError,ValueError):
+                  pass
+      return random.uniform(0,min(LLM_BACKOFF_MAX,LLM_BACKOFF_BASE*2**attempt))
+
+
+def _pick_model(model:str,task:str,timeout:float)->tuple:
+      """Explicit model wins, else the router's choice for the task; routed calls time out at a multiple of the SLO"""
+      if model or not task:
+            return model or GROQ_MODEL,timeout or LLM_TIMEOUT
+      routed,budget=router.route(task)
+      return routed,timeout or (min(LLM_TIMEOUT,budget*LLM_SLO_TIMEOUT_FACTOR) if budget else LLM_TIMEOUT)
+
+
+async def chat_completion(prompt:str,temperature:float=0.7,max_tokens:int=2000,model:str=None,timeout:float=None,
+                          priority:str="bulk",task:str=None)->str:
+      """
+      Send a single-prompt chat completion through the shared async client.
+      Calls wait for a scheduler slot of their priority class (interactive, explanation or bulk)
+      and the provider rate budget, and are retried with jittered backoff on transient errors.
+      A task (see LLM_TASK_ROUTES) lets the router pick the model tier; every attempt is routed afresh.
+      """
+      if not async_client:
+            raise Exception("GROQ client not initialized.Check your API Key")
+      for attempt in range(LLM_MAX_RETRIES+1):
+            try:
+                  async with scheduler.slot(priority):
+                        reserved=await rate_limiter.acquire(estimate_tokens(prompt,max_tokens))
+                        chosen,call_timeout=_pick_model(model,task,timeout)
+                        started=time.perf_counter()
+                        try:
+                              response=await async_client.chat.completions.create(
+                                    model=chosen,
+                                    messages=[{"role":"user","content":prompt}],
+                                    temperature=temperature,
+                                    max_tokens=max_tokens,
+                                    timeout=call_timeout
+                              )
+                        except Exception as e:
+                              elapsed=time.perf_counter()-started
+                              llm_duration.observe(elapsed,model=chosen,priority=priority,outcome=type(e).__name__)
+                              router.observe(task,chosen,elapsed)
+                              raise
+                  elapsed=time.perf_counter()-started
+                  llm_duration.observe(elapsed,model=chosen,priority=priority,outcome="ok")
+                  router.observe(task,chosen,elapsed)
+                  _record_usage(chosen,response.usage)
+                  rate_limiter.settle(reserved,getattr(response.usage,"total_tokens",None))
+                  return response.choices[0].message.content or ""
+            except RETRYABLE_ERRORS as e:
+                  if attempt==LLM_MAX_RETRIES:
+                        raise
+                  delay=_backoff_delay(attempt,e)
+                  logging.warning(f"LLM call failed ({type(e).__name__}), retry {attempt+1}/{LLM_MAX_RETRIES} in {delay:.2f}s")
+                  await asyncio.sleep(delay)
+
+
+async def stream_chat_completion(prompt:str,temperature:float=0.7,max_tokens:int=2000,model:str=None,timeout:float=None,
+                                 priority:str="bulk",task:str=None):
+      """
+      Stream a chat completion as content deltas.
+      A call is only retried if it fails before the first delta has been yielded.
+      """
+      if not async_client:
+            raise Exception("GROQ client not initialized.Check your API Key")
+      for attempt in range(LLM_MAX_RETRIES+1):
+            started=False
+            try:
+                  async with scheduler.slot(priority):
+                        reserved=await rate_limiter.acquire(estimate_tokens(prompt,max_tokens))
+                        chosen,call_timeout=_pick_model(model,task,timeout)
+                        opened=time.perf_counter()
+                        used=None
+                        try:
+                              stream=await async_client.chat.completions.create(
+                                    model=chosen,
+                                    messages=[{"role":"user","content":prompt}],
+                                    temperature=temperature,
+                                    max_tokens=max_tokens,
+                                    timeout=call_timeout,
+                                    stream=True
+                              )
+                              async for chunk in stream:
+                                    # Groq reports usage once, on the final chunk
+                                    usage=getattr(getattr(chunk,"x_groq",None),"usage",None)
+                                    if usage is not None:
+                                          _record_usage(chosen,usage)
+                                          used=getattr(usage,"total_tokens",None)
+                                    if not chunk.choices:
+                                          continue
+                                    delta=chunk.choices[0].delta.content
+                                    if delta:
+                                          started=True
+                                          yield delta
+                        except Exception as e:
+                              elapsed=time.perf_counter()-opened
+                              llm_duration.observe(elapsed,model=chosen,priority=priority,outcome=type(e).__name__)
+                              router.observe(task,chosen,elapsed)
+                              raise
+                        finally:
+                              rate_limiter.settle(reserved,used)
+                  elapsed=time.perf_counter()-opened
+                  llm_duration.observe(elapsed,model=chosen,priority=priority,outcome="ok")
+                  router.observe(task,chosen,elapsed)
+                  return
+            except RETRYABLE_ERRORS as e:
+                  if started or attempt==LLM_MAX_RETRIES:
+                        raise
+                  delay=_backoff_delay(attempt,e)
+                  logging.warning(f"LLM stream failed ({type(e).__name__}), retry {attempt+1}/{LLM_MAX_RETRIES} in {delay:.2f}s")
+                  await asyncio.sleep(delay)
+
+
+def scheduler_stats()->dict:
+      return scheduler.stats()
+
+
+def route_stats()->dict:
+      return router.stats()
+
+
+async def close_gateway():
+      """Release pooled keep-alive connections on shutdown"""
+      await _http_client.aclose()
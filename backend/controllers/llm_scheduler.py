@@ -0,0 +1,113 @@
+import asyncio,contextvars,time
+from collections import OrderedDict,deque
+from contextlib import asynccontextmanager
+from typing import Dict
+from controllers.metrics import llm_queue_wait
+
+# who the current request/job is for; set by main's middleware and by the job workers
+current_llm_user=contextvars.ContextVar("current_llm_user",default="anonymous")
+
+class FairScheduler:
+    """
+    Admission control for LLM calls: at most capacity calls hold a slot at once.
+    Waiting calls are served by weighted fair sharing between priority classes (stride scheduling),
+    and round-robin between users inside a class so one user's bulk job cannot starve the others.
+    """
+    def __init__(self,capacity:int,weights:Dict[str,int],default:str="bulk"):
+        self.capacity=capacity
+        self.weights=weights
+        self.default=default
+        self.running=0
+        self._queues={cls:OrderedDict() for cls in weights}
+        self._pass={cls:0.0 for cls in weights}
+        self._vtime=0.0
+        self._waits={cls:deque(maxlen=1000) for cls in weights}
+        self._served={cls:0 for cls in weights}
+
+    def _waiting(self,cls:str)->int:
+        return sum(len(waiters) for waiters in self._queues[cls].values())
+
+    def _pick(self):
+        active=[cls for cls in self.weights if self._queues[cls]]
+        if not active:
+            return None
+        cls=min(active,key=lambda c:self._pass[c])
+        self._vtime=self._pass[cls]
+        self._pass[cls]+=1/self.weights[cls]
+        users=self._queues[cls]
+        user=next(iter(users))
+        waiters=users[user]
+        future=waiters.popleft()
+        if waiters:
+            users.move_to_end(user)
+        else:
+            del users[user]
+        return future
+
+    def _release(self):
+        while True:
+            future=self._pick()
+            if future is None:
+                self.running-=1
+                return
+            # hand the slot straight to the next waiter; one cancelled before it could forget itself is skipped
+            if not future.done():
+                future.set_result(None)
+                return
+
+    def _forget(self,cls:str,user:str,future):
+        waiters=self._queues[cls].get(user)
+        if waiters and future in waiters:
+            waiters.remove(future)
+            if not waiters:
+                del self._queues[cls][user]
+
+    async def acquire(self,priority:str,user:str)->str:
+        cls=priority if priority in self.weights else self.default
+        started=time.monotonic()
+        if self.running<self.capacity and not any(self._queues.values()):
+            self.running+=1
+        else:
+            if not self._queues[cls]:
+                # a class that was idle rejoins at the current virtual time instead of with banked credit
+                self._pass[cls]=max(self._pass[cls],self._vtime)
+            future=asyncio.get_running_loop().create_future()
+            self._queues[cls].setdefault(user,deque()).append(future)
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()
+                else:
+                    self._forget(cls,user,future)
+                raise
+        waited=time.monotonic()-started
+        self._waits[cls].append(waited)
+        self._served[cls]+=1
+        llm_queue_wait.observe(waited,priority=cls)
+        return cls
+
+    @asynccontextmanager
+    async def slot(self,priority:str,user:str=None):
+        await self.acquire(priority,user or current_llm_user.get())
+        try:
+            yield
+        finally:
+            self._release()
+
+    def stats(self)->dict:
+        def percentile(samples,p):
+            return round(samples[min(len(samples)-1,int(p*len(samples)))]*1000,2) if samples else 0.0
+        classes={}
+        for cls in self.weights:
+            waits=sorted(self._waits[cls])
+            classes[cls]={
+                "weight":self.weights[cls],
+                "waiting":self._waiting(cls),
+                "waiting_users":len(self._queues[cls]),
+                "served":self._served[cls],
+                "queue_wait_p50_ms":percentile(waits,0.5),
+                "queue_wait_p95_ms":percentile(waits,0.95),
+                "queue_wait_max_ms":round(waits[-1]*1000,2) if waits else 0.0
+            }
+        return {"capacity":self.capacity,"running":self.running,"classes":classes}
@@ -0,0 +1,128 @@
+import bisect,threading,time
+from contextlib import contextmanager
+from typing import Callable,Dict,List,Tuple
+
+# Minimal Prometheus text-format instrumentation (no client library needed). Metrics register
+# themselves on creation and render() produces the /metrics body.
+
+CONTENT_TYPE="text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS=(0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120)
+_registry:List["_Metric"]=[]
+
+def _escape(value)->str:
+    return str(value).replace("\\","\\\\").replace("\n","\\n").replace('"','\\"')
+
+def _labels(names:Tuple[str,...],values:Tuple,extra:str="")->str:
+    pairs=[f'{name}="{_escape(value)}"' for name,value in zip(names,values)]
+    if extra:
+        pairs.append(extra)
+    return "{"+",".join(pairs)+"}" if pairs else ""
+
+class _Metric:
+    kind="untyped"
+    def __init__(self,name:str,documentation:str,labelnames:Tuple[str,...]=()):
+        self.name=name
+        self.documentation=documentation
+        self.labelnames=tuple(labelnames)
+        self._values:Dict[Tuple,object]={}
+        self._lock=threading.Lock()
+        _registry.append(self)
+
+    def _key(self,labels:dict)->Tuple:
+        return tuple(str(labels.get(name,"")) for name in self.labelnames)
+
+    def samples(self)->List[str]:
+        raise NotImplementedError
+
+    def render(self)->str:
+        return "\n".join([f"# HELP {self.name} {self.documentation}",f"# TYPE {self.name} {self.kind}",*self.samples()])
+
+class Counter(_Metric):
+    kind="counter"
+    def inc(self,amount:float=1,**labels):
+        key=self._key(labels)
+        with self._lock:
+            self._values[key]=self._values.get(key,0)+amount
+
+    def samples(self):
+        with self._lock:
+            items=list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames,key)} {value}" for key,value in items]
+
+class Gauge(_Metric):
+    """A gauge set directly, or computed at scrape time by a callback returning {label values: value}"""
+    kind="gauge"
+    def __init__(self,name:str,documentation:str,labelnames:Tuple[str,...]=(),callback:Callable[[],Dict[Tuple,float]]=None):
+        super().__init__(name,documentation,labelnames)
+        self.callback=callback
+
+    def set(self,value:float,**labels):
+        with self._lock:
+            self._values[self._key(labels)]=value
+
+    def samples(self):
+        if self.callback:
+            try:
+                items=list(self.callback().items())
+            except Exception:
+                items=[]
+        else:
+            with self._lock:
+                items=list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames,tuple(key))} {value}" for key,value in items]
+
+class Histogram(_Metric):
+    kind="histogram"
+    def __init__(self,name:str,documentation:str,labelnames:Tuple[str,...]=(),buckets:Tuple[float,...]=DEFAULT_BUCKETS):
+        super().__init__(name,documentation,labelnames)
+        self.buckets=tuple(sorted(buckets))
+
+    def observe(self,value:float,**labels):
+        key=self._key(labels)
+        with self._lock:
+            counts,total=self._values.get(key) or ([0]*(len(self.buckets)+1),0.0)
+            counts[bisect.bisect_left(self.buckets,value)]+=1
+            self._values[key]=(counts,total+value)
+
+    @contextmanager
+    def time(self,**labels):
+        started=time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter()-started,**labels)
+
+    def samples(self):
+        with self._lock:
+            items=[(key,(list(counts),total)) for key,(counts,total) in self._values.items()]
+        lines=[]
+        for key,(counts,total) in items:
+            cumulative=0
+            for bound,count in zip(self.buckets,counts):
+                cumulative+=count
+                bucket=_labels(self.labelnames,key,f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            cumulative+=counts[-1]
+            bucket=_labels(self.labelnames,key,'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames,key)} {round(total,6)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames,key)} {cumulative}")
+        return lines
+
+def render()->str:
+    return "\n".join(metric.render() for metric in _registry)+"\n"
+
+#-------------------Shared metrics----------------------------#
+http_requests=Counter("http_requests_total","HTTP requests by route and status",("method","route","status"))
+http_duration=Histogram("http_request_duration_seconds","Time to the response (first byte for streams)",("method","route"))
+stage_duration=Histogram("agent_stage_duration_seconds","Time spent per agent phase",("agent","stage"))
+llm_duration=Histogram("llm_request_duration_seconds","Provider call time, excluding queueing",("model","priority","outcome"))
+llm_tokens=Counter("llm_tokens_total","Tokens reported by the provider",("model","type"))
+llm_queue_wait=Histogram("llm_queue_wait_seconds","Wait for an LLM scheduler slot",("priority",))
+db_checkout_wait=Histogram("db_pool_checkout_seconds","Wait to check a connection out of the SQLAlchemy pool",(),
+                           buckets=(0.0005,0.001,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,5,30))
+#-------------------Shared metrics----------------------------#
+
+def stage_timer(agent:str,stage:str):
+    """with stage_timer("examiner","llm_wait"): ..., stages are prompt_build, llm_wait, parse, validate, db_write"""
+    return stage_duration.time(agent=agent,stage=stage)
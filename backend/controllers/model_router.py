@@ -0,0 +1,90 @@
+import threading,time
+from collections import deque
+from typing import Dict,Tuple
+from controllers.metrics import Counter
+
+llm_routes=Counter("llm_routed_total","LLM calls per task and chosen model",("task","model","reason"))
+
+class ModelRouter:
+    """
+    Picks the model for an LLM task: the task's primary tier, or the next faster tier while the
+    primary's rolling p95 for that task is over its latency budget. After cooldown seconds the primary
+    gets a fresh window and is tried again, so a provider hiccup does not pin a task to the small model.
+    """
+    def __init__(self,tiers:Dict[str,str],routes:Dict[str,Tuple[str,float]],window:int,min_samples:int,cooldown:float):
+        unknown={task:tier for task,(tier,_) in routes.items() if tier not in tiers}
+        if unknown:
+            raise ValueError(f"Routes {unknown} use tiers that are not configured ({', '.join(tiers)})")
+        self.tiers=tiers
+        self.order=list(tiers)
+        self.routes=routes
+        self.window=window
+        self.min_samples=min_samples
+        self.cooldown=cooldown
+        self._samples:Dict[Tuple[str,str],deque]={}
+        self._degraded:Dict[Tuple[str,str],float]={}
+        self._lock=threading.Lock()
+
+    def _p95(self,task:str,model:str)->float:
+        samples=self._samples.get((task,model))
+        if not samples or len(samples)<self.min_samples:
+            return 0.0
+        ordered=sorted(samples)
+        return ordered[min(len(ordered)-1,int(0.95*len(ordered)))]
+
+    def _healthy(self,task:str,model:str,budget:float,now:float)->bool:
+        until=self._degraded.get((task,model))
+        if until is not None:
+            if now<until:
+                return False
+            # cooldown over: forget the slow samples and probe the model again
+            del self._degraded[(task,model)]
+            self._samples.pop((task,model),None)
+        if self._p95(task,model)>budget:
+            self._degraded[(task,model)]=now+self.cooldown
+            return False
+        return True
+
+    def route(self,task:str)->Tuple[str,float]:
+        """(model, latency budget) for a task; unknown tasks get the most capable tier without a budget"""
+        if task not in self.routes:
+            return self.tiers[self.order[-1]],0.0
+        tier,budget=self.routes[task]
+        now=time.monotonic()
+        with self._lock:
+            # primary first, then faster tiers down to the fastest, which is used regardless
+            candidates=self.order[:self.order.index(tier)+1][::-1]
+            for i,candidate in enumerate(candidates):
+                model=self.tiers[candidate]
+                if i==len(candidates)-1 or self._healthy(task,model,budget,now):
+                    break
+        llm_routes.inc(task=task,model=model,reason="primary" if candidate==tier else "fallback")
+        return model,budget
+
+    def observe(self,task:str,model:str,seconds:float):
+        """Record a call's provider latency (failures included, a timeout is the slowest answer)"""
+        if task not in self.routes:
+            return
+        with self._lock:
+            self._samples.setdefault((task,model),deque(maxlen=self.window)).append(seconds)
+
+    def p95s(self)->Dict[Tuple[str,str],float]:
+        with self._lock:
+            return {key:self._p95(*key) for key in self._samples}
+
+    def stats(self)->dict:
+        now=time.monotonic()
+        with self._lock:
+            tasks={}
+            for task,(tier,budget) in self.routes.items():
+                models={}
+                for (t,model),samples in self._samples.items():
+                    if t==task:
+                        until=self._degraded.get((task,model))
+                        models[model]={
+                            "samples":len(samples),
+                            "p95_ms":round(self._p95(task,model)*1000,1),
+                            "degraded_for_s":round(until-now,1) if until and until>now else 0.0
+                        }
+                tasks[task]={"tier":tier,"model":self.tiers[tier],"budget_ms":budget*1000,"models":models}
+        return {"tiers":self.tiers,"tasks":tasks}
@@ -0,0 +1,197 @@
+import time,threading,logging
+from typing import Dict,Iterable,Tuple,Type
+from pydantic import BaseModel
+from sqlalchemy import text
+from controllers.ttl_cache import TTLCache
+from controllers.metrics import Gauge
+from config import engine,STORE_BACKEND,STORE_MAXSIZE,STORE_TTL
+
+PRUNE_EVERY=100
+
+def create_store_table():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS kv_store (
+                namespace VARCHAR(64) NOT NULL,
+                key VARCHAR(255) NOT NULL,
+                value TEXT NOT NULL,
+                expires_at DOUBLE PRECISION NOT NULL,
+                PRIMARY KEY (namespace,key)
+            )
+        """))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_kv_store_expiry ON kv_store (namespace,expires_at)"
+        ))
+
+class ObjectStore:
+    """
+    Dict-like store for generated objects (problems, quizzes) with a size and an age limit.
+    Subclasses implement get/set_many/delete/size.
+    """
+    def __init__(self,namespace:str,model:Type[BaseModel],maxsize:int=STORE_MAXSIZE,ttl:float=STORE_TTL):
+        self.namespace=namespace
+        self.model=model
+        self.maxsize=maxsize
+        self.ttl=ttl
+
+    def get(self,key:str,default=None):
+        raise NotImplementedError
+
+    def set_many(self,items:Iterable[Tuple[str,BaseModel]]):
+        raise NotImplementedError
+
+    def delete(self,key:str):
+        raise NotImplementedError
+
+    def size(self)->int:
+        raise NotImplementedError
+
+    def set(self,key:str,value:BaseModel):
+        self.set_many([(key,value)])
+
+    def stats(self)->dict:
+        return {"backend":type(self).__name__,"namespace":self.namespace,"size":self.size(),"maxsize":self.maxsize,"ttl":self.ttl}
+
+    def __getitem__(self,key):
+        value=self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self,key,value):
+        self.set(key,value)
+
+    def __delitem__(self,key):
+        self.delete(key)
+
+    def __contains__(self,key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return self.size()
+
+class MemoryStore(ObjectStore):
+    """Per-process LRU+TTL store, the default for a single worker"""
+    def __init__(self,namespace:str,model:Type[BaseModel],maxsize:int=STORE_MAXSIZE,ttl:float=STORE_TTL):
+        super().__init__(namespace,model,maxsize,ttl)
+        self._cache=TTLCache(maxsize,ttl)
+
+    def get(self,key:str,default=None):
+        return self._cache.get(key,default)
+
+    def set_many(self,items):
+        for key,value in items:
+            self._cache.set(key,value)
+
+    def delete(self,key:str):
+        self._cache.pop(key)
+
+    def size(self)->int:
+        return len(self._cache)
+
+class SQLStore(ObjectStore):
+    """
+    Store shared by every worker through the kv_store table. Values are JSON of the model;
+    stored objects never change, so reads are also kept in a small local LRU.
+    """
+    def __init__(self,namespace:str,model:Type[BaseModel],maxsize:int=STORE_MAXSIZE,ttl:float=STORE_TTL):
+        super().__init__(namespace,model,maxsize,ttl)
+        self._local=TTLCache(min(maxsize,1024),min(ttl,300))
+        self._writes=0
+        self._lock=threading.Lock()
+
+    def get(self,key:str,default=None):
+        value=self._local.get(key)
+        if value is not None:
+            return value
+        with engine.begin() as conn:
+            row=conn.execute(
+                text("SELECT value FROM kv_store WHERE namespace=:namespace AND key=:key AND expires_at>:now"),
+                {"namespace":self.namespace,"key":key,"now":time.time()}
+            ).fetchone()
+        if not row:
+            return default
+        value=self.model.model_validate_json(row.value)
+        self._local.set(key,value)
+        return value
+
+    def set_many(self,items):
+        items=list(items)
+        if not items:
+            return
+        expires_at=time.time()+self.ttl
+        with engine.begin() as conn:
+            conn.execute(
+                text("""
+                    INSERT INTO kv_store(namespace,key,value,expires_at) VALUES (:namespace,:key,:value,:expires_at)
+                    ON CONFLICT (namespace,key) DO UPDATE SET value=excluded.value,expires_at=excluded.expires_at
+                """),
+                [{"namespace":self.namespace,"key":key,"value":value.model_dump_json(),"expires_at":expires_at} for key,value in items]
+            )
+        for key,value in items:
+            self._local.set(key,value)
+        with self._lock:
+            self._writes+=len(items)
+            due=self._writes>=PRUNE_EVERY
+            if due:
+                self._writes=0
+        if due:
+            self.prune()
+
+    def delete(self,key:str):
+        self._local.pop(key)
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM kv_store WHERE namespace=:namespace AND key=:key"),{"namespace":self.namespace,"key":key})
+
+    def size(self)->int:
+        with engine.begin() as conn:
+            return conn.execute(
+                text("SELECT COUNT(*) FROM kv_store WHERE namespace=:namespace AND expires_at>:now"),
+                {"namespace":self.namespace,"now":time.time()}
+            ).scalar()
+
+    def prune(self):
+        """Drop expired rows, then the oldest ones beyond maxsize"""
+        try:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("DELETE FROM kv_store WHERE namespace=:namespace AND expires_at<=:now"),
+                    {"namespace":self.namespace,"now":time.time()}
+                )
+                excess=conn.execute(
+                    text("SELECT COUNT(*) FROM kv_store WHERE namespace=:namespace"),{"namespace":self.namespace}
+                ).scalar()-self.maxsize
+                if excess>0:
+                    conn.execute(
+                        text("""
+                            DELETE FROM kv_store WHERE namespace=:namespace AND key IN (
+                                SELECT key FROM kv_store WHERE namespace=:namespace ORDER BY expires_at LIMIT :excess
+                            )
+                        """),
+                        {"namespace":self.namespace,"excess":excess}
+                    )
+        except Exception as e:
+            logging.error(f"Pruning the {self.namespace} store failed: {str(e)}")
+
+_BACKENDS={"memory":MemoryStore,"sql":SQLStore}
+_stores:Dict[str,ObjectStore]={}
+
+def create_store(namespace:str,model:Type[BaseModel])->ObjectStore:
+    """Store for namespace using the STORE_BACKEND setting (memory or sql)"""
+    backend=_BACKENDS.get(STORE_BACKEND.strip().lower())
+    if backend is None:
+        raise ValueError(f"Unknown STORE_BACKEND '{STORE_BACKEND}', expected one of {', '.join(_BACKENDS)}")
+    store=backend(namespace,model)
+    _stores[namespace]=store
+    return store
+
+def store_stats()->dict:
+    return {namespace:store.stats() for namespace,store in _stores.items()}
+
+Gauge("store_objects","Objects held per generated-object store",("namespace",),
+      callback=lambda:{(namespace,):store.size() for namespace,store in _stores.items()})
+
+def prune_stores():
+    for store in _stores.values():
+        if isinstance(store,SQLStore):
+            store.prune()
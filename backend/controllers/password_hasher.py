@@ -0,0 +1,95 @@
+import asyncio,time,multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+# Worker processes import this module to run _hash/_verify, so config is only
+# imported inside PasswordHasher (parent side) and workers stay lightweight.
+
+_contexts={}
+
+def _context(rounds:int)->CryptContext:
+    if rounds not in _contexts:
+        _contexts[rounds]=CryptContext(schemes=["bcrypt"],deprecated="auto",bcrypt__rounds=rounds)
+    return _contexts[rounds]
+
+def _hash(password:str,rounds:int)->str:
+    return _context(rounds).hash(password)
+
+def _verify(password:str,hashed:str,rounds:int)->bool:
+    return _context(rounds).verify(password,hashed)
+
+def _ready():
+    return True
+
+class PasswordHasher:
+    """
+    bcrypt on a dedicated process pool so login bursts never compete with the request threadpool.
+    At most max_pending hashes may be running or queued; beyond that callers get a 503 with Retry-After.
+    """
+    def __init__(self,workers:int,max_pending:int,rounds:int):
+        self.workers=workers
+        self.max_pending=max_pending
+        self.rounds=rounds
+        self.pending=0
+        self.completed=0
+        self.rejected=0
+        self._latencies=deque(maxlen=1000)
+        self._pool=None
+
+    def start(self):
+        if self._pool is None:
+            self._pool=ProcessPoolExecutor(max_workers=self.workers,mp_context=multiprocessing.get_context("forkserver"))
+            for future in [self._pool.submit(_ready) for _ in range(self.workers)]:
+                future.result()
+
+    def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool=None
+
+    async def _submit(self,fn,*args):
+        if self.pending>=self.max_pending:
+            self.rejected+=1
+            raise HTTPException(status_code=503,detail="Too many sign-in requests, please retry shortly",headers={"Retry-After":"1"})
+        self.start()
+        self.pending+=1
+        started=time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool,fn,*args)
+        finally:
+            self.pending-=1
+            self.completed+=1
+            self._latencies.append(time.perf_counter()-started)
+
+    async def hash(self,password:str)->str:
+        return await self._submit(_hash,password,self.rounds)
+
+    async def verify(self,password:str,hashed:str)->bool:
+        return await self._submit(_verify,password,hashed,self.rounds)
+
+    def stats(self)->dict:
+        latencies=sorted(self._latencies)
+        def percentile(p):
+            return round(latencies[min(len(latencies)-1,int(p*len(latencies)))]*1000,2) if latencies else 0.0
+        return {
+            "workers":self.workers,
+            "rounds":self.rounds,
+            "in_flight":min(self.pending,self.workers),
+            "queue_depth":max(0,self.pending-self.workers),
+            "max_pending":self.max_pending,
+            "completed":self.completed,
+            "rejected":self.rejected,
+            "latency_p50_ms":percentile(0.5),
+            "latency_p99_ms":percentile(0.99)
+        }
+
+_hasher=None
+
+def get_password_hasher()->PasswordHasher:
+    global _hasher
+    if _hasher is None:
+        from config import PASSWORD_HASH_WORKERS,PASSWORD_HASH_QUEUE,BCRYPT_ROUNDS
+        _hasher=PasswordHasher(PASSWORD_HASH_WORKERS,PASSWORD_HASH_QUEUE,BCRYPT_ROUNDS)
+    return _hasher
@@ -0,0 +1,110 @@
+import asyncio,logging
+from typing import List,Optional,Tuple
+from sqlalchemy import text,bindparam
+from fastapi.concurrency import run_in_threadpool
+from schema.schemas import Problem
+from agents.examiner_agent import examiner_agent,problems_db
+from controllers.suite_store import prepare_suites
+from controllers.single_flight import SingleFlight
+from config import engine,PROBLEM_BANK_LOW_WATER
+
+_top_ups=set()
+refill_flights=SingleFlight("problem_refills")
+
+def bucket_key(value:str)->str:
+    return " ".join(value.split()).lower()
+
+def create_problem_bank_table():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS problem_bank (
+                id VARCHAR(36) PRIMARY KEY,
+                data_structure VARCHAR(255) NOT NULL,
+                topic VARCHAR(255) NOT NULL,
+                difficulty VARCHAR(32) NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_problem_bank_bucket ON problem_bank (data_structure,topic,difficulty)"
+        ))
+
+def save_problems(data_structure:str,topic:str,problems:List[Problem]):
+    """Persist generated problems into the (data_structure,topic,difficulty) bank and the problem store"""
+    if not problems:
+        return
+    problems_db.set_many((problem.id,problem) for problem in problems)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO problem_bank(id,data_structure,topic,difficulty,payload) VALUES (:id,:data_structure,:topic,:difficulty,:payload)"),
+            [{
+                "id":problem.id,
+                "data_structure":bucket_key(data_structure),
+                "topic":bucket_key(topic),
+                "difficulty":bucket_key(problem.difficulty),
+                "payload":problem.model_dump_json()
+            } for problem in problems]
+        )
+
+def draw_problems(data_structure:str,topic:str,exclude_ids:List[str],limit:int)->Tuple[List[Problem],int]:
+    """
+    Sample up to limit problems from the bank that are not in exclude_ids.
+    Returns the sample and how many unseen problems are left in the bucket after it.
+    """
+    params={"data_structure":bucket_key(data_structure),"topic":bucket_key(topic),"exclude":list(exclude_ids),"limit":limit}
+    where="data_structure = :data_structure AND topic = :topic AND id NOT IN :exclude"
+    with engine.begin() as conn:
+        rows=conn.execute(
+            text(f"SELECT payload FROM problem_bank WHERE {where} ORDER BY random() LIMIT :limit").bindparams(bindparam("exclude",expanding=True)),
+            params
+        ).fetchall()
+        unseen=conn.execute(
+            text(f"SELECT COUNT(*) FROM problem_bank WHERE {where}").bindparams(bindparam("exclude",expanding=True)),
+            params
+        ).scalar()
+    problems=[Problem.model_validate_json(row.payload) for row in rows]
+    problems_db.set_many((problem.id,problem) for problem in problems)
+    return problems,unseen-len(problems)
+
+def find_problem(problem_id:str)->Optional[Problem]:
+    """Look a problem up in memory first, then in the bank"""
+    problem=problems_db.get(problem_id)
+    if problem:
+        return problem
+    with engine.begin() as conn:
+        row=conn.execute(text("SELECT payload FROM problem_bank WHERE id=:id"),{"id":problem_id}).fetchone()
+    if not row:
+        return None
+    problem=Problem.model_validate_json(row.payload)
+    problems_db[problem.id]=problem
+    return problem
+
+async def generate_batch(data_structure:str,topic:str)->List[Problem]:
+    problems=await examiner_agent(data_structure,topic)
+    await run_in_threadpool(save_problems,data_structure,topic,problems)
+    prepare_suites(problems)
+    return problems
+
+async def refill_bucket(data_structure:str,topic:str)->List[Problem]:
+    """
+    Generate a fresh batch with the examiner agent and add it to the bank.
+    Concurrent refills of the same bucket (including a background top-up) share one generation.
+    """
+    key=(bucket_key(data_structure),bucket_key(topic))
+    return await refill_flights.do(key,generate_batch,data_structure,topic)
+
+def schedule_top_up(data_structure:str,topic:str,remaining:int):
+    """Top a bucket up in the background once it runs low, at most one refill per bucket at a time"""
+    if remaining>=PROBLEM_BANK_LOW_WATER:
+        return
+    key=(bucket_key(data_structure),bucket_key(topic))
+    if refill_flights.in_flight(key):
+        return
+    task=asyncio.create_task(refill_bucket(data_structure,topic))
+    _top_ups.add(task)
+    def _done(finished):
+        _top_ups.discard(task)
+        if not finished.cancelled() and finished.exception():
+            logging.error(f"Problem bank top-up failed for {key}: {finished.exception()}")
+    task.add_done_callback(_done)
@@ -1,5 +1,7 @@
+import base64,json,uuid
 from config import engine
-from sqlalchemy import text
+from sqlalchemy import text,bindparam
+from controllers.user_activity import ensure_migrated
 from fastapi import HTTPException
 def get_profile(current_user):
     """
@@ -14,32 +16,111 @@ def get_profile(current_user):
         "profile": current_user.profile  
     }
 
-def get_my_concepts(current_user):
+MAX_CONCEPTS_PAGE=100
+_FIRST_PAGE=text("""
+    SELECT item_id, created_at FROM user_activity
+    WHERE user_id = :user_id AND kind = 'learned_concepts'
+    ORDER BY created_at DESC, item_id DESC
+    LIMIT :limit
+""")
+_NEXT_PAGE=text("""
+    SELECT item_id, created_at FROM user_activity
+    WHERE user_id = :user_id AND kind = 'learned_concepts'
+    AND (created_at < :c_created OR (created_at = :c_created AND item_id < :c_id))
+    ORDER BY created_at DESC, item_id DESC
+    LIMIT :limit
+""")
+
+def encode_cursor(created_at,concept_id)->str:
+    raw=json.dumps([created_at.isoformat() if hasattr(created_at,"isoformat") else created_at,str(concept_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor:str):
+    try:
+        raw=base64.urlsafe_b64decode(cursor+"="*(-len(cursor)%4)).decode()
+        created_at,concept_id=json.loads(raw)
+        return created_at,str(concept_id)
+    except (ValueError,TypeError):
+        raise HTTPException(status_code=400,detail="Invalid cursor")
+
+def _concept_ids(ids):
+    # explanation ids are UUIDs; anything else in a legacy learned_concepts list cannot match a row
+    valid=[]
+    for concept_id in ids:
+        try:
+            valid.append(str(uuid.UUID(str(concept_id))))
+        except ValueError:
+            pass
+    return valid
+
+def get_my_concepts(current_user,limit:int=20,cursor:str=None):
     """
-    Fetch all DSA concepts/explanations created by the logged-in user.
+    Page through the user's learned_concepts (every explanation they generated or were served),
+    most recently learned first. The page is a keyset scan of the user_activity index on
+    (user_id,kind,created_at,item_id); only its explanations are then fetched, by primary key.
+    Only the summary columns are returned; next_cursor continues from the last entry.
     """
+    limit=max(1,min(limit,MAX_CONCEPTS_PAGE))
+    params={"user_id":str(current_user.id),"limit":limit+1}
+    query=_FIRST_PAGE
+    if cursor:
+        params["c_created"],params["c_id"]=decode_cursor(cursor)
+        query=_NEXT_PAGE
     try:
+        ensure_migrated(current_user.id)
         with engine.begin() as conn:
-            response=conn.execute(
+            page=conn.execute(query,params).fetchall()
+            ids=_concept_ids(row.item_id for row in page[:limit])
+            rows={}
+            if ids:
+                rows={str(row.id):row for row in conn.execute(
+                    text("SELECT id, title, language, difficulty, created_at, updated_at FROM dsa_explanations WHERE id IN :ids").bindparams(bindparam("ids",expanding=True)),
+                    {"ids":ids}
+                )}
+    except Exception as e:
+        raise HTTPException(status_code=400,detail=str(e))
+    concepts=[{
+        "id":str(row.id),
+        "title":row.title,
+        "language": row.language,
+        "difficulty": row.difficulty,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at
+    } for row in (rows.get(concept_id) for concept_id in ids) if row is not None]
+    next_cursor=encode_cursor(page[limit-1].created_at,page[limit-1].item_id) if len(page)>limit else None
+    return {"user_id":str(current_user.id),"concepts":concepts,"next_cursor":next_cursor}
+
+def get_my_concept(current_user,concept_id:str):
+    """
+    Full content of one explanation, if the user created it or has it in learned_concepts.
+    """
+    try:
+        concept_id=str(uuid.UUID(concept_id))
+    except ValueError:
+        raise HTTPException(status_code=404,detail=f"Concept {concept_id} not found")
+    try:
+        with engine.begin() as conn:
+            row=conn.execute(
                 text("""
                     SELECT id, title, content, markdown_content, language, difficulty, created_at, updated_at
                     FROM dsa_explanations
-                    WHERE user_id = :user_id
-                    ORDER BY created_at DESC
-                """),{"user_id":current_user.id}
-            ).fetchall()
-            concepts=[]
-            for row in response:
-                concepts.append({
-                    "id":str(row.id),
-                    "title":row.title,
-                    "content":row.content,
-                    "markdown_content":row.markdown_content,
-                    "language": row.language,
-                    "difficulty": row.difficulty,
-                    "created_at": row.created_at,
-                    "updated_at": row.updated_at
-                })
-            return {"user_id":str(current_user.id),"concepts":concepts}
+                    WHERE id = :concept_id AND (user_id = :user_id OR EXISTS (
+                        SELECT 1 FROM user_activity
+                        WHERE user_id = :activity_user AND kind = 'learned_concepts' AND item_id = :concept_id
+                    ))
+                """),{"concept_id":concept_id,"user_id":current_user.id,"activity_user":str(current_user.id)}
+            ).fetchone()
     except Exception as e:
         raise HTTPException(status_code=400,detail=str(e))
+    if not row:
+        raise HTTPException(status_code=404,detail=f"Concept {concept_id} not found")
+    return {
+        "id":str(row.id),
+        "title":row.title,
+        "content":row.content,
+        "markdown_content":row.markdown_content,
+        "language": row.language,
+        "difficulty": row.difficulty,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at
+    }
@@ -0,0 +1,49 @@
+import hashlib,json
+from typing import List,Optional
+from sqlalchemy import text
+from schema.schemas import QuizRequest,QuizResponse
+from agents.quiz_agent import quizzes_db
+from config import engine
+
+def quiz_key(request:QuizRequest)->tuple:
+    """Requests that differ only in case or spacing ask for the same quiz"""
+    normalize=lambda value:" ".join(str(value).split()).lower()
+    return (normalize(request.topic),normalize(request.subtopic),normalize(request.difficulty),
+            normalize(request.language),request.num_questions)
+
+def quiz_bucket(request:QuizRequest)->str:
+    return hashlib.sha256(json.dumps(quiz_key(request)).encode()).hexdigest()
+
+def create_quiz_bank_table():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS quiz_bank (
+                id VARCHAR(255) PRIMARY KEY,
+                bucket VARCHAR(64) NOT NULL,
+                payload TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_quiz_bank_bucket ON quiz_bank (bucket)"))
+
+def save_quizzes(request:QuizRequest,quizzes:List[QuizResponse]):
+    """Bank pre-generated quizzes under the normalized request they answer"""
+    if not quizzes:
+        return
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO quiz_bank(id,bucket,payload) VALUES (:id,:bucket,:payload)"),
+            [{"id":quiz.quiz_id,"bucket":quiz_bucket(request),"payload":quiz.model_dump_json()} for quiz in quizzes]
+        )
+
+def draw_quiz(request:QuizRequest)->Optional[QuizResponse]:
+    """A random banked quiz for the request, also put in the quiz store so it can be evaluated"""
+    with engine.begin() as conn:
+        row=conn.execute(
+            text("SELECT payload FROM quiz_bank WHERE bucket=:bucket ORDER BY random() LIMIT 1"),{"bucket":quiz_bucket(request)}
+        ).fetchone()
+    if not row:
+        return None
+    quiz=QuizResponse.model_validate_json(row.payload)
+    quizzes_db.set(quiz.quiz_id,quiz)
+    return quiz
@@ -1,26 +1,78 @@
-from agents.quiz_agent import generate_quiz, evaluate_quizzes_with_agent, quizzes_db
-from schema.schemas import QuizRequest, EvaluationRequest
+from agents.quiz_agent import generate_quiz, evaluate_quizzes_with_agent, quizzes_db, stream_quiz, quiz_details
+from schema.schemas import QuizRequest, EvaluationRequest, QuizResponse
 from fastapi import HTTPException
-from fastapi.responses import JSONResponse
-from controllers.auth import get_current_user
+from fastapi.responses import JSONResponse, StreamingResponse
+from controllers.streaming import ndjson_line, NDJSON_MEDIA_TYPE
+from controllers.auth import get_current_user, invalidate_user
+from controllers.user_activity import record_activity
+from fastapi.concurrency import run_in_threadpool
+from controllers.single_flight import SingleFlight
+from controllers.generation_jobs import job_runner
+from controllers.quiz_bank import quiz_key, draw_quiz
 
-def generate_quizes(request: QuizRequest,current_user):
-    """Generate a new quiz and store it in memory."""
+quiz_flights = SingleFlight("quizzes")
+
+
+async def produce_quiz(request: QuizRequest):
+    quiz = await generate_quiz(request)
+    await run_in_threadpool(quizzes_db.set, quiz.quiz_id, quiz)
+    return quiz
+
+@job_runner("quizzes")
+async def generate_quizes(request: QuizRequest,current_user):
+    """
+    Serve a pre-generated quiz from the quiz bank when there is one, otherwise generate a new quiz
+    and keep it in the quiz store; identical concurrent requests share one generation.
+    """
     try:
-        quiz = generate_quiz(request)
-        quizzes_db[quiz.quiz_id] = quiz
-        return quiz
+        banked = await run_in_threadpool(draw_quiz, request)
+        if banked:
+            return banked
+        return await quiz_flights.do(quiz_key(request), produce_quiz, request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating quiz: {str(e)}")
 
 
-def evaluate_quiz(quiz_id: str, request: EvaluationRequest,current_user):
+async def quiz_lines(request: QuizRequest):
+    """NDJSON body for a streamed quiz: quiz details, one line per question, then a done line."""
+    try:
+        banked = await run_in_threadpool(draw_quiz, request)
+    except Exception as e:
+        yield ndjson_line({"type": "error", "detail": f"Error generating quiz: {str(e)}"})
+        return
+    if banked:
+        yield ndjson_line({"type": "quiz", **banked.model_dump(exclude={"questions"})})
+        for question in banked.questions:
+            yield ndjson_line({"type": "question", "question": question})
+        yield ndjson_line({"type": "done", "quiz_id": banked.quiz_id, "total_questions": len(banked.questions)})
+        return
+    details = quiz_details(request)
+    yield ndjson_line({"type": "quiz", **details})
+    questions = []
+    try:
+        async for question in stream_quiz(request):
+            questions.append(question)
+            yield ndjson_line({"type": "question", "question": question})
+        if not questions:
+            raise Exception("No valid questions in AI response")
+        quiz = QuizResponse(**details, questions=questions)
+        await run_in_threadpool(quizzes_db.set, quiz.quiz_id, quiz)
+        yield ndjson_line({"type": "done", "quiz_id": quiz.quiz_id, "total_questions": len(questions)})
+    except Exception as e:
+        yield ndjson_line({"type": "error", "detail": f"Error generating quiz: {str(e)}"})
+
+
+def stream_quizes(request: QuizRequest, current_user):
+    """Generate a quiz and push its questions to the client as they are produced."""
+    return StreamingResponse(quiz_lines(request), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def evaluate_quiz(quiz_id: str, request: EvaluationRequest,current_user):
     """Evaluate answers for a specific quiz."""
     try:
-        if quiz_id not in quizzes_db:
+        if not await run_in_threadpool(quizzes_db.__contains__, quiz_id):
             raise HTTPException(status_code=404, detail="Quiz not found")
 
-        quiz = quizzes_db[quiz_id]
         answers = {}
         for k, v in request.answers.items():
             try:
@@ -31,7 +83,9 @@ def evaluate_quiz(quiz_id: str, request: EvaluationRequest,current_user):
                     status_code=422,
                     detail=f"Invalid answer key type: '{k}'. Keys must match Question.id as integers."
                 )
-        result = evaluate_quizzes_with_agent(quiz_id, answers)
+        result = await evaluate_quizzes_with_agent(quiz_id, answers)
+        await run_in_threadpool(record_activity, current_user.id, "quizzes_solved", quiz_id)
+        invalidate_user(current_user.id)
         return result
     except HTTPException:
         raise
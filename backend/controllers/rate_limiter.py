@@ -0,0 +1,64 @@
+import asyncio,time
+
+class TokenBucket:
+    """Bucket of capacity tokens refilled continuously over per_seconds"""
+    def __init__(self,capacity:float,per_seconds:float=60):
+        self.capacity=capacity
+        self.rate=capacity/per_seconds
+        self.tokens=capacity
+        self.updated=time.monotonic()
+
+    def _refill(self):
+        now=time.monotonic()
+        self.tokens=min(self.capacity,self.tokens+(now-self.updated)*self.rate)
+        self.updated=now
+
+    def wait_time(self,amount:float)->float:
+        self._refill()
+        return 0 if self.tokens>=amount else (amount-self.tokens)/self.rate
+
+    def take(self,amount:float):
+        self._refill()
+        self.tokens-=amount
+
+    def give_back(self,amount:float):
+        self._refill()
+        self.tokens=min(self.capacity,self.tokens+amount)
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budget shared by every LLM call in the process.
+    Waiters are served in arrival order; a limit of 0 disables that bucket.
+    """
+    def __init__(self,rpm:int,tpm:int):
+        self.requests=TokenBucket(rpm) if rpm>0 else None
+        self.tokens=TokenBucket(tpm) if tpm>0 else None
+        self._lock=asyncio.Lock()
+
+    async def acquire(self,tokens:int)->int:
+        """Wait until one request and tokens tokens fit in the budget, returns the tokens reserved"""
+        if self.tokens:
+            tokens=min(tokens,self.tokens.capacity)
+        async with self._lock:
+            while True:
+                wait=max(
+                    self.requests.wait_time(1) if self.requests else 0,
+                    self.tokens.wait_time(tokens) if self.tokens else 0
+                )
+                if wait<=0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+        return tokens
+
+    def settle(self,reserved:int,used:int):
+        """Return the unused part of a reservation once the provider reports actual usage"""
+        if self.tokens and used is not None and used<reserved:
+            self.tokens.give_back(reserved-used)
+
+def estimate_tokens(prompt:str,max_tokens:int)->int:
+    """Rough prompt size (~4 characters per token) plus the completion allowance"""
+    return len(prompt)//4+max_tokens
@@ -0,0 +1,56 @@
+import hashlib,io,re,tokenize
+from schema.schemas import SolutionRequest
+from controllers.ttl_cache import TTLCache
+from controllers.suite_store import test_suites
+from controllers.sandbox import is_python
+from config import RESULT_CACHE_SIZE,RESULT_CACHE_TTL
+
+_results=TTLCache(maxsize=RESULT_CACHE_SIZE,ttl=RESULT_CACHE_TTL)
+_SKIPPED_TOKENS={tokenize.COMMENT,tokenize.NL,tokenize.ENCODING,tokenize.ENDMARKER}
+_MARKERS={tokenize.NEWLINE:"\n",tokenize.INDENT:"<indent>",tokenize.DEDENT:"<dedent>"}
+# string, char and template literals are matched first so a "//" or "/*" inside them is not a comment
+_C_STYLE_TOKENS=re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`|//[^\n]*|/\*.*?\*/',re.DOTALL)
+
+def normalize_code(code:str,language:str)->str:
+    """
+    Canonical form of a submission: comments and formatting-only whitespace removed, literals untouched.
+    Python is normalized token by token so indentation structure is kept; Python that does not
+    tokenize is hashed as submitted.
+    """
+    if is_python(language):
+        try:
+            tokens=tokenize.generate_tokens(io.StringIO(code).readline)
+            return " ".join(_MARKERS.get(tok.type,tok.string) for tok in tokens if tok.type not in _SKIPPED_TOKENS)
+        except (tokenize.TokenError,IndentationError,SyntaxError):
+            return code
+    parts,last=[],0
+    for match in _C_STYLE_TOKENS.finditer(code):
+        parts.extend(code[last:match.start()].split())
+        if not match.group().startswith("/"):
+            parts.append(match.group())
+        last=match.end()
+    parts.extend(code[last:].split())
+    return " ".join(parts)
+
+def code_hash(code:str,language:str)->str:
+    return hashlib.sha256(normalize_code(code,language).encode()).hexdigest()
+
+def _result_key(kind:str,request:SolutionRequest)->tuple:
+    suite=test_suites.get(request.problem_id)
+    return (kind,request.problem_id,request.language.strip().lower(),code_hash(request.code,request.language),suite.version if suite else None)
+
+async def cached_result(kind:str,request:SolutionRequest,compute):
+    """
+    Return the stored result for the same problem, language and normalized code, or await compute() and store it.
+    The key includes the problem's test suite version so a new suite is never answered from stale results.
+    """
+    result=_results.get(_result_key(kind,request))
+    if result is not None:
+        return result
+    result=await compute()
+    # compute() may have created or replaced the suite, so the key is built from the one it was judged against
+    _results.set(_result_key(kind,request),result)
+    return result
+
+def result_cache_stats()->dict:
+    return _results.stats()
@@ -0,0 +1,411 @@
+import ast,ctypes,io,json,logging,math,os,resource,select,signal,sys,sysconfig,time,traceback,asyncio,multiprocessing
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from typing import List,Optional
+
+# This module is imported inside the sandbox worker processes, keep it free of config/DB/framework
+# imports so workers start fast. Workers are forked from a server started after load_dotenv, so
+# _init_worker wipes the inherited environment. Isolation is enforced by the kernel, not by Python:
+# every run gets fresh mount/pid/net/ipc/uts namespaces, a read-only root holding only the Python
+# installation and system libraries, and an unprivileged uid that cannot create processes. If any
+# of that cannot be set up the submission is not run. The audit hook only turns the commonest
+# blocked calls into readable errors.
+
+MAX_OUTPUT_CHARS=4000
+_LITERAL_NAMES={"null":None,"None":None,"true":True,"True":True,"false":False,"False":False}
+_BLOCKED_EVENTS=(
+    "socket.","subprocess.","os.system","os.exec","os.posix_spawn","os.spawn","os.fork","os.forkpty",
+    "os.kill","os.killpg","os.remove","os.unlink","os.rmdir","os.rename","os.replace","os.chmod","os.chown",
+    "shutil.rmtree","ctypes.","pty.spawn","webbrowser.","urllib.Request","http.client.connect"
+)
+_WRITE_FLAGS=os.O_WRONLY|os.O_RDWR|os.O_APPEND|os.O_CREAT|os.O_TRUNC
+_NAMESPACES=os.CLONE_NEWNS|os.CLONE_NEWPID|os.CLONE_NEWNET|os.CLONE_NEWIPC|os.CLONE_NEWUTS
+# what a submission can see: the Python installation, shared libraries and a few device nodes, read-only
+_VISIBLE=("/usr/lib","/usr/lib64","/lib","/lib64","/etc/ld.so.cache","/dev/null","/dev/urandom",
+          *(sysconfig.get_paths()[key] for key in ("stdlib","platstdlib","purelib","platlib")))
+# the sandbox root is a tmpfs mounted over this directory inside the child's private mount namespace
+_ROOT="/tmp"
+_MS_RDONLY,_MS_NOSUID,_MS_NODEV,_MS_REMOUNT,_MS_BIND,_MS_REC,_MS_PRIVATE=1,2,4,32,4096,16384,1<<18
+_PR_SET_PDEATHSIG,_PR_SET_NO_NEW_PRIVS=1,38
+_libc=ctypes.CDLL(None,use_errno=True)
+_sandbox_uid=65534
+
+class _Literals(ast.NodeTransformer):
+    """Accept JSON spellings (null/true/false) inside otherwise Python-literal example data"""
+    def visit_Name(self,node):
+        if node.id in _LITERAL_NAMES:
+            return ast.copy_location(ast.Constant(_LITERAL_NAMES[node.id]),node)
+        return node
+
+def _literal(node):
+    return ast.literal_eval(_Literals().visit(node))
+
+def parse_call_args(raw:str):
+    """
+    Turn an example input into call arguments. Handles 'nums = [2,7], target = 9',
+    '[2,7], 9' and one argument per line.
+    """
+    text=raw.strip()
+    try:
+        call=ast.parse(f"f({text})",mode="eval").body
+    except SyntaxError:
+        lines=[line.strip().rstrip(",") for line in text.splitlines() if line.strip()]
+        call=ast.parse(f"f({', '.join(lines)})",mode="eval").body
+    return [_literal(arg) for arg in call.args],{kw.arg:_literal(kw.value) for kw in call.keywords}
+
+def parse_value(raw:str):
+    """Parse an expected output as a literal, falling back to the stripped string"""
+    text=raw.strip()
+    try:
+        return _literal(ast.parse(text,mode="eval").body)
+    except (SyntaxError,ValueError,TypeError):
+        return text
+
+def _canonical(value):
+    if isinstance(value,tuple):
+        return [_canonical(v) for v in value]
+    if isinstance(value,list):
+        return [_canonical(v) for v in value]
+    if isinstance(value,dict):
+        return {str(k):_canonical(v) for k,v in value.items()}
+    if isinstance(value,set):
+        return sorted((_canonical(v) for v in value),key=repr)
+    return value
+
+def values_match(expected,actual)->bool:
+    expected,actual=_canonical(expected),_canonical(actual)
+    if isinstance(expected,bool) or isinstance(actual,bool):
+        return expected==actual
+    if isinstance(expected,(int,float)) and isinstance(actual,(int,float)):
+        return math.isclose(expected,actual,rel_tol=1e-6,abs_tol=1e-9)
+    if isinstance(expected,list) and isinstance(actual,list):
+        return len(expected)==len(actual) and all(values_match(e,a) for e,a in zip(expected,actual))
+    if isinstance(expected,dict) and isinstance(actual,dict):
+        return expected.keys()==actual.keys() and all(values_match(expected[k],actual[k]) for k in expected)
+    if isinstance(expected,str) or isinstance(actual,str):
+        return _squash(expected)==_squash(actual)
+    return expected==actual
+
+def _squash(value)->str:
+    text=value if isinstance(value,str) else format_value(value)
+    return "".join(text.split()).strip("\"'")
+
+def format_value(value)->str:
+    if isinstance(value,str):
+        return value[:MAX_OUTPUT_CHARS]
+    try:
+        text=json.dumps(_canonical(value))
+    except (TypeError,ValueError):
+        text=repr(value)
+    return text[:MAX_OUTPUT_CHARS]
+
+def find_entry(code:str,starter_code:Optional[str]=None)->Optional[tuple]:
+    """
+    Pick the function to call: the one named in the starter code if the submission defines it,
+    otherwise the first public Solution method or top-level function. None means a stdin script.
+    """
+    def entries(source):
+        try:
+            tree=ast.parse(source or "")
+        except SyntaxError:
+            return []
+        found=[]
+        for node in tree.body:
+            if isinstance(node,ast.ClassDef) and node.name=="Solution":
+                found+=[("Solution",item.name) for item in node.body
+                        if isinstance(item,(ast.FunctionDef,ast.AsyncFunctionDef)) and not item.name.startswith("_")]
+            elif isinstance(node,ast.FunctionDef) and not node.name.startswith("_"):
+                found.append((None,node.name))
+        return found
+    submitted=entries(code)
+    for entry in entries(starter_code):
+        if entry in submitted:
+            return entry
+    return submitted[0] if submitted else None
+
+def _audit(event,args):
+    if event.startswith(_BLOCKED_EVENTS):
+        raise PermissionError(f"{event} is not allowed in the sandbox")
+    if event=="open" and len(args)>2:
+        mode,flags=args[1],args[2]
+        if (isinstance(mode,str) and any(c in mode for c in "wax+")) or (isinstance(flags,int) and flags&_WRITE_FLAGS):
+            raise PermissionError("Writing files is not allowed in the sandbox")
+
+def _init_worker(uid:int=65534):
+    """Pool initializer: drop the credentials inherited from the app and remember who submissions run as"""
+    global _sandbox_uid
+    os.environ.clear()
+    _sandbox_uid=uid
+
+def _check(result:int,what:str):
+    if result!=0:
+        error=ctypes.get_errno()
+        raise OSError(error,f"{what}: {os.strerror(error)}")
+
+def _mount(source,target:str,fstype,flags:int,data=None):
+    encode=lambda value:value.encode() if value else None
+    _check(_libc.mount(encode(source),encode(target),encode(fstype),ctypes.c_ulong(flags),encode(data)),f"mount {target}")
+
+def _visible_paths()->list:
+    paths=sorted({os.path.realpath(path) for path in _VISIBLE if os.path.exists(path)})
+    # nested paths come along with their parent's bind mount
+    return [path for path in paths if not any(path.startswith(parent+os.sep) for parent in paths if parent!=path)]
+
+def _build_root():
+    """A read-only tmpfs root with bind mounts of _VISIBLE; symlinked top-level dirs (/lib -> usr/lib) are kept"""
+    _mount(None,"/",None,_MS_REC|_MS_PRIVATE)
+    _mount("tmpfs",_ROOT,"tmpfs",_MS_NOSUID|_MS_NODEV,"size=1m,mode=755")
+    for path in _visible_paths():
+        target=_ROOT+path
+        if os.path.isdir(path):
+            os.makedirs(target,exist_ok=True)
+        else:
+            os.makedirs(os.path.dirname(target),exist_ok=True)
+            os.close(os.open(target,os.O_CREAT|os.O_WRONLY,0o644))
+        _mount(path,target,None,_MS_BIND|_MS_REC)
+        _mount(None,target,None,_MS_BIND|_MS_REMOUNT|_MS_RDONLY|_MS_NOSUID)
+    for link in ("/lib","/lib64","/lib32"):
+        if os.path.islink(link) and not os.path.lexists(_ROOT+link):
+            os.symlink(os.readlink(link),_ROOT+link)
+    os.mkdir(_ROOT+"/work",0o755)
+    os.chroot(_ROOT)
+    os.chdir("/work")
+    _mount(None,"/",None,_MS_REMOUNT|_MS_RDONLY|_MS_NOSUID|_MS_NODEV)
+
+def _confine(keep_fd:int):
+    """
+    Runs as pid 1 of the child's fresh namespaces: die with the parent, keep no inherited descriptors
+    but keep_fd, see only the sandbox root, and become an unprivileged uid that cannot fork or exec setuid.
+    """
+    _check(_libc.prctl(_PR_SET_PDEATHSIG,signal.SIGKILL,0,0,0),"prctl(PDEATHSIG)")
+    null=os.open("/dev/null",os.O_RDWR)
+    for fd in (0,1,2):
+        os.dup2(null,fd)
+    os.closerange(3,keep_fd)
+    os.closerange(keep_fd+1,resource.getrlimit(resource.RLIMIT_NOFILE)[0])
+    _build_root()
+    resource.setrlimit(resource.RLIMIT_NPROC,(0,0))
+    os.setgroups([])
+    os.setresgid(_sandbox_uid,_sandbox_uid,_sandbox_uid)
+    os.setresuid(_sandbox_uid,_sandbox_uid,_sandbox_uid)
+    _check(_libc.prctl(_PR_SET_NO_NEW_PRIVS,1,0,0,0),"prctl(NO_NEW_PRIVS)")
+    if 0 in (os.getuid(),os.geteuid(),os.getgid(),os.getegid()):
+        raise PermissionError("still running as root")
+
+def apply_limits(limits:dict):
+    cpu=int(limits["cpu_seconds"])
+    memory=int(limits["memory_mb"])*1024*1024
+    resource.setrlimit(resource.RLIMIT_CPU,(cpu,cpu+1))
+    resource.setrlimit(resource.RLIMIT_AS,(memory,memory))
+    resource.setrlimit(resource.RLIMIT_FSIZE,(0,0))
+    os.environ.clear()
+    sys.addaudithook(_audit)
+
+def load_target(code:str,entry:tuple):
+    """Execute the submission's definitions and return the function (or bound Solution method) to call"""
+    namespace={"__name__":"__solution__"}
+    exec(compile(code,"<solution>","exec"),namespace)
+    owner,name=entry
+    return getattr(namespace[owner](),name) if owner else namespace[name]
+
+def _execute(code:str,entry,case:dict,limits:dict)->dict:
+    """Runs in the forked child: execute the submission on one case and compare the result"""
+    apply_limits(limits)
+    stdout=io.StringIO()
+    result,args,kwargs=None,[],{}
+    try:
+        with redirect_stdout(stdout):
+            if entry is None:
+                sys.stdin=io.StringIO(case["input"])
+                exec(compile(code,"<solution>","exec"),{"__name__":"__main__"})
+            else:
+                try:
+                    args,kwargs=parse_call_args(case["input"])
+                except (SyntaxError,ValueError,TypeError):
+                    return {"passed":None,"error":"Could not parse the test input into arguments"}
+                result=load_target(code,entry)(*args,**kwargs)
+    except BaseException as e:
+        tb=traceback.format_exception(type(e),e,e.__traceback__)
+        return {
+            "passed":False,
+            "actual_output":"",
+            "stdout":stdout.getvalue()[:MAX_OUTPUT_CHARS],
+            "error":"".join(line for line in tb if "<solution>" in line or line is tb[-1])[-MAX_OUTPUT_CHARS:],
+            "error_type":type(e).__name__
+        }
+    printed=stdout.getvalue()
+    if result is None and printed.strip():
+        result=printed.strip()
+    elif result is None and (args or kwargs) and (case.get("expected_output") or "").strip() not in ("","None","null"):
+        # in-place problems ("modify nums, return nothing") are judged on the first argument
+        result=args[0] if args else next(iter(kwargs.values()))
+    expected=case.get("expected_output")
+    return {
+        "passed":None if expected is None else values_match(parse_value(expected),result),
+        "actual_output":format_value(result),
+        "stdout":printed[:MAX_OUTPUT_CHARS],
+        "error":None
+    }
+
+def _read_until(fd:int,deadline:float):
+    chunks=[]
+    while True:
+        remaining=deadline-time.monotonic()
+        if remaining<=0:
+            return b"".join(chunks),True
+        ready,_,_=select.select([fd],[],[],remaining)
+        if not ready:
+            return b"".join(chunks),True
+        chunk=os.read(fd,65536)
+        if not chunk:
+            return b"".join(chunks),False
+        chunks.append(chunk)
+
+def _reply(fd:int,payload:dict):
+    try:
+        data=json.dumps(payload).encode()
+    except (TypeError,ValueError):
+        data=json.dumps({"passed":False,"error":"Unserializable result"}).encode()
+    while data:
+        data=data[os.write(fd,data):]
+
+def _run_isolated(target,args:tuple,write_fd:int):
+    """
+    Child side of run_forked, never returns. Fresh namespaces apply to the children of the process that
+    creates them, so target runs in a grandchild (pid 1 of the new pid namespace, killed with this process);
+    this process only waits and exits the way the grandchild did.
+    """
+    try:
+        os.unshare(_NAMESPACES)
+        pid=os.fork()
+    except BaseException as e:
+        _reply(write_fd,_isolation_error(e))
+        os._exit(0)
+    if pid==0:
+        try:
+            _confine(write_fd)
+        except BaseException as e:
+            _reply(write_fd,_isolation_error(e))
+            os._exit(0)
+        try:
+            payload=target(*args)
+        except BaseException as e:
+            payload={"passed":False,"error":f"{type(e).__name__}: {e}","error_type":type(e).__name__}
+        _reply(write_fd,payload)
+        os._exit(0)
+    os.close(write_fd)
+    _,status=os.waitpid(pid,0)
+    if os.WIFSIGNALED(status):
+        signal.signal(os.WTERMSIG(status),signal.SIG_DFL)
+        os.kill(os.getpid(),os.WTERMSIG(status))
+    os._exit(os.waitstatus_to_exitcode(status))
+
+def _isolation_error(error:BaseException)->dict:
+    # fail closed: without isolation the submission is not run at all
+    return {"passed":False,"error":f"SandboxError: could not isolate the submission ({error})","error_type":"SandboxError"}
+
+def run_forked(target,args:tuple,wall_seconds:float)->tuple:
+    """
+    Run target(*args) in an isolated child (see _run_isolated) and read back the dict it returns.
+    Returns (payload or None, timed_out, exit status, elapsed seconds); the child is killed at wall_seconds.
+    """
+    read_fd,write_fd=os.pipe()
+    pid=os.fork()
+    if pid==0:
+        os.close(read_fd)
+        _run_isolated(target,args,write_fd)
+    os.close(write_fd)
+    started=time.monotonic()
+    data,timed_out=_read_until(read_fd,started+wall_seconds)
+    os.close(read_fd)
+    if timed_out:
+        os.kill(pid,signal.SIGKILL)
+    _,status=os.waitpid(pid,0)
+    return (json.loads(data) if data and not timed_out else None),timed_out,status,time.monotonic()-started
+
+def failure_reason(status:int)->str:
+    killed_by=os.WTERMSIG(status) if os.WIFSIGNALED(status) else None
+    return "CPU time limit exceeded" if killed_by in (signal.SIGXCPU,signal.SIGKILL) else f"process exited with status {status}"
+
+def run_case(code:str,entry,case:dict,limits:dict)->dict:
+    """Fork a child with CPU, memory and wall-clock limits and run one case in it"""
+    payload,timed_out,status,elapsed=run_forked(_execute,(code,entry,case,limits),limits["wall_seconds"])
+    elapsed=round(elapsed*1000,2)
+    if timed_out:
+        outcome={"passed":False,"error":f"TimeoutError: exceeded the {limits['wall_seconds']}s time limit","error_type":"TimeoutError"}
+    elif payload is None:
+        outcome={"passed":False,"error":f"RuntimeError: {failure_reason(status)}","error_type":"RuntimeError"}
+    else:
+        outcome=payload
+    outcome.setdefault("actual_output","")
+    outcome.setdefault("stdout","")
+    outcome["time_ms"]=elapsed
+    return {"input":case["input"],"expected_output":case.get("expected_output"),**outcome}
+
+def run_cases(code:str,entry,cases:List[dict],limits:dict)->List[dict]:
+    """Worker entry point: run every case in its own short-lived child"""
+    return [run_case(code,entry,case,limits) for case in cases]
+
+def is_python(language:str)->bool:
+    return (language or "").strip().lower() in ("python","python3","py")
+
+def case_errors(results:List[dict])->List[dict]:
+    """Errors in the shape checker/test results already use: type, 1-based test_case, message"""
+    return [
+        {"type":case.get("error_type") or "WrongAnswer","test_case":i+1,
+         "message":case.get("error") or f"Expected {case.get('expected_output')} but got {case.get('actual_output')}"}
+        for i,case in enumerate(results) if case.get("passed") is False
+    ]
+
+def _probe(limits:dict)->dict:
+    apply_limits(limits)
+    return {"uid":os.getuid(),"cwd":os.getcwd(),"root":sorted(os.listdir("/"))}
+
+def _ready()->Optional[str]:
+    """Worker warm-up that also proves isolation works; the reason when it does not"""
+    payload,_,status,_=run_forked(_probe,({"cpu_seconds":2,"memory_mb":256},),10)
+    if payload is None:
+        return failure_reason(status)
+    return payload.get("error")
+
+_pool=None
+
+def get_pool()->ProcessPoolExecutor:
+    """Pre-forked workers; they come from a clean forkserver so forking per case is cheap and thread-safe"""
+    global _pool
+    if _pool is None:
+        from config import SANDBOX_WORKERS,SANDBOX_UID
+        _pool=forkserver_pool(SANDBOX_WORKERS,SANDBOX_UID)
+    return _pool
+
+def forkserver_pool(workers:int,uid:int=65534)->ProcessPoolExecutor:
+    """A process pool whose workers are scrubbed by _init_worker before they run anything"""
+    return ProcessPoolExecutor(max_workers=workers,mp_context=multiprocessing.get_context("forkserver"),
+                               initializer=_init_worker,initargs=(uid,))
+
+def start_sandbox():
+    """Start the worker processes up front so the first submission does not pay for it"""
+    pool=get_pool()
+    for future in [pool.submit(_ready) for _ in range(pool._max_workers)]:
+        error=future.result()
+        if error:
+            logging.error(f"Sandbox isolation is unavailable, Python submissions will be rejected: {error}")
+
+def stop_sandbox():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool=None
+
+def sandbox_limits()->dict:
+    from config import SANDBOX_CPU_SECONDS,SANDBOX_MEMORY_MB,SANDBOX_WALL_SECONDS
+    return {"cpu_seconds":SANDBOX_CPU_SECONDS,"memory_mb":SANDBOX_MEMORY_MB,"wall_seconds":SANDBOX_WALL_SECONDS}
+
+async def run_solution(code:str,cases:List[dict],starter_code:Optional[str]=None,limits:Optional[dict]=None)->List[dict]:
+    """
+    Execute a Python submission against cases ({"input","expected_output"}) in the sandbox pool.
+    Each returned case carries passed (None when the input could not be parsed), actual_output, stdout and error.
+    """
+    entry=find_entry(code,starter_code)
+    loop=asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(),run_cases,code,entry,cases,limits or sandbox_limits())
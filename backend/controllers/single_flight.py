@@ -0,0 +1,56 @@
+import asyncio,logging
+from typing import Dict,Hashable,Optional
+
+_groups:Dict[str,"SingleFlight"]={}
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls: while a call for a key is running, callers with the same key
+    await that call's result instead of starting their own.
+    """
+    def __init__(self,name:str):
+        self.name=name
+        self._calls:Dict[Hashable,asyncio.Future]={}
+        self.started=0
+        self.coalesced=0
+        _groups[name]=self
+
+    def in_flight(self,key:Hashable)->bool:
+        return key in self._calls
+
+    def _track(self,key:Hashable,future:asyncio.Future):
+        self._calls[key]=future
+        self.started+=1
+        def _done(finished):
+            if self._calls.get(key) is finished:
+                del self._calls[key]
+            if not finished.cancelled() and finished.exception():
+                logging.warning(f"{self.name} call for {key} failed: {finished.exception()}")
+        future.add_done_callback(_done)
+
+    def lead(self,key:Hashable)->Optional[asyncio.Future]:
+        """
+        Register a call the caller runs itself (e.g. while streaming it) so do() callers join it;
+        the caller must settle the returned future. None when a call for the key is already in flight.
+        """
+        if key in self._calls:
+            return None
+        future=asyncio.get_running_loop().create_future()
+        self._track(key,future)
+        return future
+
+    async def do(self,key:Hashable,fn,*args,**kwargs):
+        future=self._calls.get(key)
+        if future is None:
+            future=asyncio.ensure_future(fn(*args,**kwargs))
+            self._track(key,future)
+        else:
+            self.coalesced+=1
+        # shielded so one caller going away does not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+    def stats(self)->dict:
+        return {"in_flight":len(self._calls),"started":self.started,"coalesced":self.coalesced}
+
+def single_flight_stats()->dict:
+    return {name:group.stats() for name,group in _groups.items()}
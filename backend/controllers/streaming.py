@@ -0,0 +1,14 @@
+import json
+from fastapi.encoders import jsonable_encoder
+
+SSE_HEADERS={"Cache-Control":"no-cache","X-Accel-Buffering":"no"}
+
+def sse_event(data,event:str=None)->str:
+    """Format one server-sent event, JSON-encoding the payload so newlines stay inside a single data line"""
+    message=f"event: {event}\n" if event else ""
+    return message+f"data: {json.dumps(jsonable_encoder(data))}\n\n"
+
+NDJSON_MEDIA_TYPE="application/x-ndjson"
+
+def ndjson_line(data)->str:
+    return json.dumps(jsonable_encoder(data))+"\n"
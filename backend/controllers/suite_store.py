@@ -0,0 +1,200 @@
+import asyncio,json,logging,re,zlib
+from typing import List,Optional
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from fastapi.concurrency import run_in_threadpool
+from schema.schemas import Problem,TestSuite,TestCase
+from controllers.llm_gateway import chat_completion
+from controllers.json_stream import parse_json_objects
+from controllers.sandbox import run_solution,find_entry,MAX_OUTPUT_CHARS
+from controllers.input_synth import InputSpec,format_input
+from controllers.ttl_cache import TTLCache
+from config import engine,TEST_SUITE_SIZE,TEST_SUITE_EAGER,DIFFERENTIAL_CASES,DIFFERENTIAL_MAX_N
+
+PUBLISH_ATTEMPTS=3
+# suites in use, by problem id; evicted ones are reloaded from problem_test_suites
+test_suites=TTLCache(maxsize=2048,ttl=3600)
+_locks={}
+_background=set()
+# problems whose reference solution could not produce cases, so quick runs do not retry on every call
+_underivable=TTLCache(maxsize=10000,ttl=3600)
+# the reference cannot be the oracle when several answers are accepted, or when random inputs
+# would break a promise the statement makes about its inputs
+_NOT_DERIVABLE=re.compile(
+    r"\bany (?:order|one of|of them|valid|possible)\b|\breturn any\b|\b(?:multiple|several) (?:valid |possible |correct )?(?:answers|solutions|outputs)\b"
+    r"|\b(?:exactly|only) one (?:valid )?(?:solution|answer)|\bguaranteed\b|\byou may assume\b",
+    re.I
+)
+
+def create_test_suite_table():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS problem_test_suites (
+                problem_id VARCHAR(36) NOT NULL,
+                version INTEGER NOT NULL,
+                source VARCHAR(32) NOT NULL,
+                cases TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (problem_id,version)
+            )
+        """))
+
+def load_suite(problem_id:str)->Optional[TestSuite]:
+    """Latest stored version of a problem's test suite"""
+    with engine.begin() as conn:
+        row=conn.execute(
+            text("SELECT version,source,cases FROM problem_test_suites WHERE problem_id=:problem_id ORDER BY version DESC LIMIT 1"),
+            {"problem_id":problem_id}
+        ).fetchone()
+    if not row:
+        return None
+    return TestSuite(problem_id=problem_id,version=row.version,source=row.source,cases=json.loads(row.cases))
+
+def publish_suite(problem_id:str,cases:List[TestCase],source:str)->TestSuite:
+    """
+    Store cases as the next version of the problem's suite and make it the one in use.
+    The version is allocated inside the INSERT; if another worker took the same number first, retry.
+    """
+    params={"problem_id":problem_id,"source":source,"cases":json.dumps([c.model_dump() for c in cases])}
+    for attempt in range(PUBLISH_ATTEMPTS):
+        try:
+            with engine.begin() as conn:
+                version=conn.execute(
+                    text("""
+                        INSERT INTO problem_test_suites(problem_id,version,source,cases)
+                        SELECT :problem_id,COALESCE(MAX(version),0)+1,:source,:cases FROM problem_test_suites WHERE problem_id=:problem_id
+                        RETURNING version
+                    """),params
+                ).scalar()
+            break
+        except IntegrityError:
+            if attempt==PUBLISH_ATTEMPTS-1:
+                raise
+    suite=TestSuite(problem_id=problem_id,version=version,source=source,cases=cases)
+    test_suites.set(problem_id,suite)
+    return suite
+
+async def generate_cases(problem:Problem,priority:str="interactive")->List[TestCase]:
+    """Ask the LLM once for diverse test cases in the same input/output format as the examples"""
+    prompt=f"""
+    Generate {TEST_SUITE_SIZE} diverse test cases (including edge cases) for this problem.
+
+    PROBLEM:
+    {problem.description}
+
+    CONSTRAINTS:
+    {json.dumps(problem.constraints)}
+
+    EXAMPLES (use exactly the same input and output format):
+    {json.dumps([{"input":ex.input,"expected_output":ex.expected_output} for ex in problem.examples])}
+
+    REFERENCE SOLUTION:
+    {problem.optimal_solution}
+
+    Return ONLY a JSON array of objects with "input" (string) and "expected_output" (string).
+    """
+    content=await chat_completion(prompt,temperature=0.2,max_tokens=2000,priority=priority,task="test_suite")
+    cases=[]
+    for case in parse_json_objects(content):
+        if "input" in case and "expected_output" in case:
+            cases.append(TestCase(
+                input=case["input"] if isinstance(case["input"],str) else json.dumps(case["input"]),
+                expected_output=case["expected_output"] if isinstance(case["expected_output"],str) else json.dumps(case["expected_output"])
+            ))
+    return cases
+
+async def derive_cases(problem:Problem)->List[TestCase]:
+    """
+    Differential cases: edge-case and random inputs grown from the examples' format and the constraints,
+    with expected outputs computed by running optimal_solution in the sandbox.
+    Empty when the reference is missing, is not callable, or disagrees with the problem's own examples,
+    and for statements that accept several answers or promise something about their inputs.
+    """
+    if _underivable.get(problem.id) or not problem.optimal_solution or not problem.examples:
+        return []
+    if _NOT_DERIVABLE.search(" ".join([problem.description or "",*(problem.constraints or [])])):
+        _underivable.set(problem.id,True)
+        return []
+    if find_entry(problem.optimal_solution,problem.starter_code) is None:
+        return []
+    try:
+        spec=InputSpec(problem.examples[0].input,problem.constraints,problem.description)
+    except (SyntaxError,ValueError,TypeError):
+        return []
+    examples=[{"input":ex.input,"expected_output":ex.expected_output} for ex in problem.examples]
+    # the example expectation also keeps in-place problems ("modify nums") judged on their first argument
+    placeholder=problem.examples[0].expected_output
+    inputs=[{"input":format_input(args,kwargs),"expected_output":placeholder}
+            for args,kwargs in spec.test_inputs(DIFFERENTIAL_CASES,DIFFERENTIAL_MAX_N,seed=zlib.crc32(problem.id.encode()))]
+    results=await run_solution(problem.optimal_solution,[*examples,*inputs],problem.starter_code)
+    if not all(case["passed"] for case in results[:len(examples)]):
+        logging.warning(f"Reference solution of {problem.id} fails its own examples, not deriving test cases")
+        _underivable.set(problem.id,True)
+        return []
+    cases=[
+        TestCase(input=case["input"],expected_output=case["actual_output"])
+        for case in results[len(examples):]
+        if not case.get("error") and case["actual_output"].strip() not in ("","None","null")
+        and len(case["actual_output"])<MAX_OUTPUT_CHARS
+    ]
+    if not cases:
+        _underivable.set(problem.id,True)
+    return cases
+
+async def build_cases(problem:Problem,llm_fallback:bool=True,priority:str="interactive")->tuple:
+    """(cases,source): derived from the reference solution when possible, else invented by the LLM"""
+    try:
+        cases=await derive_cases(problem)
+    except Exception as e:
+        logging.error(f"Differential test generation failed for {problem.id}: {str(e)}")
+        cases=[]
+    if cases or not llm_fallback:
+        return cases,"differential"
+    return await generate_cases(problem,priority),"llm"
+
+async def get_suite(problem:Problem,llm_fallback:bool=True,priority:str="interactive")->Optional[TestSuite]:
+    """
+    The problem's canonical test suite: from memory, then the DB, otherwise generated once.
+    Concurrent first submissions for the same problem share a single generation.
+    With llm_fallback off a missing suite is only built when it can be derived locally.
+    priority is the LLM class used when the suite has to be invented; a submission is waiting by default.
+    """
+    suite=test_suites.get(problem.id)
+    if suite:
+        return suite
+    lock=_locks.setdefault(problem.id,asyncio.Lock())
+    try:
+        async with lock:
+            suite=test_suites.get(problem.id) or await run_in_threadpool(load_suite,problem.id)
+            if suite and suite.source=="llm" and problem.id not in test_suites:
+                # suites stored before differential generation existed are replaced once with ground truth
+                try:
+                    cases=await derive_cases(problem)
+                except Exception as e:
+                    logging.error(f"Differential test generation failed for {problem.id}: {str(e)}")
+                    cases=[]
+                if cases:
+                    suite=await run_in_threadpool(publish_suite,problem.id,cases,"differential")
+            if not suite:
+                try:
+                    cases,source=await build_cases(problem,llm_fallback,priority)
+                except Exception as e:
+                    logging.error(f"Test suite generation failed for {problem.id}: {str(e)}")
+                    return None
+                if not cases:
+                    return None
+                suite=await run_in_threadpool(publish_suite,problem.id,cases,source)
+            test_suites.set(problem.id,suite)
+    finally:
+        # every exit, including the ones without a suite, drops the lock so the next attempt starts fresh
+        _locks.pop(problem.id,None)
+    return suite
+
+def prepare_suites(problems:List[Problem]):
+    """Eagerly build suites in the background for freshly generated problems when TEST_SUITE_EAGER is on"""
+    if not TEST_SUITE_EAGER:
+        return
+    for problem in problems:
+        task=asyncio.create_task(get_suite(problem,priority="bulk"))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
@@ -0,0 +1,61 @@
+import threading,time
+from collections import OrderedDict
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire ttl seconds after being set.
+    """
+    def __init__(self,maxsize:int=1024,ttl:float=300):
+        self.maxsize=maxsize
+        self.ttl=ttl
+        self._data=OrderedDict()
+        self._lock=threading.Lock()
+        self.hits=0
+        self.misses=0
+
+    def get(self,key,default=None):
+        with self._lock:
+            item=self._data.get(key)
+            if item is None:
+                self.misses+=1
+                return default
+            value,expires_at=item
+            if expires_at<time.monotonic():
+                del self._data[key]
+                self.misses+=1
+                return default
+            self._data.move_to_end(key)
+            self.hits+=1
+            return value
+
+    def set(self,key,value):
+        with self._lock:
+            self._data[key]=(value,time.monotonic()+self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data)>self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self,key,default=None):
+        with self._lock:
+            item=self._data.pop(key,None)
+            return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self)->dict:
+        lookups=self.hits+self.misses
+        return {
+            "size":len(self._data),
+            "maxsize":self.maxsize,
+            "hits":self.hits,
+            "misses":self.misses,
+            "hit_rate":round(self.hits/lookups,4) if lookups else 0.0
+        }
+
+    def __contains__(self,key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._data)
@@ -0,0 +1,95 @@
+import json
+from typing import Dict,List
+from sqlalchemy import text
+from config import engine
+
+ACTIVITY_KINDS=("problems_solved","quizzes_solved","saved_problems","saved_quizzes","learned_concepts","saved_documentation")
+MIGRATED_FLAG="activity_migrated"
+_migrated=set()
+
+def create_activity_table():
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS user_activity (
+                user_id VARCHAR(36) NOT NULL,
+                kind VARCHAR(32) NOT NULL,
+                item_id VARCHAR(64) NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (user_id,kind,item_id)
+            )
+        """))
+        # item_id breaks created_at ties, so keyset pages (see get_my_concepts) are read straight off the index
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_user_activity_keyset ON user_activity (user_id,kind,created_at,item_id)"
+        ))
+        conn.execute(text("DROP INDEX IF EXISTS ix_user_activity_recent"))
+
+def _item_id(item)->str:
+    return str(item.get("id") if isinstance(item,dict) else item)
+
+def _parse(profile)->dict:
+    if isinstance(profile,str):
+        profile=json.loads(profile)
+    return dict(profile or {})
+
+_INSERT=text(
+    "INSERT INTO user_activity(user_id,kind,item_id,created_at) VALUES (:user_id,:kind,:item_id,CURRENT_TIMESTAMP) ON CONFLICT DO NOTHING"
+)
+
+def record_activity(user_id,kind:str,item_id,conn=None):
+    """Append one activity entry; re-recording the same item is a no-op, so concurrent writers never lose updates"""
+    params={"user_id":str(user_id),"kind":kind,"item_id":_item_id(item_id)}
+    if conn is not None:
+        conn.execute(_INSERT,params)
+        return
+    with engine.begin() as conn:
+        conn.execute(_INSERT,params)
+
+def ensure_migrated(user_id):
+    """Copy the activity lists of a legacy profile blob into user_activity once per user"""
+    user_id=str(user_id)
+    if user_id in _migrated:
+        return
+    with engine.begin() as conn:
+        profile=_parse(conn.execute(text("SELECT profile FROM users WHERE id=:id"),{"id":user_id}).scalar())
+        if not profile.get(MIGRATED_FLAG):
+            rows=[
+                {"user_id":user_id,"kind":kind,"item_id":_item_id(item)}
+                for kind in ACTIVITY_KINDS for item in profile.get(kind,[])
+            ]
+            if rows:
+                conn.execute(_INSERT,rows)
+            profile[MIGRATED_FLAG]=True
+            conn.execute(text("UPDATE users SET profile=:profile WHERE id=:id"),{"profile":json.dumps(profile),"id":user_id})
+    _migrated.add(user_id)
+
+def load_activity(user_id)->Dict[str,List[str]]:
+    with engine.begin() as conn:
+        rows=conn.execute(
+            text("SELECT kind,item_id FROM user_activity WHERE user_id=:user_id ORDER BY created_at"),{"user_id":str(user_id)}
+        ).fetchall()
+    activity={kind:[] for kind in ACTIVITY_KINDS}
+    for row in rows:
+        activity.setdefault(row.kind,[]).append(row.item_id)
+    return activity
+
+def activity_items(user_id,kind:str)->List[str]:
+    ensure_migrated(user_id)
+    with engine.begin() as conn:
+        return [row.item_id for row in conn.execute(
+            text("SELECT item_id FROM user_activity WHERE user_id=:user_id AND kind=:kind ORDER BY created_at"),
+            {"user_id":str(user_id),"kind":kind}
+        )]
+
+def render_profile(user_id)->dict:
+    """
+    Compatibility view: the profile dict get_profile has always returned,
+    with the activity lists read from user_activity instead of the JSON blob.
+    """
+    ensure_migrated(user_id)
+    with engine.begin() as conn:
+        profile=_parse(conn.execute(text("SELECT profile FROM users WHERE id=:id"),{"id":str(user_id)}).scalar())
+    for key in (*ACTIVITY_KINDS,MIGRATED_FLAG):
+        profile.pop(key,None)
+    profile.update(load_activity(user_id))
+    return profile
@@ -1,16 +1,36 @@
-from fastapi import FastAPI, HTTPException, Depends
+import time
+from typing import Optional
+from fastapi import FastAPI, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
 from schema.schemas import (
     SignupRequest, LoginRequest, ExplainationRequest, ExplainationResponse,
     ProblemRequest, SolutionRequest, QuizRequest, QuizResponse,
-    EvaluationRequest, EvaluationResult
+    EvaluationRequest, EvaluationResult, JobStatus
 )
-from controllers.auth import signup, login, get_current_user
-from controllers.concept_mastery import generate_explaination
-from controllers.code_quest import generate_problems, evaluate_solution
-from controllers.quiz_challenge import generate_quizes, evaluate_quiz
+from controllers.auth import signup, login, get_current_user, user_cache_stats, token_user_id
+from controllers.concept_mastery import generate_explaination, stream_explaination
+from controllers.code_quest import generate_problems, stream_problems, evaluate_solution
+from controllers.quiz_challenge import generate_quizes, stream_quizes, evaluate_quiz
+from controllers.profile_details import get_profile, get_my_concepts, get_my_concept
+from controllers.llm_gateway import close_gateway, scheduler_stats, route_stats
+from controllers.llm_scheduler import current_llm_user
+from controllers.metrics import render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE, http_requests, http_duration
+from controllers.explanation_cache import create_explanation_index, load_concept_index, concept_index
+from controllers.problem_bank import create_problem_bank_table
+from controllers.sandbox import start_sandbox, stop_sandbox
+from controllers.complexity import stop_profiler
+from controllers.password_hasher import get_password_hasher
+from controllers.suite_store import create_test_suite_table
+from controllers.user_activity import create_activity_table
+from controllers.object_store import create_store_table, store_stats
+from controllers.quiz_bank import create_quiz_bank_table
+from controllers.single_flight import single_flight_stats
+from controllers.generation_jobs import create_jobs_table, submit_job, get_job, stream_job, start_job_workers, stop_job_workers, job_stats
+from controllers.result_cache import cached_result, result_cache_stats
 from agents.testing_agent import test_agent
-from config import engine, SessionLocal
+from config import engine
 from sqlalchemy import text
 from dotenv import load_dotenv
 
@@ -27,6 +47,30 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency and status counts, labelled by the route template to keep cardinality bounded"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        http_duration.observe(time.perf_counter() - started, method=request.method, route=route)
+        http_requests.inc(method=request.method, route=route, status=status)
+
+
+@app.middleware("http")
+async def tag_llm_user(request: Request, call_next):
+    """LLM calls made while serving this request are fair-queued under the caller's user id"""
+    user_id = token_user_id(request.headers.get("authorization"))
+    if user_id:
+        current_llm_user.set(user_id)
+    return await call_next(request)
+
+
 @app.on_event("startup")
 def startup_event():
     try:
@@ -34,52 +78,137 @@ def startup_event():
             conn.execute(text("SELECT 1"))
             print("Server running on port 8000")
             print("Database Connected Successfully")
+        create_explanation_index()
+        load_concept_index()
+        create_problem_bank_table()
+        create_test_suite_table()
+        create_activity_table()
+        create_store_table()
+        create_jobs_table()
+        create_quiz_bank_table()
     except Exception as e:
         print("❌ Database connection failed:", e)
+    start_sandbox()
+    get_password_hasher().start()
+    start_job_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await stop_job_workers()
+    await close_gateway()
+    stop_sandbox()
+    stop_profiler()
+    get_password_hasher().stop()
 
 
 @app.post("/signup")
-def signsup(user: SignupRequest):
-    return signup(user)
+async def signsup(user: SignupRequest):
+    return await signup(user)
 
 @app.post("/login")
-def logsin(user: LoginRequest):
-    return login(user)
+async def logsin(user: LoginRequest):
+    return await login(user)
 
 
 @app.post("/api/generate-explaination", response_model=ExplainationResponse)
-def explains_concept(request: ExplainationRequest, current_user=Depends(get_current_user)):
-    return generate_explaination(request, current_user)
+async def explains_concept(request: ExplainationRequest, current_user=Depends(get_current_user)):
+    return await generate_explaination(request, current_user)
+
+
+@app.post("/api/generate-explaination/stream")
+async def streams_concept(request: ExplainationRequest, current_user=Depends(get_current_user)):
+    return stream_explaination(request, current_user)
 
 
 @app.get("/api/profile")
-def getprofile(user=Depends(get_current_user)):
-    return get_profile(user)
+async def getprofile(user=Depends(get_current_user)):
+    return await run_in_threadpool(get_profile, user)
 
 
 @app.get("/api/my-concepts")
-def get_user_concepts(user=Depends(get_current_user)):
-    return get_my_concepts(user)
+async def get_user_concepts(limit: int = 20, cursor: Optional[str] = None, user=Depends(get_current_user)):
+    return await run_in_threadpool(get_my_concepts, user, limit, cursor)
+
+
+@app.get("/api/my-concepts/{concept_id}")
+async def get_user_concept(concept_id: str, user=Depends(get_current_user)):
+    return await run_in_threadpool(get_my_concept, user, concept_id)
 
 
 @app.post("/api/generate-problems")
-def get_problems(request: ProblemRequest, user=Depends(get_current_user)):
-    return generate_problems(request, user)
+async def get_problems(request: ProblemRequest, user=Depends(get_current_user)):
+    return await generate_problems(request, user)
+
+
+@app.post("/api/generate-problems/stream")
+async def streams_problems(request: ProblemRequest, user=Depends(get_current_user)):
+    return stream_problems(request, user)
 
 
 @app.post("/api/evaluate-solution")
-def evaluate_the_solution(request: SolutionRequest, user=Depends(get_current_user)):
-    return evaluate_solution(request, user)
+async def evaluate_the_solution(request: SolutionRequest, user=Depends(get_current_user)):
+    return await evaluate_solution(request, user)
 
 
 @app.post("/api/run-tests")
-def run_tests_on_problem(request: SolutionRequest, user=Depends(get_current_user)):
-    return test_agent(request, user)
+async def run_tests_on_problem(request: SolutionRequest, user=Depends(get_current_user)):
+    return await cached_result("run-tests", request, lambda: test_agent(request, user))
 
 @app.post("/api/generate-quizzes", response_model=QuizResponse)
-def generates_quizzes(request: QuizRequest, user=Depends(get_current_user)):
-    return generate_quizes(request, user)
+async def generates_quizzes(request: QuizRequest, user=Depends(get_current_user)):
+    return await generate_quizes(request, user)
+
+@app.post("/api/generate-quizzes/stream")
+async def streams_quizzes(request: QuizRequest, user=Depends(get_current_user)):
+    return stream_quizes(request, user)
+
+
+@app.post("/api/jobs/explanations", response_model=JobStatus, status_code=202)
+async def queues_explanation(request: ExplainationRequest, user=Depends(get_current_user), idempotency_key: Optional[str] = Header(None)):
+    return await submit_job("explanations", request, user, idempotency_key)
+
+
+@app.post("/api/jobs/problems", response_model=JobStatus, status_code=202)
+async def queues_problems(request: ProblemRequest, user=Depends(get_current_user), idempotency_key: Optional[str] = Header(None)):
+    return await submit_job("problems", request, user, idempotency_key)
+
+
+@app.post("/api/jobs/quizzes", response_model=JobStatus, status_code=202)
+async def queues_quiz(request: QuizRequest, user=Depends(get_current_user), idempotency_key: Optional[str] = Header(None)):
+    return await submit_job("quizzes", request, user, idempotency_key)
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job_status(job_id: str, user=Depends(get_current_user)):
+    return await get_job(job_id, user)
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def streams_job(job_id: str, user=Depends(get_current_user)):
+    return stream_job(job_id, user)
 
 @app.post("/api/evaluate-quiz/{quiz_id}", response_model=EvaluationResult)
-def evaluates_quiz(quiz_id: str, request: EvaluationRequest, user=Depends(get_current_user)):
-    return evaluate_quiz(quiz_id, request, user)
+async def evaluates_quiz(quiz_id: str, request: EvaluationRequest, user=Depends(get_current_user)):
+    return await evaluate_quiz(quiz_id, request, user)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    # store gauges may count rows in the shared store, so render off the event loop
+    return Response(await run_in_threadpool(render_metrics), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/api/stats")
+async def get_stats(current_user=Depends(get_current_user)):
+    return {
+        "result_cache": result_cache_stats(),
+        "user_cache": user_cache_stats(),
+        "password_hasher": get_password_hasher().stats(),
+        "stores": await run_in_threadpool(store_stats),
+        "single_flight": single_flight_stats(),
+        "jobs": job_stats(),
+        "llm_scheduler": scheduler_stats(),
+        "llm_routes": route_stats(),
+        "concept_index": concept_index.stats()
+    }
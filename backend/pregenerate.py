@@ -0,0 +1,241 @@
+"""
+Pre-generate explanations, problem sets and quizzes for a whole curriculum before term start.
+
+    python pregenerate.py curriculum.json --owner-email admin@example.com --concurrency 8
+
+Every item of the manifest's cross product is generated once, validated against the schema models and
+bulk-inserted in batches. Finished items are recorded in a checkpoint file next to the manifest, so a
+killed run skips them when started again. LLM calls go through the gateway, so GROQ_RPM/GROQ_TPM and
+LLM_MAX_CONCURRENCY bound the run the same way they bound the API.
+"""
+import argparse,asyncio,json,logging,os,sys,time
+from fastapi.concurrency import run_in_threadpool
+from schema.schemas import ExplainationRequest,ExplainationResponse,ProblemRequest,QuizRequest,QuizResponse,Problem
+from agents.teacher_agent import teacher_agent
+from agents.examiner_agent import examiner_agent
+from agents.quiz_agent import generate_quiz
+from controllers.auth import find_login_user
+from controllers.concept_mastery import save_explainations
+from controllers.explanation_cache import lookup_explaination,is_cacheable,create_explanation_index,load_concept_index
+from controllers.problem_bank import save_problems,create_problem_bank_table
+from controllers.quiz_bank import save_quizzes,create_quiz_bank_table
+from controllers.llm_gateway import close_gateway
+from controllers.llm_scheduler import current_llm_user
+
+TARGETS=("explanations","problems","quizzes")
+FLUSH_ATTEMPTS=3
+EXAMPLE_MANIFEST={
+    "targets":["explanations","problems","quizzes"],
+    "languages":["python"],
+    "difficulties":["beginner","intermediate"],
+    "quiz_difficulties":["easy","medium"],
+    "quiz_questions":10,
+    "quiz_variants":2,
+    "problem_batches":1,
+    "curriculum":[
+        {"data_structure":"Heap","topics":["Heapify","Top K elements"],"concepts":["Heap","Priority Queue"]}
+    ]
+}
+
+def plan_items(manifest:dict)->list:
+    """Expand the manifest into (key,kind,request) items; the key identifies an item across runs"""
+    targets=manifest.get("targets",TARGETS)
+    languages=manifest.get("languages",["python"])
+    items=[]
+    for entry in manifest["curriculum"]:
+        data_structure=entry["data_structure"]
+        topics=entry.get("topics",[])
+        if "explanations" in targets:
+            for concept in entry.get("concepts",[data_structure,*topics]):
+                for language in languages:
+                    for difficulty in manifest.get("difficulties",["beginner"]):
+                        request=ExplainationRequest(concept=concept,language=language,difficulty=difficulty)
+                        items.append((f"explanation|{concept}|{language}|{difficulty}".lower(),"explanations",request))
+        for topic in topics:
+            if "problems" in targets:
+                for batch in range(manifest.get("problem_batches",1)):
+                    items.append((f"problems|{data_structure}|{topic}|{batch}".lower(),"problems",
+                                  ProblemRequest(data_structure=data_structure,topic=topic)))
+            if "quizzes" in targets:
+                for language in languages:
+                    for difficulty in manifest.get("quiz_difficulties",["easy","medium","hard"]):
+                        request=QuizRequest(topic=data_structure,subtopic=topic,difficulty=difficulty,
+                                            language=language,num_questions=manifest.get("quiz_questions",10))
+                        for variant in range(manifest.get("quiz_variants",1)):
+                            items.append((f"quiz|{data_structure}|{topic}|{language}|{difficulty}|{request.num_questions}|{variant}".lower(),
+                                          "quizzes",request))
+    return items
+
+class Checkpoint:
+    """Keys of finished items, rewritten atomically after every flush"""
+    def __init__(self,path:str):
+        self.path=path
+        self.done=set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done=set(json.load(f).get("done",[]))
+
+    def mark(self,keys):
+        self.done.update(keys)
+        tmp=f"{self.path}.tmp"
+        with open(tmp,"w") as f:
+            json.dump({"done":sorted(self.done),"updated_at":time.time()},f)
+        os.replace(tmp,self.path)
+
+async def produce(kind:str,request):
+    """Generate one item and validate it; raises if the output is unusable"""
+    if kind=="explanations":
+        if await run_in_threadpool(lookup_explaination,request.concept,request.language,request.difficulty):
+            return None
+        content=await teacher_agent(request.concept,request.language,request.difficulty)
+        if not is_cacheable(content):
+            raise Exception(content.splitlines()[-1] if content else "Empty explanation")
+        markdown_content=f"# {request.concept}\n\n {content}"
+        ExplainationResponse(title=request.concept,content=content,markdown_content=markdown_content)
+        return {"request":request,"content":content,"markdown_content":markdown_content}
+    if kind=="problems":
+        problems=await examiner_agent(request.data_structure,request.topic)
+        return [Problem.model_validate(problem.model_dump()) for problem in problems]
+    quiz=QuizResponse.model_validate((await generate_quiz(request)).model_dump())
+    if not quiz.questions:
+        raise Exception("Quiz has no questions")
+    return quiz
+
+class Pipeline:
+    def __init__(self,checkpoint:Checkpoint,owner_id,batch_size:int):
+        self.checkpoint=checkpoint
+        self.owner_id=owner_id
+        self.batch_size=batch_size
+        self.pending={kind:[] for kind in TARGETS}
+        self.lock=asyncio.Lock()
+        self.generated=0
+        self.skipped=0
+        self.failed=0
+
+    def _insert(self,kind:str,batch:list,saved:set):
+        """Store the batch; saved collects the keys stored so far, so a retry only stores the rest"""
+        if kind=="explanations":
+            rows=[result for _,_,result in batch if result]
+            if rows:
+                save_explainations(self.owner_id,rows)
+            saved.update(key for key,_,_ in batch)
+            return
+        for key,request,result in batch:
+            if key in saved:
+                continue
+            if kind=="problems":
+                save_problems(request.data_structure,request.topic,result)
+            else:
+                save_quizzes(request,[result])
+            saved.add(key)
+
+    async def add(self,key:str,kind:str,request,result):
+        async with self.lock:
+            self.pending[kind].append((key,request,result))
+            if len(self.pending[kind])>=self.batch_size:
+                await self._flush(kind)
+
+    async def _flush(self,kind:str):
+        batch=self.pending[kind]
+        if not batch:
+            return
+        saved=set()
+        for attempt in range(1,FLUSH_ATTEMPTS+1):
+            try:
+                await run_in_threadpool(self._insert,kind,batch,saved)
+                break
+            except Exception as e:
+                logging.warning(f"storing {len(batch)-len(saved)} {kind} failed (attempt {attempt}/{FLUSH_ATTEMPTS}): {str(e)}")
+                if attempt<FLUSH_ATTEMPTS:
+                    await asyncio.sleep(attempt)
+        # what could not be stored stays pending for the next flush instead of being dropped
+        self.pending[kind]=[entry for entry in batch if entry[0] not in saved]
+        if saved:
+            self.checkpoint.mark(saved)
+
+    async def flush(self):
+        async with self.lock:
+            for kind in TARGETS:
+                await self._flush(kind)
+                if self.pending[kind]:
+                    self.failed+=len(self.pending[kind])
+                    logging.error(f"{len(self.pending[kind])} {kind} could not be stored, they are generated again on the next run")
+
+    async def work(self,queue:asyncio.Queue):
+        while True:
+            key,kind,request=await queue.get()
+            try:
+                started=time.perf_counter()
+                result=await produce(kind,request)
+                await self.add(key,kind,request,result)
+                if result is None:
+                    self.skipped+=1
+                    logging.info(f"skip {key} (already stored)")
+                else:
+                    self.generated+=1
+                    logging.info(f"done {key} in {time.perf_counter()-started:.1f}s")
+            except Exception as e:
+                self.failed+=1
+                logging.error(f"failed {key}: {getattr(e,'detail',None) or str(e)}")
+            finally:
+                queue.task_done()
+
+async def run(args)->int:
+    with open(args.manifest) as f:
+        manifest=json.load(f)
+    items=plan_items(manifest)
+    checkpoint=Checkpoint(args.checkpoint or f"{args.manifest}.checkpoint.json")
+    todo=[item for item in items if item[0] not in checkpoint.done]
+    logging.info(f"{len(items)} items in the manifest, {len(items)-len(todo)} already done, {len(todo)} to generate")
+    if args.dry_run:
+        for key,_,_ in todo:
+            print(key)
+        return 0
+    owner_id=None
+    if any(kind=="explanations" for _,kind,_ in todo):
+        owner=await run_in_threadpool(find_login_user,args.owner_email) if args.owner_email else None
+        if not owner:
+            logging.error("Explanations need --owner-email of an existing account to own the stored rows")
+            return 2
+        owner_id=owner.id
+    create_explanation_index()
+    load_concept_index()
+    create_problem_bank_table()
+    create_quiz_bank_table()
+    current_llm_user.set("pregenerate")
+    pipeline=Pipeline(checkpoint,owner_id,args.batch_size)
+    queue=asyncio.Queue()
+    for item in todo:
+        queue.put_nowait(item)
+    workers=[asyncio.create_task(pipeline.work(queue)) for _ in range(args.concurrency)]
+    try:
+        await queue.join()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers,return_exceptions=True)
+        await pipeline.flush()
+        await close_gateway()
+    logging.info(f"generated {pipeline.generated}, skipped {pipeline.skipped}, failed {pipeline.failed}")
+    return 1 if pipeline.failed else 0
+
+def main():
+    parser=argparse.ArgumentParser(description="Pre-generate curriculum content into the database")
+    parser.add_argument("manifest",nargs="?",help="curriculum manifest (JSON)")
+    parser.add_argument("--owner-email",help="account that owns pre-generated explanations")
+    parser.add_argument("--concurrency",type=int,default=8,help="items generated at once")
+    parser.add_argument("--batch-size",type=int,default=20,help="items per bulk insert and checkpoint")
+    parser.add_argument("--checkpoint",help="checkpoint file (default: <manifest>.checkpoint.json)")
+    parser.add_argument("--dry-run",action="store_true",help="list the items that would be generated")
+    parser.add_argument("--example",action="store_true",help="print an example manifest and exit")
+    args=parser.parse_args()
+    if args.example:
+        print(json.dumps(EXAMPLE_MANIFEST,indent=2))
+        return
+    if not args.manifest:
+        parser.error("a manifest is required")
+    logging.basicConfig(level=logging.INFO,format="%(asctime)s %(levelname)s %(message)s")
+    sys.exit(asyncio.run(run(args)))
+
+if __name__=="__main__":
+    main()
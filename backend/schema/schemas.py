@@ -2,6 +2,7 @@ from typing import Optional,List,Dict
 from pydantic import BaseModel
 import uuid
 from typing import Union,Any
+from datetime import datetime
 #-------------------SignUp----------------------------#
 class SignupRequest(BaseModel):
       name:str
@@ -64,6 +65,13 @@ class Problem(BaseModel):
      optimal_solution:Optional[str]=None
      optimal_explaination:Optional[str]=None
 #-------------------Problem----------------------------#
+#-------------------Test Suite----------------------------#
+class TestSuite(BaseModel):
+     problem_id:str
+     version:int=1
+     source:str="llm"
+     cases:List[TestCase]
+#-------------------Test Suite----------------------------#
 #-------------------Test Result----------------------------#
 class TestResult(BaseModel):
      passed:bool
@@ -123,8 +131,13 @@ class EvaluationResult(BaseModel):
      feedback:Dict[int,str]
      recommendation:str=""
 #-------------------Evaluation Result----------------------------#
-
-
-
-
-
+#-------------------Job Status----------------------------#
+class JobStatus(BaseModel):
+     job_id:str
+     kind:str
+     status:str
+     result:Optional[Any]=None
+     error:Optional[str]=None
+     created_at:Optional[datetime]=None
+     updated_at:Optional[datetime]=None
+#-------------------Job Status----------------------------#
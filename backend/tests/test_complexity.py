@@ -0,0 +1,32 @@
+from controllers.complexity import _compare
+
+def profile(time_class:str,space_class:str="O(1)",seconds:float=0.001)->dict:
+    return {"time":time_class,"space":space_class,"points":[{"n":n,"seconds":seconds*n/64,"peak_bytes":0} for n in (64,128,256)]}
+
+def test_worse_time_is_reported_as_growing_faster():
+    verdict=_compare(profile("O(n^2)"),profile("O(n)"))
+    assert "O(n^2), which grows faster (worse) than the reference's O(n)" in verdict
+    assert "faster than the reference's" not in verdict.replace("grows faster (worse) than","")
+
+def test_better_time_is_reported_as_below_the_reference():
+    verdict=_compare(profile("O(n)"),profile("O(n log n)"))
+    assert "O(n), measured below the reference's O(n log n)" in verdict
+
+def test_same_time_class():
+    verdict=_compare(profile("O(n)"),profile("O(n)"))
+    assert verdict.startswith("Your solution's running time grows like the reference's (O(n))")
+    assert "extra memory" not in verdict
+
+def test_extra_memory_is_mentioned():
+    verdict=_compare(profile("O(n)","O(n)"),profile("O(n)","O(1)"))
+    assert "uses O(n) extra memory where O(1) is enough" in verdict
+
+def test_sizes_and_ratio_at_the_largest_shared_size():
+    verdict=_compare(profile("O(n)",seconds=0.002),profile("O(n)",seconds=0.001))
+    assert "measured on inputs of size 64 to 256" in verdict
+    assert "at n=256 it took 8.00 ms, 2.0x the reference solution" in verdict
+
+def test_no_shared_sizes_leaves_out_the_ratio():
+    optimal=profile("O(n)")
+    optimal["points"]=[{"n":512,"seconds":0.01,"peak_bytes":0}]
+    assert "x the reference solution" not in _compare(profile("O(n)"),optimal)
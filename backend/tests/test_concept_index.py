@@ -0,0 +1,38 @@
+import pytest
+from controllers.concept_index import ConceptIndex,canonical_concept
+
+def index_with(*titles:str,threshold:float=0.85)->ConceptIndex:
+    index=ConceptIndex(threshold)
+    for i,title in enumerate(titles):
+        index.add(f"id-{i}",title,"Python","easy")
+    return index
+
+def test_acronyms_and_plurals_share_a_canonical_form():
+    assert canonical_concept("BSTs in Python")==canonical_concept("binary search tree")
+    assert index_with("Binary Search Trees").closest("bst","python","easy")==("id-0","binary search tree",1.0)
+
+def test_spelling_variants_match():
+    match=index_with("Binary tree zigzag level order traversal").closest("Binary tree zig-zag level order traversal","python","easy")
+    assert match is not None and match[0]=="id-0"
+
+@pytest.mark.parametrize("stored,asked",[
+    ("Detect cycle in directed graph","Detect cycle in undirected graph"),
+    ("Shortest path in weighted graph","Shortest path in unweighted graph"),
+    ("Directed acyclic graph traversal","Directed cyclic graph traversal"),
+    ("Search in sorted array","Search in unsorted array"),
+    ("Shortest path with negative weights","Shortest path with non-negative weights"),
+    ("Longest palindromic substring","Longest palindrome substring"),
+    ("Merge k sorted linked lists","Merge two sorted linked lists")
+])
+def test_near_misses_do_not_match(stored,asked):
+    assert index_with(stored).closest(asked,"python","easy") is None
+
+def test_score_equal_to_the_threshold_does_not_match():
+    # "directed" vs "undirected" scores exactly 0.8 and must not pass even without the negation check
+    index=index_with("Detect cycle in directed graph",threshold=0.8)
+    assert index.closest("Detect cycle in undirected graph","python","easy") is None
+
+def test_buckets_are_separate():
+    index=index_with("Binary search tree")
+    assert index.closest("Binary search tree","python","hard") is None
+    assert index.closest("Binary search tree","java","easy") is None
@@ -0,0 +1,71 @@
+import asyncio
+from controllers.llm_scheduler import FairScheduler
+
+WEIGHTS={"interactive":3,"bulk":1}
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_capacity_is_never_exceeded():
+    async def main():
+        scheduler=FairScheduler(2,WEIGHTS)
+        running,peak=0,0
+        async def call(i):
+            nonlocal running,peak
+            async with scheduler.slot("bulk",f"user{i}"):
+                running+=1
+                peak=max(peak,running)
+                await asyncio.sleep(0.01)
+                running-=1
+        await asyncio.gather(*(call(i) for i in range(10)))
+        return peak,scheduler.running
+    peak,running=asyncio.run(main())
+    assert peak==2
+    assert running==0
+
+def test_users_in_a_class_take_turns():
+    async def main():
+        scheduler=FairScheduler(1,WEIGHTS)
+        await scheduler.acquire("bulk","holder")
+        order=[]
+        async def call(user,tag):
+            async with scheduler.slot("bulk",user):
+                order.append(tag)
+        tasks=[asyncio.ensure_future(call("a",f"a{i}")) for i in range(3)]
+        await _settle()
+        tasks.append(asyncio.ensure_future(call("b","b0")))
+        await _settle()
+        scheduler._release()
+        await asyncio.gather(*tasks)
+        return order
+    assert asyncio.run(main())==["a0","b0","a1","a2"]
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def main():
+        scheduler=FairScheduler(1,WEIGHTS)
+        await scheduler.acquire("bulk","holder")
+        waiter=asyncio.ensure_future(scheduler.acquire("bulk","a"))
+        await _settle()
+        waiter.cancel()
+        await _settle()
+        scheduler._release()
+        return scheduler.running,scheduler.stats()["classes"]["bulk"]["waiting"]
+    assert asyncio.run(main())==(0,0)
+
+def test_release_skips_waiter_cancelled_before_it_forgot_itself():
+    async def main():
+        scheduler=FairScheduler(1,WEIGHTS)
+        await scheduler.acquire("bulk","holder")
+        cancelled=asyncio.ensure_future(scheduler.acquire("bulk","a"))
+        next_waiter=asyncio.ensure_future(scheduler.acquire("bulk","b"))
+        await _settle()
+        cancelled.cancel()
+        # release before the cancelled waiter's handler has run: the slot must go to b, not leak
+        scheduler._release()
+        await _settle()
+        assert next_waiter.done() and not next_waiter.cancelled()
+        assert scheduler.running==1
+        scheduler._release()
+        return scheduler.running
+    assert asyncio.run(main())==0
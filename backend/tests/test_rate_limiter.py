@@ -0,0 +1,36 @@
+import asyncio,time
+from controllers.rate_limiter import RateLimiter
+
+def test_reservation_is_capped_and_settled():
+    async def main():
+        limiter=RateLimiter(0,1000)
+        reserved=await limiter.acquire(5000)
+        assert reserved==1000
+        assert limiter.tokens.tokens<=0
+        limiter.settle(reserved,100)
+        return limiter.tokens.tokens
+    assert asyncio.run(main())>=899
+
+def test_unknown_usage_keeps_the_reservation():
+    async def main():
+        limiter=RateLimiter(0,1000)
+        reserved=await limiter.acquire(400)
+        limiter.settle(reserved,None)
+        return limiter.tokens.tokens
+    assert asyncio.run(main())<=601
+
+def test_waits_for_the_request_budget():
+    async def main():
+        limiter=RateLimiter(600,0)
+        limiter.requests.tokens=0
+        started=time.monotonic()
+        await limiter.acquire(10)
+        return time.monotonic()-started
+    # 600 rpm refills one request every 0.1s
+    assert 0.05<=asyncio.run(main())<1
+
+def test_zero_limits_disable_the_buckets():
+    async def main():
+        limiter=RateLimiter(0,0)
+        return await asyncio.wait_for(asyncio.gather(*(limiter.acquire(10**6) for _ in range(100))),1)
+    assert asyncio.run(main())==[10**6]*100
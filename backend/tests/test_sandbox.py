@@ -0,0 +1,102 @@
+import os
+import pytest
+from controllers import sandbox
+from controllers.sandbox import run_cases,forkserver_pool
+
+LIMITS={"cpu_seconds":2,"memory_mb":256,"wall_seconds":2}
+ENTRY=(None,"solve")
+APP_DIR=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the namespaces, chroot and uid switch need root; without it every submission is rejected (see the last test)
+isolated=pytest.mark.skipif(os.geteuid()!=0,reason="sandbox isolation needs root")
+
+def run(body:str,input_text:str="1",expected:str="1")->dict:
+    code="def solve(x):\n"+"".join(f"    {line}\n" for line in body.splitlines())
+    return run_cases(code,ENTRY,[{"input":input_text,"expected_output":expected}],LIMITS)[0]
+
+@isolated
+def test_passing_solution():
+    case=run("return x*2","21","42")
+    assert case["passed"] is True
+    assert case["actual_output"]=="42"
+
+@isolated
+def test_environment_is_empty(monkeypatch):
+    monkeypatch.setenv("JWT_SECRET","supersecret")
+    case=run("import os\nreturn dict(os.environ)",expected="{}")
+    assert case["passed"] is True
+    assert "supersecret" not in case["actual_output"]
+
+@isolated
+@pytest.mark.parametrize("path",[
+    os.path.join(APP_DIR,"config.py"),
+    ".env",
+    "/proc/self/environ",
+    "/etc/passwd",
+    os.path.join(os.path.dirname(os.__file__),"..","..","..","etc","passwd")
+])
+def test_files_outside_the_python_installation_do_not_exist(path):
+    case=run(f"return open({path!r}).read()")
+    assert case["passed"] is False
+    assert case["error_type"]=="FileNotFoundError"
+
+@isolated
+def test_app_directory_cannot_be_listed():
+    case=run(f"import os\nreturn os.listdir({APP_DIR!r})")
+    assert case["error_type"]=="FileNotFoundError"
+
+@isolated
+def test_runs_as_an_unprivileged_user_in_an_empty_work_directory():
+    case=run("import os\nreturn [os.getuid(),os.getcwd(),os.listdir('.')]")
+    assert case["actual_output"]=='[65534, "/work", []]'
+
+@isolated
+def test_inherited_file_descriptors_are_closed():
+    assert run("return open(0).read()")["actual_output"]==""
+    assert run("import os\nreturn os.fstat(9).st_size")["error_type"]=="OSError"
+
+@isolated
+def test_posixsubprocess_escape_cannot_start_a_process():
+    # bypasses the audit hook entirely, only the kernel limits stop it
+    case=run("import _posixsubprocess,os\nr,w=os.pipe()\n"
+             "_posixsubprocess.fork_exec([b'/bin/sh',b'-c',b'id; cat config.py'],[b'/bin/sh'],True,(w,),None,None,"
+             "-1,-1,-1,-1,w,-1,r,w,True,False,0,None,None,None,-1,None,False)\nreturn os.read(r,100)")
+    assert case["passed"] is False
+    assert case["error_type"]=="BlockingIOError"
+    assert "uid=" not in case["actual_output"]
+
+@isolated
+def test_stdlib_imports_still_work():
+    case=run("import fractions,heapq,bisect\nreturn str(fractions.Fraction(x,3))","6","2")
+    assert case["passed"] is True
+
+@isolated
+def test_writes_are_blocked(tmp_path):
+    target=tmp_path/"out.txt"
+    case=run(f"open({str(target)!r},'w').write('x')\nreturn 1")
+    assert case["error_type"]=="PermissionError"
+    assert not target.exists()
+
+@isolated
+def test_sockets_and_subprocesses_are_blocked():
+    assert run("import socket\nsocket.socket()\nreturn 1")["error_type"]=="PermissionError"
+    assert run("import subprocess\nsubprocess.run(['true'])\nreturn 1")["error_type"]=="PermissionError"
+
+@isolated
+def test_runaway_code_is_killed():
+    case=run("while True:\n    pass")
+    assert case["passed"] is False
+    assert case["error_type"] in ("TimeoutError","RuntimeError")
+    assert case["time_ms"]<LIMITS["wall_seconds"]*1000+1000
+
+def test_pool_workers_start_with_an_empty_environment():
+    pool=forkserver_pool(1)
+    try:
+        assert pool.submit(os.getenv,"PATH").result(timeout=30) is None
+    finally:
+        pool.shutdown()
+
+def test_fails_closed_when_isolation_cannot_be_set_up(monkeypatch):
+    monkeypatch.setattr(sandbox,"_sandbox_uid",0)
+    case=run("return x")
+    assert case["passed"] is False
+    assert case["error_type"]=="SandboxError"
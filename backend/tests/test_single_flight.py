@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from controllers.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    async def main():
+        flight=SingleFlight("test_shared")
+        calls=0
+        async def work(value):
+            nonlocal calls
+            calls+=1
+            await asyncio.sleep(0.01)
+            return value*2
+        results=await asyncio.gather(*(flight.do("key",work,21) for _ in range(5)))
+        return results,calls,flight.stats()
+    results,calls,stats=asyncio.run(main())
+    assert results==[42]*5
+    assert calls==1
+    assert stats=={"in_flight":0,"started":1,"coalesced":4}
+
+def test_one_caller_leaving_does_not_cancel_the_others():
+    async def main():
+        flight=SingleFlight("test_cancel")
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+        first=asyncio.ensure_future(flight.do("key",work))
+        second=asyncio.ensure_future(flight.do("key",work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+    assert asyncio.run(main())=="done"
+
+def test_failure_reaches_every_caller_and_frees_the_key():
+    async def main():
+        flight=SingleFlight("test_failure")
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+        results=await asyncio.gather(flight.do("key",fail),flight.do("key",fail),return_exceptions=True)
+        assert not flight.in_flight("key")
+        return results
+    results=asyncio.run(main())
+    assert all(isinstance(result,ValueError) for result in results)
+
+def test_different_keys_run_separately():
+    async def main():
+        flight=SingleFlight("test_keys")
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+        return await asyncio.gather(flight.do("a",work,1),flight.do("b",work,2)),flight.stats()["started"]
+    assert asyncio.run(main())==([1,2],2)
+
+def test_errors_are_raised_not_returned():
+    async def main():
+        flight=SingleFlight("test_raise")
+        async def fail():
+            raise KeyError("missing")
+        await flight.do("key",fail)
+    with pytest.raises(KeyError):
+        asyncio.run(main())
+
+def test_callers_join_a_call_led_by_its_caller():
+    async def main():
+        flight=SingleFlight("test_lead")
+        led=flight.lead("key")
+        assert flight.lead("key") is None
+        async def work():
+            raise AssertionError("a led call must not be started again")
+        joined=asyncio.ensure_future(flight.do("key",work))
+        await asyncio.sleep(0)
+        led.set_result("streamed")
+        return await joined,flight.stats()
+    result,stats=asyncio.run(main())
+    assert result=="streamed"
+    assert stats=={"in_flight":0,"started":1,"coalesced":1}
+
+def test_a_failed_led_call_fails_its_joiners_and_is_forgotten():
+    async def main():
+        flight=SingleFlight("test_lead_failure")
+        led=flight.lead("key")
+        joined=asyncio.ensure_future(flight.do("key",asyncio.sleep,0))
+        await asyncio.sleep(0)
+        led.set_exception(RuntimeError("stream interrupted"))
+        with pytest.raises(RuntimeError):
+            await joined
+        return flight.lead("key") is not None
+    assert asyncio.run(main())
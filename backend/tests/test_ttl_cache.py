@@ -0,0 +1,33 @@
+from controllers import ttl_cache
+from controllers.ttl_cache import TTLCache
+
+def test_least_recently_used_entry_is_evicted():
+    cache=TTLCache(maxsize=2,ttl=60)
+    cache.set("a",1)
+    cache.set("b",2)
+    assert cache.get("a")==1
+    cache.set("c",3)
+    assert cache.get("b") is None
+    assert cache.get("a")==1 and cache.get("c")==3
+
+def test_entries_expire(monkeypatch):
+    now=[1000.0]
+    monkeypatch.setattr(ttl_cache.time,"monotonic",lambda:now[0])
+    cache=TTLCache(maxsize=10,ttl=5)
+    cache.set("a",1)
+    now[0]+=4
+    assert cache.get("a")==1
+    now[0]+=2
+    assert cache.get("a","expired")=="expired"
+    assert "a" not in cache
+
+def test_pop_and_stats():
+    cache=TTLCache(maxsize=10,ttl=60)
+    cache.set("a",1)
+    assert cache.pop("a")==1
+    assert cache.pop("a","gone")=="gone"
+    cache.get("a")
+    cache.set("b",2)
+    cache.get("b")
+    stats=cache.stats()
+    assert (stats["hits"],stats["misses"],stats["size"])==(1,1,1)
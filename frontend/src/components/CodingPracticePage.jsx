@@ -407,6 +407,32 @@ const CodingPracticePage = () => {
   };
 
   // Submit code for evaluation
+  // Complexity of a passing submission is measured after the verdict, fill it in once its job finishes
+  const pollEfficiency = async (jobId, token) => {
+    for (let attempt = 0; attempt < 30; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      try {
+        const response = await fetch(`${API_URL}/api/jobs/${jobId}`, {
+          headers: { Authorization: `Bearer ${token}` },
+        });
+        if (!response.ok) return;
+        const job = await response.json();
+        if (job.status === "failed") return;
+        if (job.status === "done") {
+          setTestResults((current) =>
+            current && current.efficiency_job === jobId
+              ? { ...current, efficiency: job.result }
+              : current
+          );
+          return;
+        }
+      } catch (err) {
+        console.error("Error fetching efficiency:", err);
+        return;
+      }
+    }
+  };
+
   const submitCode = async () => {
     if (!selectedProblem) return;
     const token = getAuthToken();
@@ -445,6 +471,9 @@ const CodingPracticePage = () => {
       if (data.passed) {
         setShowOptimalSolution(true);
       }
+      if (data.efficiency_job) {
+        pollEfficiency(data.efficiency_job, token);
+      }
     } catch (err) {
       setError(err.message);
       console.error("Error submitting code:", err);
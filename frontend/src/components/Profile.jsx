@@ -36,6 +36,8 @@ const Profile = () => {
   const [activeTab, setActiveTab] = useState("learned-concepts");
   const [userData, setUserData] = useState(null);
   const [learnedConcepts, setLearnedConcepts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [selectedItem, setSelectedItem] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -63,6 +65,35 @@ const Profile = () => {
     return localStorage.getItem("token");
   };
 
+  // Fetch one page of learned concepts (title summaries); the next page is loaded on demand
+  const fetchConceptsPage = async (cursor) => {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    const conceptsResponse = await fetch(`${API_URL}/api/my-concepts${query}`, {
+      headers: {
+        Authorization: `Bearer ${getAuthToken()}`,
+      },
+    });
+    if (!conceptsResponse.ok) {
+      throw new Error("Failed to fetch learned concepts");
+    }
+    const conceptsData = await conceptsResponse.json();
+    setLearnedConcepts((concepts) =>
+      cursor ? [...concepts, ...(conceptsData.concepts || [])] : conceptsData.concepts || []
+    );
+    setNextCursor(conceptsData.next_cursor || null);
+  };
+
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await fetchConceptsPage(nextCursor);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Fetch user profile and data
   const fetchUserData = async () => {
     try {
@@ -87,17 +118,8 @@ const Profile = () => {
       const profileData = await profileResponse.json();
       setUserData(profileData);
 
-      // Fetch learned concepts
-      const conceptsResponse = await fetch(`${API_URL}/api/my-concepts`, {
-        headers: {
-          Authorization: `Bearer ${token}`,
-        },
-      });
-
-      if (conceptsResponse.ok) {
-        const conceptsData = await conceptsResponse.json();
-        setLearnedConcepts(conceptsData.concepts || []);
-      }
+      // Fetch the first page of learned concepts
+      await fetchConceptsPage(null);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -111,8 +133,27 @@ const Profile = () => {
     }
   }, [user.isLoggedIn]);
 
-  const handleItemClick = (item) => {
+  // Summaries carry no markdown, load the full explanation on demand
+  const fetchConceptDetails = async (item) => {
+    if (item.markdown_content) return item;
+    const response = await fetch(`${API_URL}/api/my-concepts/${item.id}`, {
+      headers: {
+        Authorization: `Bearer ${getAuthToken()}`,
+      },
+    });
+    if (!response.ok) return item;
+    const details = { ...item, ...(await response.json()) };
+    setLearnedConcepts((concepts) =>
+      concepts.map((concept) => (concept.id === item.id ? details : concept))
+    );
+    return details;
+  };
+
+  const handleItemClick = async (item) => {
     setSelectedItem(item);
+    fetchConceptDetails(item).then((details) =>
+      setSelectedItem((selected) => (selected?.id === item.id ? details : selected))
+    );
     if (isMobileView) {
       setShowConceptList(false);
     }
@@ -123,7 +164,8 @@ const Profile = () => {
     setSelectedItem(null);
   };
 
-  const handleDownload = (item) => {
+  const handleDownload = async (concept) => {
+    const item = await fetchConceptDetails(concept);
     const content =
       item.markdown_content || `# ${item.title}\n\n${item.content}`;
     const filename = `${item.title.toLowerCase().replace(/\s+/g, "-")}.md`;
@@ -142,7 +184,7 @@ const Profile = () => {
   const filteredItems = learnedConcepts.filter(
     (item) =>
       item.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      item.content.toLowerCase().includes(searchQuery.toLowerCase())
+      (item.content || "").toLowerCase().includes(searchQuery.toLowerCase())
   );
 
   const MarkdownRenderer = ({ content }) => {
@@ -348,7 +390,7 @@ const Profile = () => {
                   },
                   {
                     icon: BookOpen,
-                    value: learnedConcepts.length,
+                    value: `${learnedConcepts.length}${nextCursor ? "+" : ""}`,
                     label: "Topics",
                     color: "text-purple-400",
                   },
@@ -514,6 +556,15 @@ const Profile = () => {
                           </div>
                         </div>
                       ))}
+                      {nextCursor && (
+                        <button
+                          onClick={handleLoadMore}
+                          disabled={loadingMore}
+                          className="w-full p-2 text-sm text-[var(--color-primary)] border border-gray-600/30 rounded-xl hover:bg-[var(--color-primary)]/10 transition-colors disabled:opacity-50"
+                        >
+                          {loadingMore ? "Loading..." : "Load more"}
+                        </button>
+                      )}
                     </div>
                   )}
                 </div>